@@ -44,6 +44,9 @@ class CruiseToolsConfig:
           densify_factor    : default setting for density factor for coordinate grids
           raster_layer      : default setting for raster layer for point sampling (if available in project)
           distance          : default setting for point distance for profile sampling
+          priority_rasters  : default higher priority raster layers for sampling (semicolon separated)
+          additional_rasters: default additional raster layers sampled in the same pass (semicolon separated)
+          aggregation       : default sampling resolution for profile sampling (0: full, 1: mean, 2: minimum, 3: maximum pyramid)
 
         [PLANNING]
           file_type         : id of file type (0: point planning, 1: line planning)
@@ -51,16 +54,23 @@ class CruiseToolsConfig:
           mbes              : default setting to create MBES swath angle field or not
           vessel            : 
           export_format     : default bridge export format (0: default csv, 1: SAM Route Exchange style CSV)
+          dissolve_all      : default setting to dissolve MBES coverage of all features into one polygon
           swath_angle_mode  : Whether to use (i) single or (ii) individual swath angles
           swath_angle       : default swath angle for MBES coverage calculation
           swath_angle_port  : default PORT angle for MBES coverage calculation
           swath_angle_stb   : default STARBOARD angle for MBES coverage calculation
           raster_layer      : default raster layer for MBES coverage calculation (if available in project)
+          priority_rasters  : default higher priority raster layers for MBES coverage calculation (semicolon separated)
+          coverage_cache    : default setting to cache MBES segment coverage on disk
+          depth_pyramid     : default depth resolution for MBES coverage (0: full, 1: mean pyramid, 2: shallowest pyramid)
+          swath_preview     : Whether to show live MBES swath preview while digitizing planning lines
           latlon_dd         : default setting for writing Lat Lon DD coordinates (Planning Line to Vertices)
           latlon_ddm        : default setting for writing Lat Lon DDM coordinates (Planning Line to Vertices)
           offset            : default offset for parallel line planning
           side              : default setting for parallel line planning (0: starboard, 1: port)
           number_of_lines   : default number of lines for parallel line planning
+          target_overlap    : default target swath overlap [%] for line spacing optimization
+          sample_distance   : default depth sampling distance [m] for line spacing optimization
         
         [LOGGING]
           layer_logging     : default Point layer for survey logging
@@ -73,9 +83,13 @@ class CruiseToolsConfig:
           sample_depth      : Whether to sample bathymetry raster depth at logged position
           layer_raster      : default raster layer for depth sampling
           raster_band       : default raster band
+          priority_rasters  : higher priority raster layers for depth sampling (semicolon separated)
           wait_time         : default wait time for GPS stream listening (to fetch coordinates)
           events            : event presets list (semicolon separated)
         
+        [RASTER]
+          block_cache_size  : memory budget of raster block cache shared by all tools [MB] (0: no caching)
+        
         """
         # if config file exists, read it
         if os.path.isfile(self.config_file):
@@ -109,6 +123,9 @@ class CruiseToolsConfig:
                 'densify_factor': 10,
                 'raster_layer': '',
                 'distance': 1000,
+                'priority_rasters': '',
+                'additional_rasters': '',
+                'aggregation': 0,
             }
             self.config['PLANNING'] = {
                 'file_type': 0,
@@ -117,16 +134,23 @@ class CruiseToolsConfig:
                 'vessel': 'DEFAULT',
                 'export_format': 0,
                 'dissolve_buffer': True,
+                'dissolve_all': False,
                 'swath_angle_mode': 0,
                 'swath_angle': 120,
                 'swath_angle_port': 60,
                 'swath_angle_stb': 60,
                 'raster_layer': '',
+                'priority_rasters': '',
+                'coverage_cache': True,
+                'depth_pyramid': 0,
+                'swath_preview': True,
                 'latlon_dd': True,
                 'latlon_ddm': True,
                 'offset': 100,
                 'side': 0,
                 'number_of_lines': 1,
+                'target_overlap': 10,
+                'sample_distance': 100,
             }
             self.config['LOGGING'] = {
                 'layer_logging': '',
@@ -139,9 +163,13 @@ class CruiseToolsConfig:
                 'sample_depth': False,
                 'layer_raster': '',
                 'raster_band': '',
+                'priority_rasters': '',
                 'wait_time': 1000,
                 'events': '',
             }
+            self.config['RASTER'] = {
+                'block_cache_size': 256,
+            }
             self.write()
 
         return
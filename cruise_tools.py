@@ -39,6 +39,7 @@ from .provider import CruiseToolsProvider
 from . import utils
 from .logging import LogPosition
 from .planning import LinePlanningToolTip
+from .planning import LineSwathPreview
 
 # Import GUI
 from .gui.readme import ReadmeWindow
@@ -374,6 +375,11 @@ class CruiseTools:  # noqa
         parallel_line_planning = planning_menu.addAction(icon, self.tr('Parallel Line Planning'), self.run_parallel_line_planning)
         parallel_line_planning.setToolTip('Plan parallel survey lines.')
         
+        # optimize line spacing
+        icon = QIcon(f'{icon_path}/parallel_line_planning.png')  # noqa
+        optimize_line_spacing = planning_menu.addAction(icon, self.tr('Optimize Line Spacing'), self.run_optimize_line_spacing)
+        optimize_line_spacing.setToolTip('Plan parallel survey lines with depth-adaptive spacing for a target swath overlap.')
+        
         planning_menu.addSeparator()
         
         # estimate mbes coverage
@@ -384,6 +390,11 @@ class CruiseTools:  # noqa
             'Survey settings can be set in the dialog.'
         )
         
+        # analyze mbes coverage
+        icon = QIcon(f'{icon_path}/estimate_mbes_coverage.png')  # noqa
+        analyze_mbes_coverage = planning_menu.addAction(icon, self.tr('Analyze MBES Coverage'), self.run_analyze_mbes_coverage)
+        analyze_mbes_coverage.setToolTip('Compute overlap between survey lines and gaps in estimated MBES coverage.')
+        
         planning_menu.addSeparator()
         
         # export to bridge button
@@ -588,11 +599,25 @@ class CruiseTools:  # noqa
             iface.messageBar().pushMessage('Cruise Tools ', f'{utils.return_success()}! Parallel lines have been planned!', level=Qgis.Success)
         return
 
+    def run_optimize_line_spacing(self):
+        """Run OptimizeLineSpacing module."""
+        result = processing.execAlgorithmDialog('cruisetools:optimizelinespacing', {})
+        if not result == {}:
+            iface.messageBar().pushMessage('Cruise Tools ', f'{utils.return_success()}! Depth-adaptive parallel lines have been planned!', level=Qgis.Success)
+        return
+
     def run_estimate_mbes_coverage(self):
         """Run EstimateMBESCoverage module."""
         result = processing.execAlgorithmDialog('cruisetools:estimatembescoverage', {})
         if not result == {}:
-            iface.messageBar().pushMessage('Cruise Tools ', f'{utils.return_success()}! MBES coverage has been estimated: {utils.return_file_link(result["OUTPUT"])}', level=Qgis.Success)
+            iface.messageBar().pushMessage('Cruise Tools ', f'{utils.return_success()}! MBES coverage has been estimated: {utils.return_file_link(result.get("OUTPUT") or result["OUTPUT_COUNT"])}', level=Qgis.Success)
+        return
+
+    def run_analyze_mbes_coverage(self):
+        """Run AnalyzeMBESCoverage module."""
+        result = processing.execAlgorithmDialog('cruisetools:analyzembescoverage', {})
+        if not result == {}:
+            iface.messageBar().pushMessage('Cruise Tools ', f'{utils.return_success()}! MBES coverage has been analyzed: {utils.return_file_link(result["OUTPUT_OVERLAP"])}', level=Qgis.Success)
         return
 
     def run_export_to_bridge(self):
@@ -616,11 +641,14 @@ class CruiseTools:  # noqa
             # Start listener 
             if layer.isEditable():
                 # print('[DEBUG] Start listener for planning line layer')
-                self.listener = LinePlanningToolTip(canvas)
+                preview = LineSwathPreview.from_config(canvas, layer)
+                self.listener = LinePlanningToolTip(canvas, preview)
             # Stop listener
             elif not layer.isEditable():
                 # print('[DEBUG] Stop listener')
                 canvas.viewport().removeEventFilter(self.listener)
+                if self.listener.preview is not None:
+                    self.listener.preview.remove()
                 
     def connect_listener(self):
         """Connect custom EventListener to `Toggle Editing` event."""
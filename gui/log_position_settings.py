@@ -18,6 +18,7 @@ from PyQt5.QtGui import QFont
 from PyQt5.QtGui import QIcon
 from PyQt5.QtGui import QValidator
 
+from qgis.gui import QgsCheckableComboBox
 from qgis.gui import QgsMapLayerComboBox
 from qgis.gui import QgsCollapsibleGroupBox
 
@@ -195,6 +196,22 @@ class LogPositionSettings(QDialog):
             self.layer_raster = self.comboBox_raster.currentLayer()
 
         self.update_raster_band()
+
+        # ========== higher priority rasters (e.g. local high-resolution grids) ==========
+        self.label_raster_priority = QLabel()
+        self.label_raster_priority.setText('Higher priority raster layers (sampled first, in list order, band 1)')
+        self.layout_groupBox_raster.addWidget(self.label_raster_priority)
+
+        self.comboBox_raster_priority = QgsCheckableComboBox()
+        raster_names = [
+            lyr.name() for lyr in self.project.mapLayers().values() if lyr.type() == QgsMapLayerType.RasterLayer
+        ]
+        priority_names = [lyr.name() for lyr in self.layers_raster_priority]
+        self.comboBox_raster_priority.addItems(
+            priority_names + [name for name in raster_names if name not in priority_names]
+        )
+        self.comboBox_raster_priority.setCheckedItems(priority_names)
+        self.layout_groupBox_raster.addWidget(self.comboBox_raster_priority)
         
         self.layout.insertSpacing(10, 10)
 
@@ -304,6 +321,10 @@ class LogPositionSettings(QDialog):
         self.write_speed = self.checkBox_speed.isChecked()
         self.sample_depth = self.groupBox_raster.isChecked()
         self.layer_raster = self.comboBox_raster.currentLayer()
+        self.layers_raster_priority = [
+            self.project.mapLayersByName(name)[0] for name in self.comboBox_raster_priority.checkedItems()
+            if self.project.mapLayersByName(name)
+        ]
 
         self.raster_band_name = self.comboBox_raster_band.currentText()
         if self.raster_band_name != '':
@@ -333,6 +354,9 @@ class LogPositionSettings(QDialog):
         if self.sample_depth:
             self.config.set(self.module, 'layer_raster', self.layer_raster.name())
             self.config.set(self.module, 'raster_band', self.raster_band)
+            self.config.set(
+                self.module, 'priority_rasters', ';'.join(lyr.name() for lyr in self.layers_raster_priority)
+            )
 
         self.config.set(self.module, 'wait_time', self.wait_time)
         self.config.set(self.module, 'events', ';'.join(self.events))
@@ -392,6 +416,12 @@ class LogPositionSettings(QDialog):
 
         self.raster_band = self.config.getint(self.module, 'raster_band', fallback=0)
 
+        self.layers_raster_priority = []
+        for name in self.config.get(self.module, 'priority_rasters', fallback='').split(';'):
+            layers = self.project.mapLayersByName(name) if name != '' else []
+            if layers != [] and layers[0].type() == QgsMapLayerType.RasterLayer:
+                self.layers_raster_priority.append(layers[0])
+
         # ---------- ADVANCED SETTINGS ----------
         self.wait_time = self.config.getint(self.module, 'wait_time', fallback=1000)
         self.events = self.config.get(self.module, 'events', fallback='').split(';')
@@ -1,7 +1,7 @@
 import datetime
+from math import isnan
 
 from qgis.core import Qgis
-from qgis.core import QgsCoordinateTransform
 from qgis.core import QgsCoordinateReferenceSystem
 from qgis.core import QgsEditorWidgetSetup
 from qgis.core import QgsField
@@ -15,6 +15,8 @@ from PyQt5.QtCore import Qt, QDateTime, QVariant
 
 from .logging import Logging
 from ..gui.log_position_settings import LogPositionSettings
+from .. import utils
+from ..raster import create_sampler
 
 
 class LogPosition(LogPositionSettings, Logging):
@@ -42,6 +44,24 @@ class LogPosition(LogPositionSettings, Logging):
             'field_iso_format': True
         }
 
+        # raster sampler for seafloor depth (reused for all logged positions)
+        self.sampler = None
+        self.update_sampler()
+
+    def apply_settings(self):
+        """Apply and save settings, rebuild raster sampler."""
+        super(LogPosition, self).apply_settings()
+        self.update_sampler()
+
+    def update_sampler(self):
+        """Create raster sampler for seafloor depth from current settings (None if not sampling)."""
+        if self.sample_depth and self.layer_raster is not None:
+            self.sampler = create_sampler(
+                self.layer_raster, self.raster_band, self.layers_raster_priority, self.project.transformContext()
+            )
+        else:
+            self.sampler = None
+
     @pyqtSlot(dict)
     def process_datastream(self, data):
         """Process incoming GPS data stream."""
@@ -141,8 +161,8 @@ class LogPosition(LogPositionSettings, Logging):
         # transform Point to raster CRS if not identical
         if self.sample_depth:
             if self.crs_layer_logging != self.crs_layer_raster:
-                transformer_latlon2raster = QgsCoordinateTransform(
-                    self.crs_gps, self.crs_layer_raster, project=self.project
+                transformer_latlon2raster = utils.get_transform(
+                    self.crs_gps, self.crs_layer_raster, self.project.transformContext()
                 )
                 self.pt_raster = transformer_latlon2raster.transform(self.pt)
             else:
@@ -151,8 +171,8 @@ class LogPosition(LogPositionSettings, Logging):
         # transform Point to logging layer CRS if not EPSG:4326
         if self.crs_layer_logging != self.crs_gps:
             self.add_xy = True
-            transformer_latlon2vector = QgsCoordinateTransform(
-                self.crs_gps, self.crs_layer_logging, project=self.project
+            transformer_latlon2vector = utils.get_transform(
+                self.crs_gps, self.crs_layer_logging, self.project.transformContext()
             )
             self.pt_xy = transformer_latlon2vector.transform(self.pt)
         else:
@@ -176,10 +196,13 @@ class LogPosition(LogPositionSettings, Logging):
         if self.write_speed:
             self.speed = self.info.get('speed', None)
 
-        # sample depth if required
+        # sample depth if required (from higher priority rasters first, if any),
+        # sampler is reused, so tiles around the vehicle stay cached between logged positions
         if self.sample_depth:
-            self.depth_seafloor, self.depth_valid = self.layer_raster.dataProvider().sample(self.pt_raster,
-                                                                                            self.raster_band)
+            if self.sampler is None:
+                self.update_sampler()
+            self.depth_seafloor = float(self.sampler.sample(self.pt_raster.x(), self.pt_raster.y()))
+            self.depth_valid = not isnan(self.depth_seafloor)
 
         # ===== START EDITING =====
         if not self.layer_logging.isEditable():
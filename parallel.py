@@ -0,0 +1,169 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+
+from qgis.core import QgsApplication
+
+
+def python_executable():
+    """Get Python interpreter for worker processes.
+
+    QGIS embeds Python, so `sys.executable` might point to the QGIS binary.
+
+    Returns
+    -------
+    executable : str
+        path to Python interpreter
+
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+
+    for name in ('pythonw.exe', 'python.exe', 'python3', 'python'):
+        for folder in (sys.exec_prefix, os.path.join(sys.exec_prefix, 'bin')):
+            executable = os.path.join(folder, name)
+            if os.path.isfile(executable):
+                return executable
+
+    return shutil.which('python3') or sys.executable
+
+
+def init_qgis(prefix_path):
+    """Initialize QGIS in worker process (without GUI).
+
+    Parameters
+    ----------
+    prefix_path : str
+        QGIS prefix path of parent process
+
+    Returns
+    -------
+    app : QgsApplication
+        QGIS application (keep a reference while the worker is alive)
+
+    """
+    app = QgsApplication([], False)
+    QgsApplication.setPrefixPath(prefix_path, True)
+    QgsApplication.initQgis()
+
+    return app
+
+
+def register_worker(pid_queue, initializer, *initargs):
+    """Register process id of worker and run worker initializer.
+
+    Parameters
+    ----------
+    pid_queue : multiprocessing.SimpleQueue
+        queue collecting process ids of workers (see `shutdown_pool`)
+    initializer : callable
+        worker initializer
+    *initargs
+        initializer arguments
+
+    """
+    pid_queue.put(os.getpid())
+    initializer(*initargs)
+
+
+def create_process_pool(n_workers, initializer, initargs):
+    """Create pool of spawned worker processes.
+
+    Parameters
+    ----------
+    n_workers : int
+        number of worker processes
+    initializer : callable
+        worker initializer (first argument: QGIS prefix path, see `init_qgis`)
+    initargs : tuple
+        further initializer arguments (picklable)
+
+    Returns
+    -------
+    pool : concurrent.futures.ProcessPoolExecutor
+        process pool
+
+    """
+    mp_context = multiprocessing.get_context('spawn')
+    mp_context.set_executable(python_executable())
+
+    # workers report their process ids, so busy workers can be stopped on cancel
+    pid_queue = mp_context.SimpleQueue()
+
+    pool = ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=mp_context,
+        initializer=register_worker,
+        initargs=(pid_queue, initializer, QgsApplication.prefixPath()) + tuple(initargs)
+    )
+    pool.worker_pids = pid_queue
+
+    return pool
+
+
+def map_jobs(pool, function, jobs, feedback=None, poll_interval=0.2):
+    """Run jobs in process pool and yield results in job order.
+
+    Results are awaited with a timeout, so the caller stops waiting soon
+    after cancellation (busy workers are not interrupted, stop them with
+    `shutdown_pool`). No results are yielded after cancellation.
+
+    Parameters
+    ----------
+    pool : concurrent.futures.ProcessPoolExecutor
+        pool created by `create_process_pool`
+    function : callable
+        module-level job function (picklable)
+    jobs : iterable
+        job arguments
+    feedback : QgsFeedback or None
+        feedback checked for cancellation (Default value = None)
+    poll_interval : float
+        interval of cancellation checks [s] (Default value = 0.2)
+
+    Yields
+    ------
+    result
+        result of `function(job)`
+
+    """
+    futures = [pool.submit(function, job) for job in jobs]
+    for future in futures:
+        while True:
+            if feedback is not None and feedback.isCanceled():
+                return
+            try:
+                result = future.result(timeout=poll_interval)
+            except FutureTimeoutError:
+                continue
+            break
+        yield result
+
+
+def shutdown_pool(pool, feedback=None):
+    """Shut down process pool, stop busy workers if canceled.
+
+    Parameters
+    ----------
+    pool : concurrent.futures.ProcessPoolExecutor
+        pool created by `create_process_pool`
+    feedback : QgsFeedback or None
+        feedback checked for cancellation (Default value = None)
+
+    """
+    if feedback is None or not feedback.isCanceled():
+        pool.shutdown()
+        return
+
+    # do not wait for running jobs: drop pending ones and terminate workers
+    pool.shutdown(wait=False, cancel_futures=True)
+    while not pool.worker_pids.empty():
+        try:
+            os.kill(pool.worker_pids.get(), signal.SIGTERM)
+        except OSError:
+            # worker has already exited
+            pass
@@ -2,6 +2,9 @@ from .planning import Planning
 from .create_planning_file import CreatePlanningFile
 from .planning_lines_to_vertices import PlanningLinesToVertices
 from .parallel_line_planning import ParallelLinePlanning
+from .optimize_line_spacing import OptimizeLineSpacing
 from .estimate_mbes_coverage import EstimateMBESCoverage
+from .analyze_mbes_coverage import AnalyzeMBESCoverage
 from .export_to_bridge import ExportToBridge
 from .planning_tooltip import LinePlanningToolTip
+from .planning_swath_preview import LineSwathPreview
@@ -0,0 +1,272 @@
+import os
+
+from qgis.core import QgsDistanceArea
+from qgis.core import QgsFeature
+from qgis.core import QgsFeatureSink
+from qgis.core import QgsField
+from qgis.core import QgsFields
+from qgis.core import QgsGeometry
+from qgis.core import QgsProcessing
+from qgis.core import QgsProcessingAlgorithm
+from qgis.core import QgsProcessingException
+from qgis.core import QgsProcessingParameterFeatureSink
+from qgis.core import QgsProcessingParameterFeatureSource
+from qgis.core import QgsProcessingParameterField
+from qgis.core import QgsSpatialIndex
+from qgis.core import QgsUnitTypes
+from qgis.core import QgsWkbTypes
+
+from qgis.PyQt.QtCore import QCoreApplication, QVariant
+from PyQt5.QtGui import QIcon
+
+from .planning import Planning
+from . import coverage
+from .. import utils
+
+
+class AnalyzeMBESCoverage(QgsProcessingAlgorithm, Planning):
+    """Analyze overlap and gaps of estimated MBES coverage."""
+
+    # Processing parameters
+    # inputs:
+    INPUT_COVERAGE = 'INPUT_COVERAGE'
+    LINE_ID_FIELD = 'LINE_ID_FIELD'
+    INPUT_LINE = 'INPUT_LINE'
+    # outputs:
+    OUTPUT_OVERLAP = 'OUTPUT_OVERLAP'
+    OUTPUT_GAPS = 'OUTPUT_GAPS'
+
+    def __init__(self):
+        """Initialize AnalyzeMBESCoverage."""
+        super(AnalyzeMBESCoverage, self).__init__()
+
+        # ellipsoid for area measurements
+        self.ellipsoid = 'WGS84'
+
+    def initAlgorithm(self, config=None):  # noqa
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                name=self.INPUT_COVERAGE,
+                description=self.tr('Input MBES coverage layer'),
+                types=[QgsProcessing.TypeVectorPolygon],
+                defaultValue=None,
+                optional=False)
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                name=self.LINE_ID_FIELD,
+                description=self.tr('Survey line ID field'),
+                parentLayerParameterName=self.INPUT_COVERAGE,
+                defaultValue='feature_id',
+                optional=False)
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                name=self.INPUT_LINE,
+                description=self.tr('Input MBES line planning layer (plan hull for gaps)'),
+                types=[QgsProcessing.TypeVectorLine],
+                defaultValue=None,
+                optional=True)
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                name=self.OUTPUT_OVERLAP,
+                description=self.tr('MBES Coverage Overlap'),
+                type=QgsProcessing.TypeVectorPolygon,
+                defaultValue=None,
+                optional=False,
+                createByDefault=True)
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                name=self.OUTPUT_GAPS,
+                description=self.tr('MBES Coverage Gaps'),
+                type=QgsProcessing.TypeVectorPolygon,
+                defaultValue=None,
+                optional=True,
+                createByDefault=True)
+        )
+
+    def processAlgorithm(self, parameters, context, feedback):  # noqa
+        # get input variables
+        source = self.parameterAsSource(parameters, self.INPUT_COVERAGE, context)
+        line_id_field = self.parameterAsString(parameters, self.LINE_ID_FIELD, context)
+        source_line = self.parameterAsSource(parameters, self.INPUT_LINE, context)
+
+        # get CRS and project transform_context
+        crs_coverage = source.sourceCrs()
+        transform_context = context.transformContext()
+
+        # Initialize Distance calculator class with ellipsoid
+        da = QgsDistanceArea()
+        da.setSourceCrs(crs_coverage, transform_context)
+        da.setEllipsoid(self.ellipsoid)
+
+        # ===== (1) COVERAGE PER SURVEY LINE =====
+        feedback.pushConsoleInfo(self.tr('Collecting coverage polygons per survey line...'))
+
+        # coverage polygons grouped by line ID (in feature order, i.e. along the line)
+        line_geometries = {}
+        for feature in source.getFeatures():
+            geom = feature.geometry()
+            if geom.isEmpty():
+                continue
+            line_geometries.setdefault(feature.attribute(line_id_field), []).append(geom)
+
+        if len(line_geometries) == 0:
+            raise QgsProcessingException(self.tr('No coverage polygons found in input layer!'))
+
+        # dissolve coverage per survey line
+        feedback.pushConsoleInfo(self.tr('Dissolving coverage per survey line...'))
+        line_ids = list(line_geometries.keys())
+        lines = []
+        for idx, line_id in enumerate(line_ids):
+            if feedback.isCanceled():
+                return {}
+            geom = coverage.cascaded_union(line_geometries.pop(line_id))
+            area = da.convertAreaMeasurement(da.measureArea(geom), QgsUnitTypes.AreaSquareMeters)
+            lines.append((line_id, geom, area))
+            feedback.setProgress(int((idx + 1) * 30 / len(line_ids)))
+
+        # ===== (2) PAIRWISE OVERLAP =====
+        feedback.pushConsoleInfo(self.tr('Computing overlap between neighbouring survey lines...'))
+
+        # spatial index over survey line coverage (feature id = list index)
+        index = QgsSpatialIndex()
+        for idx, (_, geom, _) in enumerate(lines):
+            index.addFeature(idx, geom.boundingBox())
+
+        # overlap fields
+        line_id_type = source.fields().field(line_id_field).type()
+        overlap_fields = QgsFields()
+        overlap_fields.append(QgsField('line_a', line_id_type))
+        overlap_fields.append(QgsField('line_b', line_id_type))
+        overlap_fields.append(QgsField('overlap_m2', QVariant.Double, 'Real', len=16, prec=2))
+        overlap_fields.append(QgsField('overlap_pct_a', QVariant.Double, 'Real', len=6, prec=2))
+        overlap_fields.append(QgsField('overlap_pct_b', QVariant.Double, 'Real', len=6, prec=2))
+
+        (sink_overlap, dest_id_overlap) = self.parameterAsSink(
+            parameters, self.OUTPUT_OVERLAP, context, overlap_fields, QgsWkbTypes.MultiPolygon, crs_coverage
+        )
+        if sink_overlap is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT_OVERLAP))
+
+        n_overlaps = 0
+        for idx_a, (line_a, geom_a, area_a) in enumerate(lines):
+            if feedback.isCanceled():
+                return {}
+
+            # geometry engine for repeated predicates against line A
+            engine = QgsGeometry.createGeometryEngine(geom_a.constGet())
+            engine.prepareGeometry()
+
+            # only test neighbouring lines (bounding box candidates), each pair once
+            for idx_b in sorted(index.intersects(geom_a.boundingBox())):
+                if idx_b <= idx_a:
+                    continue
+                line_b, geom_b, area_b = lines[idx_b]
+                if not engine.intersects(geom_b.constGet()):
+                    continue
+
+                # keep polygonal parts of intersection only (lines touching at their coverage edges)
+                overlap = geom_a.intersection(geom_b)
+                if overlap.type() != QgsWkbTypes.PolygonGeometry:
+                    overlap = QgsGeometry.collectGeometry([
+                        part for part in overlap.asGeometryCollection() if part.type() == QgsWkbTypes.PolygonGeometry
+                    ])
+                if overlap.isEmpty():
+                    continue
+                area = da.convertAreaMeasurement(da.measureArea(overlap), QgsUnitTypes.AreaSquareMeters)
+
+                foverlap = QgsFeature(overlap_fields)
+                foverlap.setAttribute('line_a', line_a)
+                foverlap.setAttribute('line_b', line_b)
+                foverlap.setAttribute('overlap_m2', area)
+                foverlap.setAttribute('overlap_pct_a', 100 * area / area_a if area_a > 0 else None)
+                foverlap.setAttribute('overlap_pct_b', 100 * area / area_b if area_b > 0 else None)
+                foverlap.setGeometry(overlap)
+                sink_overlap.addFeature(foverlap, QgsFeatureSink.FastInsert)
+                n_overlaps += 1
+
+            feedback.setProgress(30 + int((idx_a + 1) * 50 / len(lines)))
+
+        feedback.pushConsoleInfo(self.tr(f'Found {n_overlaps} overlapping survey line pairs.'))
+
+        result = {self.OUTPUT_OVERLAP: dest_id_overlap}
+
+        # ===== (3) COVERAGE GAPS =====
+        gap_fields = QgsFields()
+        gap_fields.append(QgsField('gap_id', QVariant.Int, 'Integer', len=5, prec=0))
+        gap_fields.append(QgsField('area_m2', QVariant.Double, 'Real', len=16, prec=2))
+
+        (sink_gaps, dest_id_gaps) = self.parameterAsSink(
+            parameters, self.OUTPUT_GAPS, context, gap_fields, QgsWkbTypes.MultiPolygon, crs_coverage
+        )
+        if sink_gaps is not None:
+            feedback.pushConsoleInfo(self.tr('Computing coverage gaps inside plan hull...'))
+
+            # coverage of whole plan
+            plan_coverage = coverage.cascaded_union([geom for _, geom, _ in lines])
+
+            # plan hull (convex hull of planning lines or of coverage)
+            if source_line is not None:
+                line_geoms = [f.geometry() for f in source_line.getFeatures() if not f.geometry().isEmpty()]
+                hull = QgsGeometry.collectGeometry(line_geoms).convexHull()
+                hull.transform(utils.get_transform(source_line.sourceCrs(), crs_coverage, transform_context))
+            else:
+                hull = plan_coverage.convexHull()
+
+            gaps = hull.difference(plan_coverage)
+
+            gap_id = 0
+            for gap in gaps.asGeometryCollection():
+                if gap.type() != QgsWkbTypes.PolygonGeometry or gap.isEmpty():
+                    continue
+                gap_id += 1
+                fgap = QgsFeature(gap_fields)
+                fgap.setAttribute('gap_id', gap_id)
+                fgap.setAttribute(
+                    'area_m2', da.convertAreaMeasurement(da.measureArea(gap), QgsUnitTypes.AreaSquareMeters)
+                )
+                fgap.setGeometry(gap)
+                sink_gaps.addFeature(fgap, QgsFeatureSink.FastInsert)
+
+            feedback.pushConsoleInfo(self.tr(f'Found {gap_id} coverage gaps.'))
+
+            result[self.OUTPUT_GAPS] = dest_id_gaps
+
+        # 100% done
+        feedback.setProgress(100)
+        feedback.pushInfo(self.tr(f'{utils.return_success()}! MBES coverage analyzed!\n'))
+
+        return result
+
+    def name(self):  # noqa
+        return 'analyzembescoverage'
+
+    def icon(self):  # noqa
+        icon = QIcon(f'{self.plugin_dir}/icons/estimate_mbes_coverage.png')
+        return icon
+
+    def displayName(self):  # noqa
+        return self.tr('Analyze MBES Coverage')
+
+    def group(self):  # noqa
+        return self.tr('Planning')
+
+    def groupId(self):  # noqa
+        return 'planning'
+
+    def tr(self, string):  # noqa
+        return QCoreApplication.translate('Processing', string)
+
+    def shortHelpString(self):  # noqa
+        doc = f'{self.plugin_dir}/doc/analyze_mbes_coverage.help'
+        if not os.path.exists(doc):
+            return ''
+        with open(doc) as helpf:
+            help = helpf.read()
+        return help
+
+    def createInstance(self):  # noqa
+        return AnalyzeMBESCoverage()
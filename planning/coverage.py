@@ -0,0 +1,655 @@
+import numpy as np
+
+from qgis.core import Qgis
+from qgis.core import QgsCoordinateReferenceSystem
+from qgis.core import QgsCoordinateTransformContext
+from qgis.core import QgsDistanceArea
+from qgis.core import QgsGeometry
+from qgis.core import QgsPointXY
+from qgis.core import QgsRasterLayer
+from qgis.core import QgsRectangle
+
+from . import swath
+from .coverage_cache import CoverageCache
+from .. import parallel
+from .. import utils
+from ..raster import RasterMosaicSampler
+from ..raster import create_sampler
+from ..raster import raster_signature
+from ..raster import rasterize_polygon
+
+# densify modes (index of EstimateMBESCoverage.densify_modes)
+DENSIFY_NUMBER = 0
+DENSIFY_DISTANCE = 1
+DENSIFY_ADAPTIVE = 2
+
+# initial (coarse) and minimum vertex spacing of adaptive densify mode
+ADAPTIVE_MAX_SPACING = 5000  # m
+ADAPTIVE_MIN_SPACING = 25  # m
+
+# number of geometries unioned at once when dissolving coverage polygons
+UNION_BATCH_SIZE = 16
+
+# per-process state of coverage worker processes
+_worker = {}
+
+
+def segment_swath_edges(x, y, sampler, trans_utm2raster, swath_angle_port, swath_angle_stb, depth=None):
+    """Estimate port and starboard swath edges along a densified line segment.
+
+    All vertices are processed at once: nadir depths and across-track
+    profiles are sampled as arrays and the outer beams are intersected
+    with the profiles using `swath.swath_edges`.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        x coordinates of segment vertices (local UTM)
+    y : numpy.ndarray
+        y coordinates of segment vertices (local UTM)
+    sampler : RasterBlockSampler
+        sampler for bathymetry raster
+    trans_utm2raster : QgsCoordinateTransform
+        transformation from local UTM to raster CRS
+    swath_angle_port : int or float
+        port swath angle [degrees]
+    swath_angle_stb : int or float
+        starboard swath angle [degrees]
+    depth : numpy.ndarray or None
+        already sampled nadir depths of vertices (Default value = None)
+
+    Returns
+    -------
+    edge_port, edge_stbd : (numpy.ndarray, numpy.ndarray)
+        port/starboard edge coordinates (n x 2, local UTM) of vertices with valid footprint
+
+    """
+    # bearing (azimuth from north) of each vertex, last vertex uses previous bearing
+    azimuth = np.arctan2(np.diff(x), np.diff(y))
+    azimuth = np.append(azimuth, azimuth[-1])
+
+    # unit vector pointing to starboard (bearing + 90 degrees)
+    ux, uy = np.cos(azimuth), -np.sin(azimuth)
+
+    # sample nadir depths (if not provided) and skip vertices without depth
+    if depth is None:
+        depth = sampler.sample(*utils.transform_xy(x, y, trans_utm2raster))
+    valid = ~np.isnan(depth)
+    if not valid.any():
+        return np.empty((0, 2)), np.empty((0, 2))
+    x, y, ux, uy, depth = x[valid], y[valid], ux[valid], uy[valid], depth[valid]
+
+    # flat swath width and (extended) across-track profiles
+    dist_port_flat = swath.flat_swath_width(depth, swath_angle_port)
+    dist_stbd_flat = swath.flat_swath_width(depth, swath_angle_stb)
+    offsets = swath.profile_offsets(dist_port_flat, dist_stbd_flat)
+    profile_x = x[:, None] + offsets * ux[:, None]
+    profile_y = y[:, None] + offsets * uy[:, None]
+
+    # sample bathymetry along across-track profiles
+    profile_depths = sampler.sample(*utils.transform_xy(profile_x, profile_y, trans_utm2raster))
+
+    # intersect outer beams with bathymetry profiles
+    dist_port, dist_stbd = swath.swath_edges(depth, offsets, profile_depths, dist_port_flat, dist_stbd_flat)
+
+    valid_port = ~np.isnan(dist_port)
+    valid_stbd = ~np.isnan(dist_stbd)
+    edge_port = np.column_stack((x - dist_port * ux, y - dist_port * uy))[valid_port]
+    edge_stbd = np.column_stack((x + dist_stbd * ux, y + dist_stbd * uy))[valid_stbd]
+
+    return edge_port, edge_stbd
+
+
+def cascaded_union(geometries, batch_size=UNION_BATCH_SIZE):
+    """Union geometries in spatially ordered batches (tree reduction).
+
+    Geometries are expected in spatial order (e.g. segments along a line).
+    Neighbouring geometries are unioned in small batches and the batch
+    results are unioned again until a single geometry is left, so every
+    union only involves small, local geometries.
+
+    Parameters
+    ----------
+    geometries : list of QgsGeometry
+        input geometries (spatially ordered)
+    batch_size : int
+        number of geometries unioned at once (Default value = UNION_BATCH_SIZE)
+
+    Returns
+    -------
+    union : QgsGeometry
+        unioned geometry (empty if no input geometries)
+
+    """
+    geometries = list(geometries)
+    if len(geometries) == 0:
+        return QgsGeometry()
+
+    while len(geometries) > 1:
+        geometries = [
+            QgsGeometry.unaryUnion(geometries[i:i + batch_size])
+            for i in range(0, len(geometries), batch_size)
+        ]
+
+    return geometries[0]
+
+
+def infill_corners(geometry, vertices):
+    """Remove line vertices from outer ring(s) of coverage polygon ("infill corners").
+
+    Parameters
+    ----------
+    geometry : QgsGeometry
+        (multi)polygon coverage geometry
+    vertices : list of QgsPointXY
+        line vertices
+
+    Returns
+    -------
+    geometry : QgsGeometry
+        (multi)polygon of filtered outer rings
+
+    """
+    # hashed line vertices for constant time lookup
+    line_vertices = {(v.x(), v.y()) for v in vertices}
+
+    polygons = geometry.asMultiPolygon() if geometry.isMultipart() else [geometry.asPolygon()]
+    rings = [
+        [v for v in polygon[0] if (v.x(), v.y()) not in line_vertices]
+        for polygon in polygons if len(polygon) > 0
+    ]
+
+    if len(rings) == 1:
+        return QgsGeometry.fromPolygonXY(rings)
+
+    return QgsGeometry.fromMultiPolygonXY([[ring] for ring in rings])
+
+
+class CoverageEstimator:
+    """Estimate MBES swath coverage of line parts segment by segment."""
+
+    def __init__(self, sampler, crs_line, crs_raster, transform_context,
+                 densify_mode=DENSIFY_NUMBER, densify_value=100, cache=None):
+        """Initialize CoverageEstimator.
+
+        Parameters
+        ----------
+        sampler : RasterBlockSampler or RasterMosaicSampler
+            sampler for bathymetry raster (or priority mosaic)
+        crs_line : QgsCoordinateReferenceSystem
+            CRS of input lines (and output coverage)
+        crs_raster : QgsCoordinateReferenceSystem
+            CRS of bathymetry raster
+        transform_context : QgsCoordinateTransformContext
+            transform context for coordinate transformations
+        densify_mode : int
+            0: number of points, 1: distance (Default value = DENSIFY_NUMBER)
+        densify_value : int
+            number of points [#] or distance [m] (Default value = 100)
+        cache : CoverageCache or None
+            persistent segment coverage cache (Default value = None)
+
+        """
+        self.sampler = sampler
+        self.crs_line = crs_line
+        self.crs_raster = crs_raster
+        self.transform_context = transform_context
+        self.densify_mode = densify_mode
+        self.densify_value = densify_value
+
+        # "WGS 84 / World Mercator" for segment length measurements
+        self.crs_mercator = utils.get_crs('EPSG:3395')
+        self.da = QgsDistanceArea()
+        self.da.setSourceCrs(self.crs_mercator, transform_context)
+        self.da.setEllipsoid(self.crs_mercator.ellipsoidAcronym())
+
+        # segment coverage cache and settings shared by all cached segments
+        self.cache = cache
+        samplers = sampler.samplers if isinstance(sampler, RasterMosaicSampler) else [sampler]
+        self.cache_scope = (
+            tuple((raster_signature(s.provider), s.band) for s in samplers),
+            crs_line.authid() or crs_line.toWkt(Qgis.CrsWktVariant.Preferred),
+            densify_mode, densify_value, swath.N_PROFILE_SAMPLES, swath.FACTOR_EXTEND,
+        )
+
+    def extra_vertices(self, segment_length):
+        """Get number of vertices to insert into line segment.
+
+        Parameters
+        ----------
+        segment_length : float
+            ellipsoidal segment length [m]
+
+        Returns
+        -------
+        extra_vertices : int
+            number of extra vertices
+
+        """
+        if self.densify_mode == DENSIFY_NUMBER:
+            return self.densify_value
+        if self.densify_mode == DENSIFY_ADAPTIVE:
+            return 0
+
+        extra_vertices = int(segment_length // self.densify_value) - 2
+        return 0 if extra_vertices <= 0 else extra_vertices
+
+    def part_coverage(self, vertices, crs_utm, swath_angle_port, swath_angle_stb, feedback=None, progress=None):
+        """Estimate coverage polygons for all segments of a line part.
+
+        If `feedback` is canceled, the coverage of the segments finished so far is returned.
+
+        Parameters
+        ----------
+        vertices : list of (float, float)
+            line part vertices in "WGS 84 / World Mercator" (EPSG:3395)
+        crs_utm : QgsCoordinateReferenceSystem
+            local UTM zone of line feature
+        swath_angle_port : int or float
+            port swath angle [degrees]
+        swath_angle_stb : int or float
+            starboard swath angle [degrees]
+        feedback : QgsFeedback or None
+            feedback checked for cancellation before each segment (Default value = None)
+        progress : callable or None
+            function called after each finished segment (Default value = None)
+
+        Returns
+        -------
+        coverage : list of (int, numpy.ndarray)
+            segment id and coverage polygon ring (n x 2, line CRS)
+
+        """
+        # create back and forth transformations
+        trans_merc2utm = utils.get_transform(self.crs_mercator, crs_utm, self.transform_context)
+        trans_utm2line = utils.get_transform(crs_utm, self.crs_line, self.transform_context)
+        trans_utm2raster = utils.get_transform(crs_utm, self.crs_raster, self.transform_context)
+
+        coverage = []
+
+        # split line into segments
+        for segment_id in range(len(vertices) - 1):
+            # cancellation checkpoint
+            if feedback is not None and feedback.isCanceled():
+                break
+
+            start, end = tuple(vertices[segment_id]), tuple(vertices[segment_id + 1])
+
+            # reuse cached coverage of unchanged segments
+            if self.cache is not None:
+                key = self.cache.make_key(
+                    self.cache_scope, crs_utm.authid(), start, end, swath_angle_port, swath_angle_stb
+                )
+                ring = self.cache.get(key)
+                if ring is None:
+                    ring = self.segment_coverage(
+                        start, end, trans_merc2utm, trans_utm2raster, trans_utm2line, swath_angle_port, swath_angle_stb
+                    )
+                    self.cache.put(key, ring)
+            else:
+                ring = self.segment_coverage(
+                    start, end, trans_merc2utm, trans_utm2raster, trans_utm2line, swath_angle_port, swath_angle_stb
+                )
+
+            if len(ring) > 0:
+                coverage.append((segment_id, ring))
+
+            if progress is not None:
+                progress()
+
+        # write remaining buffered segments (short transaction, cache may be shared by worker processes)
+        if self.cache is not None:
+            self.cache.commit()
+
+        return coverage
+
+    def adaptive_vertices(self, start, end, segment_length, trans_merc2utm, trans_utm2raster):
+        """Densify line segment where depth changes beyond tolerance.
+
+        The segment is sampled coarsely (`ADAPTIVE_MAX_SPACING`) first. Intervals
+        where the relative depth change (and hence swath width change) between
+        neighbouring vertices exceeds the tolerance (`densify_value` [%]) or that
+        cross the raster NoData boundary are split in half, until no interval
+        needs refinement or `ADAPTIVE_MIN_SPACING` is reached. Only the new
+        midpoints are sampled in each iteration.
+
+        Parameters
+        ----------
+        start : (float, float)
+            segment start vertex in "WGS 84 / World Mercator" (EPSG:3395)
+        end : (float, float)
+            segment end vertex in "WGS 84 / World Mercator" (EPSG:3395)
+        segment_length : float
+            ellipsoidal segment length [m]
+        trans_merc2utm : QgsCoordinateTransform
+            transformation from World Mercator to local UTM
+        trans_utm2raster : QgsCoordinateTransform
+            transformation from local UTM to raster CRS
+
+        Returns
+        -------
+        xy_utm : numpy.ndarray
+            segment vertices (n x 2, local UTM)
+        depth : numpy.ndarray
+            sampled nadir depth of vertices
+
+        """
+        start = np.asarray(start, dtype=np.float64)
+        end = np.asarray(end, dtype=np.float64)
+
+        def sample(t):
+            # vertices along straight Mercator segment at relative positions t
+            xy = start + t[:, None] * (end - start)
+            x, y = utils.transform_xy(xy[:, 0], xy[:, 1], trans_merc2utm)
+            return np.column_stack((x, y)), self.sampler.sample(*utils.transform_xy(x, y, trans_utm2raster))
+
+        # coarse initial vertices
+        n_intervals = max(int(np.ceil(segment_length / ADAPTIVE_MAX_SPACING)), 1)
+        t = np.linspace(0, 1, n_intervals + 1)
+        xy_utm, depth = sample(t)
+
+        tolerance = self.densify_value / 100
+        min_interval = ADAPTIVE_MIN_SPACING / segment_length if segment_length > 0 else 1
+
+        while True:
+            d0, d1 = depth[:-1], depth[1:]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                change = np.abs(d1 - d0) / np.maximum(np.abs(d0), np.abs(d1))
+            refine = (change > tolerance) | (np.isnan(d0) != np.isnan(d1))
+            refine &= np.diff(t) >= 2 * min_interval
+            if not refine.any():
+                break
+
+            # sample midpoints of intervals to refine and merge with existing vertices
+            t_new = (t[:-1] + t[1:])[refine] / 2
+            xy_new, depth_new = sample(t_new)
+            t = np.concatenate((t, t_new))
+            order = np.argsort(t, kind='stable')
+            t = t[order]
+            xy_utm = np.vstack((xy_utm, xy_new))[order]
+            depth = np.concatenate((depth, depth_new))[order]
+
+        return xy_utm, depth
+
+    def segment_coverage(self, start, end, trans_merc2utm, trans_utm2raster, trans_utm2line,
+                         swath_angle_port, swath_angle_stb):
+        """Estimate coverage polygon of a single line segment.
+
+        Parameters
+        ----------
+        start : (float, float)
+            segment start vertex in "WGS 84 / World Mercator" (EPSG:3395)
+        end : (float, float)
+            segment end vertex in "WGS 84 / World Mercator" (EPSG:3395)
+        trans_merc2utm : QgsCoordinateTransform
+            transformation from World Mercator to local UTM
+        trans_utm2raster : QgsCoordinateTransform
+            transformation from local UTM to raster CRS
+        trans_utm2line : QgsCoordinateTransform
+            transformation from local UTM to line CRS
+        swath_angle_port : int or float
+            port swath angle [degrees]
+        swath_angle_stb : int or float
+            starboard swath angle [degrees]
+
+        Returns
+        -------
+        ring : numpy.ndarray
+            coverage polygon ring (n x 2, line CRS), empty if no valid depths were found
+
+        """
+        # ===== (1) DENSIFY LINE VERTICES =====
+        segment_geom = QgsGeometry.fromPolylineXY([QgsPointXY(*start), QgsPointXY(*end)])
+        segment_length = self.da.measureLength(segment_geom)
+
+        depth = None
+        if self.densify_mode == DENSIFY_ADAPTIVE:
+            segment_xy_utm, depth = self.adaptive_vertices(
+                start, end, segment_length, trans_merc2utm, trans_utm2raster
+            )
+        else:
+            segment_geom_dense = segment_geom.densifyByCount(self.extra_vertices(segment_length))
+
+            # transform segment from World Mercator (EPSG:3395) to local UTM zone
+            if segment_geom_dense.transform(trans_merc2utm) != 0:
+                raise Exception('CRS transformation failed')
+            segment_xy_utm = np.array([(v.x(), v.y()) for v in segment_geom_dense.asPolyline()])
+
+        # ===== (2) ESTIMATE SWATH EDGES FOR ALL VERTICES =====
+        edge_port, edge_stbd = segment_swath_edges(
+            segment_xy_utm[:, 0], segment_xy_utm[:, 1], self.sampler, trans_utm2raster,
+            swath_angle_port, swath_angle_stb, depth
+        )
+        if len(edge_stbd) == 0 or len(edge_port) == 0:
+            return np.empty((0, 2))
+
+        # ===== (3) COVERAGE POLYGON (LINE CRS) =====
+        ring = np.vstack((edge_stbd, edge_port[::-1]))
+        ring_x, ring_y = utils.transform_xy(ring[:, 0], ring[:, 1], trans_utm2line)
+
+        return np.column_stack((ring_x, ring_y))
+
+
+class CoverageCountGrid:
+    """Number of swaths covering each cell of a grid aligned with the input raster.
+
+    Swath footprints (coverage rings) are rasterized with NumPy, no vector
+    polygons are created. Only the window of the raster grid hit by any
+    swath is kept in memory (grown on demand).
+
+    """
+
+    def __init__(self, extent, xsize, ysize):
+        """Initialize CoverageCountGrid.
+
+        Parameters
+        ----------
+        extent : QgsRectangle
+            extent of input raster
+        xsize : int
+            number of raster columns
+        ysize : int
+            number of raster rows
+
+        """
+        self.x_min = extent.xMinimum()
+        self.y_max = extent.yMaximum()
+        self.xsize = xsize
+        self.ysize = ysize
+        self.res_x = extent.width() / xsize
+        self.res_y = extent.height() / ysize
+
+        # counts of grid window and its origin (row, column) in raster grid
+        self.count = np.zeros((0, 0), dtype=np.uint16)
+        self.row0 = 0
+        self.col0 = 0
+
+    def add_swath(self, rings):
+        """Add swath footprint to count grid (each cell is counted once per swath).
+
+        Parameters
+        ----------
+        rings : list of numpy.ndarray
+            coverage rings (n x 2) of swath segments in raster CRS
+
+        """
+        rings = [ring for ring in rings if len(ring) >= 3]
+        if len(rings) == 0:
+            return
+
+        # ring coordinates in pixel units
+        xy = np.vstack(rings)
+        col = (xy[:, 0] - self.x_min) / self.res_x
+        row = (self.y_max - xy[:, 1]) / self.res_y
+
+        # pixel window of swath
+        r0 = max(int(np.floor(row.min())), 0)
+        r1 = min(int(np.ceil(row.max())), self.ysize)
+        c0 = max(int(np.floor(col.min())), 0)
+        c1 = min(int(np.ceil(col.max())), self.xsize)
+        if r1 <= r0 or c1 <= c0:
+            return
+
+        # union of all segment footprints of swath
+        mask = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+        start = 0
+        for ring in rings:
+            stop = start + len(ring)
+            rasterize_polygon(mask, col[start:stop] - c0, row[start:stop] - r0)
+            start = stop
+
+        self.expand(r0, r1, c0, c1)
+        self.count[r0 - self.row0:r1 - self.row0, c0 - self.col0:c1 - self.col0] += mask
+
+    def expand(self, r0, r1, c0, c1):
+        """Grow grid window to include pixel window.
+
+        Parameters
+        ----------
+        r0, r1 : int
+            first and last+1 row of pixel window
+        c0, c1 : int
+            first and last+1 column of pixel window
+
+        """
+        if self.count.size == 0:
+            self.count = np.zeros((r1 - r0, c1 - c0), dtype=np.uint16)
+            self.row0, self.col0 = r0, c0
+            return
+
+        n_rows, n_cols = self.count.shape
+        new_r0, new_r1 = min(r0, self.row0), max(r1, self.row0 + n_rows)
+        new_c0, new_c1 = min(c0, self.col0), max(c1, self.col0 + n_cols)
+        if (new_r0, new_r1, new_c0, new_c1) == (self.row0, self.row0 + n_rows, self.col0, self.col0 + n_cols):
+            return
+
+        count = np.zeros((new_r1 - new_r0, new_c1 - new_c0), dtype=np.uint16)
+        count[self.row0 - new_r0:self.row0 - new_r0 + n_rows, self.col0 - new_c0:self.col0 - new_c0 + n_cols] = self.count
+        self.count = count
+        self.row0, self.col0 = new_r0, new_c0
+
+    def extent(self):
+        """Get extent of grid window.
+
+        Returns
+        -------
+        extent : QgsRectangle
+            extent of grid window (aligned with input raster)
+
+        """
+        n_rows, n_cols = self.count.shape
+        return QgsRectangle(
+            self.x_min + self.col0 * self.res_x,
+            self.y_max - (self.row0 + n_rows) * self.res_y,
+            self.x_min + (self.col0 + n_cols) * self.res_x,
+            self.y_max - self.row0 * self.res_y,
+        )
+
+
+def init_worker(prefix_path, raster_source, raster_provider, band, crs_line_wkt, densify_mode, densify_value,
+                cache_path=None, priority_sources=()):
+    """Initialize coverage worker process (own QGIS instance, raster handles and cache connection)."""
+    app = parallel.init_qgis(prefix_path)
+
+    raster_layer = QgsRasterLayer(raster_source, 'bathymetry', raster_provider)
+    priority_layers = [
+        QgsRasterLayer(source, f'bathymetry_{i}', provider) for i, (source, provider) in enumerate(priority_sources)
+    ]
+    crs_line = QgsCoordinateReferenceSystem.fromWkt(crs_line_wkt)
+
+    _worker['app'] = app
+    _worker['raster_layers'] = [raster_layer] + priority_layers
+    _worker['estimator'] = CoverageEstimator(
+        create_sampler(raster_layer, band, priority_layers), crs_line, raster_layer.crs(),
+        QgsCoordinateTransformContext(), densify_mode, densify_value,
+        CoverageCache(cache_path) if cache_path else None
+    )
+
+
+def run_worker_job(job):
+    """Estimate coverage of line part in worker process.
+
+    Parameters
+    ----------
+    job : dict
+        line part job with `vertices`, `crs_utm` (auth ID), `swath_angle_port` and `swath_angle_stb`
+
+    Returns
+    -------
+    coverage : list of (int, numpy.ndarray)
+        see `CoverageEstimator.part_coverage`
+
+    """
+    crs_utm = utils.get_crs(job['crs_utm'])
+    return _worker['estimator'].part_coverage(
+        job['vertices'], crs_utm, job['swath_angle_port'], job['swath_angle_stb']
+    )
+
+
+def map_jobs(pool, jobs, feedback=None, poll_interval=0.2):
+    """Run coverage jobs in process pool and yield results in job order.
+
+    Results are awaited with a timeout, so cancellation is noticed while
+    workers are busy. Pending jobs are not yielded after cancellation.
+
+    Parameters
+    ----------
+    pool : concurrent.futures.ProcessPoolExecutor
+        pool created by `create_process_pool`
+    jobs : list of dict
+        coverage jobs (see `run_worker_job`)
+    feedback : QgsFeedback or None
+        feedback checked for cancellation (Default value = None)
+    poll_interval : float
+        interval of cancellation checks [s] (Default value = 0.2)
+
+    Yields
+    ------
+    coverage : list of (int, numpy.ndarray)
+        coverage of line part (see `CoverageEstimator.part_coverage`)
+
+    """
+    return parallel.map_jobs(pool, run_worker_job, jobs, feedback, poll_interval)
+
+
+def create_process_pool(n_workers, raster_layer, band, crs_line, densify_mode, densify_value, cache_path=None,
+                        priority_layers=None):
+    """Create process pool for coverage estimation.
+
+    Each worker opens its own raster handles from the layer sources.
+
+    Parameters
+    ----------
+    n_workers : int
+        number of worker processes
+    raster_layer : QgsRasterLayer
+        bathymetry raster layer
+    band : int
+        raster band number
+    crs_line : QgsCoordinateReferenceSystem
+        CRS of input lines
+    densify_mode : int
+        0: number of points, 1: distance
+    densify_value : int
+        number of points [#] or distance [m]
+    cache_path : str or None
+        path to segment coverage cache (Default value = None)
+    priority_layers : list of QgsRasterLayer or None
+        rasters sampled before `raster_layer`, highest priority first (Default value = None)
+
+    Returns
+    -------
+    pool : concurrent.futures.ProcessPoolExecutor
+        process pool (use `run_worker_job` as task)
+
+    """
+    pool = parallel.create_process_pool(
+        n_workers, init_worker,
+        (
+            raster_layer.source(), raster_layer.providerType(), band,
+            crs_line.toWkt(Qgis.CrsWktVariant.Preferred), densify_mode, densify_value, cache_path,
+            [(lyr.source(), lyr.providerType()) for lyr in (priority_layers or [])]
+        )
+    )
+
+    return pool
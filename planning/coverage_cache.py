@@ -0,0 +1,161 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+# bump to invalidate cached coverage after changes of the estimation method
+CACHE_VERSION = 1
+
+# default maximum cache size on disk
+CACHE_MAX_SIZE = 512 * 1024 ** 2  # bytes
+
+# number of new rings buffered before they are written in one (short) transaction
+CACHE_WRITE_BATCH = 64
+
+
+class CoverageCache:
+    """Persistent cache of segment coverage polygons.
+
+    Coverage rings are stored in a SQLite database on disk and evicted
+    (least recently used first) once the total size exceeds `max_size`.
+    Segments without coverage are cached as empty rings.
+
+    Several processes may use the same cache file (SQLite allows only one
+    writer): reads run in autocommit mode without holding locks, new rings
+    and access times are buffered and written in short batch transactions.
+
+    """
+
+    def __init__(self, path, max_size=CACHE_MAX_SIZE):
+        """Initialize CoverageCache.
+
+        Parameters
+        ----------
+        path : str
+            path to SQLite cache file
+        max_size : int
+            maximum size of cached rings [bytes] (Default value = CACHE_MAX_SIZE)
+
+        """
+        self.path = path
+        self.max_size = max_size
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # autocommit mode, write transactions are opened explicitly (see `commit`)
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS coverage '
+            '(key TEXT PRIMARY KEY, ring BLOB, size INTEGER, accessed REAL)'
+        )
+
+        # buffered writes: new rings and keys of cache hits (access time is updated on commit)
+        self.pending = {}
+        self.accessed = set()
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*items):
+        """Create cache key from (hashable) items.
+
+        Parameters
+        ----------
+        *items
+            items defining the cached segment (coordinates, settings, ...)
+
+        Returns
+        -------
+        key : str
+            SHA1 hex digest
+
+        """
+        return hashlib.sha1(repr((CACHE_VERSION,) + items).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Get cached coverage ring.
+
+        Parameters
+        ----------
+        key : str
+            cache key
+
+        Returns
+        -------
+        ring : numpy.ndarray or None
+            coverage ring (n x 2) or None if not cached
+
+        """
+        if key in self.pending:
+            self.hits += 1
+            return np.frombuffer(self.pending[key], dtype=np.float64).reshape(-1, 2)
+
+        row = self.connection.execute('SELECT ring FROM coverage WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.accessed.add(key)
+        self.hits += 1
+
+        return np.frombuffer(row[0], dtype=np.float64).reshape(-1, 2)
+
+    def put(self, key, ring):
+        """Store coverage ring.
+
+        Parameters
+        ----------
+        key : str
+            cache key
+        ring : numpy.ndarray
+            coverage ring (n x 2), may be empty
+
+        """
+        self.pending[key] = np.ascontiguousarray(ring, dtype=np.float64).tobytes()
+        if len(self.pending) >= CACHE_WRITE_BATCH:
+            self.commit()
+
+    def commit(self):
+        """Write buffered rings and access times to disk (one short write transaction)."""
+        if len(self.pending) == 0 and len(self.accessed) == 0:
+            return
+
+        now = time.time()
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO coverage (key, ring, size, accessed) VALUES (?, ?, ?, ?)',
+                [(key, data, len(data), now) for key, data in self.pending.items()]
+            )
+            self.connection.executemany(
+                'UPDATE coverage SET accessed = ? WHERE key = ?', [(now, key) for key in self.accessed]
+            )
+        self.pending = {}
+        self.accessed = set()
+
+    def evict(self):
+        """Remove least recently used rings until cache size is below `max_size`."""
+        total = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM coverage').fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        keys = []
+        for key, size in self.connection.execute('SELECT key, size FROM coverage ORDER BY accessed'):
+            if total <= self.max_size:
+                break
+            keys.append((key,))
+            total -= size
+
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.executemany('DELETE FROM coverage WHERE key = ?', keys)
+
+    def close(self):
+        """Evict old entries, commit and close cache."""
+        self.commit()
+        self.evict()
+        self.connection.close()
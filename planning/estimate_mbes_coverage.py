@@ -1,10 +1,9 @@
 import os
-from math import tan, radians, degrees
+from math import degrees
+
 import numpy as np
 
-from qgis.core import QgsCoordinateTransform
-from qgis.core import QgsCoordinateReferenceSystem
-from qgis.core import QgsDistanceArea
+from qgis.core import QgsApplication
 from qgis.core import QgsFeature
 from qgis.core import QgsFeatureSink
 from qgis.core import QgsField
@@ -21,8 +20,10 @@ from qgis.core import QgsProcessingParameterDefinition
 from qgis.core import QgsProcessingParameterEnum
 from qgis.core import QgsProcessingParameterFeatureSink
 from qgis.core import QgsProcessingParameterFeatureSource
+from qgis.core import QgsProcessingParameterMultipleLayers
 from qgis.core import QgsProcessingParameterField
 from qgis.core import QgsProcessingParameterNumber
+from qgis.core import QgsProcessingParameterRasterDestination
 from qgis.core import QgsProcessingParameterRasterLayer
 from qgis.core import QgsProcessingUtils
 from qgis.core import QgsProject
@@ -32,7 +33,16 @@ from qgis.PyQt.QtCore import QCoreApplication, QVariant
 from PyQt5.QtGui import QIcon
 
 from .planning import Planning
+from . import coverage
+from . import swath
+from .coverage_cache import CoverageCache
+from .. import parallel
 from .. import utils
+from ..raster import DepthPyramid
+from ..raster import RasterBlockSampler
+from ..raster import create_sampler
+from ..raster import pyramid_directory
+from ..raster import write_array
 
 
 def get_swath_angle(feature, swath_angle_field, swath_angle_fallback):
@@ -123,7 +133,9 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
     INPUT_LINE = 'INPUT_LINE'
     INPUT_RASTER = 'INPUT_RASTER'
     BAND = 'BAND'
+    INPUT_RASTERS_PRIORITY = 'INPUT_RASTERS_PRIORITY'
     DISSOLVE_BUFFER = 'DISSOLVE_BUFFER'
+    DISSOLVE_ALL = 'DISSOLVE_ALL'
     SWATH_ANGLE_MODE = 'SWATH_ANGLE_MODE'
     SWATH_ANGLE_FIELD = 'SWATH_ANGLE_FIELD'
     SWATH_ANGLE = 'SWATH_ANGLE'
@@ -133,8 +145,12 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
     SWATH_ANGLE_STARBOARD = 'SWATH_ANGLE_STARBOARD'
     DENSIFY_MODE = 'DENSIFY_MODE'
     DENSIFY_VALUE = 'DENSIFY_VALUE'
+    DEPTH_PYRAMID = 'DEPTH_PYRAMID'
+    WORKERS = 'WORKERS'
+    USE_CACHE = 'USE_CACHE'
     # outputs:
     OUTPUT = 'OUTPUT'
+    OUTPUT_COUNT = 'OUTPUT_COUNT'
 
     def __init__(self):
         """Initialize CreatePlanningFile."""
@@ -145,12 +161,26 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
             1: 'Port/Starboard angles'
         }
         
-        self.densify_modes = ['Number of points', 'Distance']
+        self.densify_modes = ['Number of points', 'Distance', 'Adaptive (depth tolerance)']
+
+        # depth resolution: full raster or depth pyramid level matching vertex spacing and swath width
+        self.pyramid_modes = [
+            'Full resolution',
+            'Depth pyramid (mean depth)',
+            'Depth pyramid (shallowest depth, conservative)',
+        ]
+        self.pyramid_statistics = {1: 'mean', 2: 'min'}
 
         # style files for mbes coverage layers
         self.style_mbes_coverage = ':/plugins/cruisetools/styles/style_mbes_coverage.qml'
         self.style_mbes_coverage_vertices = ':/plugins/cruisetools/styles/style_mbes_coverage_vertices.qml'
 
+        # persistent segment coverage cache (in QGIS profile directory)
+        self.cache_path = os.path.join(QgsApplication.qgisSettingsDirPath(), 'cruisetools', 'mbes_coverage_cache.sqlite')
+
+        # depth pyramids of rasters without writable file source (in QGIS profile directory)
+        self.pyramid_root = os.path.join(QgsApplication.qgisSettingsDirPath(), 'cruisetools', 'depth_pyramids')
+
         # distance for line densifier
         self.vertex_distance = 50  # m
         
@@ -164,12 +194,16 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
     def initConfig(self):
         """Get default values from CruiseToolsConfig."""
         self.dissolve_buffer = self.config.getint(self.module, 'dissolve_buffer')
+        self.dissolve_all = self.config.getboolean(self.module, 'dissolve_all', fallback=False)
         self.swath_angle_mode = self.config.getint(self.module, 'swath_angle_mode')
         self.swath_angle = self.config.getint(self.module, 'swath_angle')
         self.swath_angle_port = self.config.getint(self.module, 'swath_angle_port')
         self.swath_angle_stb = self.config.getint(self.module, 'swath_angle_stb')
         # self.line_layer_name = self.config.getint(self.module, 'line_layer')
         self.raster_layer_name = self.config.getint(self.module, 'raster_layer')
+        self.priority_raster_names = self.config.get(self.module, 'priority_rasters', fallback='').split(';')
+        self.use_cache = self.config.getboolean(self.module, 'coverage_cache', fallback=True)
+        self.depth_pyramid = self.config.getint(self.module, 'depth_pyramid', fallback=0)
 
     def initAlgorithm(self, config=None):  # noqa
         self.addParameter(
@@ -296,7 +330,7 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
         self.addParameter(
             QgsProcessingParameterNumber(
                     name=self.DENSIFY_VALUE,
-                    description=self.tr('Number of points [#] OR Distance [m]'),
+                    description=self.tr('Number of points [#] OR Distance [m] OR Depth tolerance [%]'),
                     type=QgsProcessingParameterNumber.Integer,
                     defaultValue=100,
                     optional=True,
@@ -329,21 +363,83 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
                 optional=False,
                 allowMultiple=False)
         )
+        self.addParameter(
+            QgsProcessingParameterMultipleLayers(
+                name=self.INPUT_RASTERS_PRIORITY,
+                description=self.tr('Higher priority bathymetry raster layers (in priority order, band 1)'),
+                layerType=QgsProcessing.TypeRaster,
+                defaultValue=[name for name in self.priority_raster_names if name in raster_layer_names] or None,
+                optional=True)
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                name=self.DEPTH_PYRAMID,
+                description=self.tr('Depth resolution (coarse depth pyramid for transit-scale planning)'),
+                options=self.pyramid_modes,
+                defaultValue=self.depth_pyramid,
+                optional=False,
+                allowMultiple=False)
+        )
+        self.parameterDefinition(self.DEPTH_PYRAMID).setFlags(
+            QgsProcessingParameterDefinition.FlagAdvanced
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                    name=self.WORKERS,
+                    description=self.tr('Number of worker processes (0: run in QGIS process)'),
+                    type=QgsProcessingParameterNumber.Integer,
+                    defaultValue=0,
+                    optional=True,
+                    minValue=0,
+                    maxValue=os.cpu_count() or 1)
+        )
+        self.parameterDefinition(self.WORKERS).setFlags(
+            QgsProcessingParameterDefinition.FlagAdvanced
+        )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                name=self.DISSOLVE_ALL,
+                description=self.tr('Dissolve coverage of all features (whole plan)'),
+                optional=False,
+                defaultValue=self.dissolve_all)
+        )
+        self.parameterDefinition(self.DISSOLVE_ALL).setFlags(
+            QgsProcessingParameterDefinition.FlagAdvanced
+        )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                name=self.USE_CACHE,
+                description=self.tr('Cache segment coverage on disk (only recompute changed segments)'),
+                optional=False,
+                defaultValue=self.use_cache)
+        )
+        self.parameterDefinition(self.USE_CACHE).setFlags(
+            QgsProcessingParameterDefinition.FlagAdvanced
+        )
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 name=self.OUTPUT,
                 description=self.tr('MBES coverage'),
                 type=QgsProcessing.TypeVectorPolygon,
                 defaultValue=None,
-                optional=False,
+                optional=True,
                 createByDefault=True)
         )
+        self.addParameter(
+            QgsProcessingParameterRasterDestination(
+                name=self.OUTPUT_COUNT,
+                description=self.tr('MBES coverage count (number of swaths per raster cell)'),
+                defaultValue=None,
+                optional=True,
+                createByDefault=False)
+        )
     
     def processAlgorithm(self, parameters, context, feedback):  # noqa
         # get input variables
         source = self.parameterAsSource(parameters, self.INPUT_LINE, context)
 
         dissolve_buffer = self.parameterAsBoolean(parameters, self.DISSOLVE_BUFFER, context)
+        dissolve_all = self.parameterAsBoolean(parameters, self.DISSOLVE_ALL, context)
 
         swath_angle_mode = self.parameterAsInt(parameters, self.SWATH_ANGLE_MODE, context)
 
@@ -358,11 +454,16 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
         swath_angle_stb_fallback = self.parameterAsInt(parameters, self.SWATH_ANGLE_STARBOARD, context)
         
         # densify mode
-        densify_mode = self.densify_modes[self.parameterAsInt(parameters, self.DENSIFY_MODE, context)]
+        densify_mode = self.parameterAsInt(parameters, self.DENSIFY_MODE, context)
         densify_value = self.parameterAsInt(parameters, self.DENSIFY_VALUE, context)
         
         raster_layer = self.parameterAsRasterLayer(parameters, self.INPUT_RASTER, context)
         band_number = self.parameterAsInt(parameters, self.BAND, context)
+        priority_layers = self.parameterAsLayerList(parameters, self.INPUT_RASTERS_PRIORITY, context)
+        depth_pyramid = self.parameterAsEnum(parameters, self.DEPTH_PYRAMID, context)
+
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        use_cache = self.parameterAsBoolean(parameters, self.USE_CACHE, context)
 
         # copy of the field name for later
         swath_angle_field_name = swath_angle_field
@@ -373,11 +474,15 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
         feedback.pushConsoleInfo(self.tr('Storing new default settings in config...'))
         # self.config.set(self.module, 'line_layer', source.sourceName())
         self.config.set(self.module, 'dissolve_buffer', dissolve_buffer)
+        self.config.set(self.module, 'dissolve_all', dissolve_all)
         self.config.set(self.module, 'swath_angle_mode', swath_angle_mode)
         self.config.set(self.module, 'swath_angle', swath_angle_fallback)
         self.config.set(self.module, 'swath_angle_port', swath_angle_port_fallback)
         self.config.set(self.module, 'swath_angle_stb', swath_angle_stb_fallback)
         self.config.set(self.module, 'raster_layer', raster_layer.name())
+        self.config.set(self.module, 'priority_rasters', ';'.join(lyr.name() for lyr in priority_layers))
+        self.config.set(self.module, 'coverage_cache', use_cache)
+        self.config.set(self.module, 'depth_pyramid', depth_pyramid)
 
         # get CRS
         crs_line = source.sourceCrs()
@@ -387,45 +492,92 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
         transform_context = context.transformContext()
 
         # CRS transformation to "WGS84/World Mercator" for MBES coverage operations
-        crs_mercator = QgsCoordinateReferenceSystem('EPSG:3395')
-        trans_line2merc = QgsCoordinateTransform(crs_line, crs_mercator, transform_context)
+        crs_mercator = utils.get_crs('EPSG:3395')
+        trans_line2merc = utils.get_transform(crs_line, crs_mercator, transform_context)
 
         # CRS transformation to geographic projection (for UTM zone estimate)
-        # trans_merc2raster = QgsCoordinateTransform(crs_mercator, crs_raster, transform_context)
-        # trans_line2raster = QgsCoordinateTransform(crs_line, crs_raster, transform_context)
-        crs_geo = QgsCoordinateReferenceSystem('EPSG:4326')
-        trans_line2geo = QgsCoordinateTransform(crs_line, crs_geo, transform_context)
+        crs_geo = utils.get_crs('EPSG:4326')
+        trans_line2geo = utils.get_transform(crs_line, crs_geo, transform_context)
+
+        # initialize additional fields
+        feature_id_field = QgsField('feature_id', QVariant.Int, 'Integer', len=5, prec=0)
+        part_id_field = QgsField('part_id', QVariant.Int, 'Integer', len=5, prec=0)
+        segment_id_field = QgsField('segment_id', QVariant.Int, 'Integer', len=5, prec=0)
+
+        # init output fields (all line fields but 'fid')
+        buffer_fields = QgsFields()
+        for field in source.fields():
+            if field.name() != 'fid':
+                buffer_fields.append(field)
+
+        # append extra buffer fields (initial feature id, part id and segment id)
+        for buffer_field in [feature_id_field, part_id_field, segment_id_field]:
+            buffer_fields.append(buffer_field)
+
+        # if no input swath_angle field was selected on input, create one
+        if swath_angle_mode == 0 and swath_angle_field == '':
+            swath_angle_field_name = 'mbes_swath_angle'
+            buffer_fields.append(QgsField(swath_angle_field_name, QVariant.Int, 'Integer', len=5, prec=0))
+        elif swath_angle_mode == 1:
+            if swath_angle_field_port == '':
+                swath_angle_field_port_name = 'mbes_swath_angle_port'
+                buffer_fields.append(QgsField(swath_angle_field_port_name, QVariant.Int, 'Integer', len=5, prec=0))
+            if swath_angle_field_stb == '':
+                swath_angle_field_stb_name = 'mbes_swath_angle_stb'
+                buffer_fields.append(QgsField(swath_angle_field_stb_name, QVariant.Int, 'Integer', len=5, prec=0))
+
+        # creating feature sink (features are written as soon as a line part is finished)
+        feedback.pushConsoleInfo(self.tr('Creating feature sink...'))
+        (sink, dest_id) = self.parameterAsSink(
+            parameters, self.OUTPUT, context, buffer_fields, QgsWkbTypes.MultiPolygon, source.sourceCrs()
+        )
 
-        # initialize distance tool
-        da = QgsDistanceArea()
-        da.setSourceCrs(crs_mercator, transform_context)
-        da.setEllipsoid(crs_mercator.ellipsoidAcronym())
+        # [COUNT] coverage count grid aligned with input raster (swaths are rasterized without vector polygons)
+        output_count = self.parameterAsOutputLayer(parameters, self.OUTPUT_COUNT, context)
+        count_grid = None
+        if output_count:
+            count_grid = coverage.CoverageCountGrid(raster_layer.extent(), raster_layer.width(), raster_layer.height())
+            trans_line2raster = utils.get_transform(crs_line, crs_raster, transform_context)
 
-        # list for polygons features (unioned buffer)
-        buffer_union_features = []
+        if sink is None and count_grid is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        # get (selected) features
-        features = source.getFeatures()
+        # number of line parts with coverage
+        n_swaths = 0
 
-        # feedback
-        total = 100.0 / source.featureCount() if source.featureCount() else 0
+        # dissolved coverage of all parts (for whole plan dissolve)
+        plan_geometries = []
 
-        # loop through features
-        feedback.pushConsoleInfo(self.tr('Densifying line features...'))
+        # ===== (1) SPLIT FEATURES INTO LINE PART JOBS =====
         feedback.pushConsoleInfo(self.tr('Extracting vertices...'))
-        feedback.pushConsoleInfo(self.tr('Sampling values...'))
-        feedback.pushConsoleInfo(self.tr('Computing depth dependent buffers...'))
-        feedback.pushConsoleInfo(self.tr('Unionizing output features...'))
-        
-        for feature_id, feature in enumerate(features):
+
+        # input line features, line parts and (picklable) coverage jobs per part
+        line_features = []
+        parts = []
+        jobs = []
+
+        for feature_id, feature in enumerate(source.getFeatures()):
+            line_features.append(feature)
+
             # get feature geometry
             feature_geom = feature.geometry()
+            if feature_geom.isEmpty():
+                continue
 
             # transform from line CRS to "WGS 84 / World Mercator" (EPSG:3395)
             # -> same projection as navigation software on most research vessel 
             feature_geom_epsg3395 = QgsGeometry(feature_geom)  # deep copy
             feature_geom_epsg3395.transform(trans_line2merc)
 
+            # get swath angle(s) of feature
+            swath_angle = None
+            if swath_angle_mode == 0:
+                swath_angle = get_swath_angle(feature, swath_angle_field, swath_angle_fallback)
+                swath_angle_port = swath_angle_stb = swath_angle // 2
+            elif swath_angle_mode == 1:
+                swath_angle_port = get_swath_angle(feature, swath_angle_field_port, swath_angle_port_fallback)
+                swath_angle_stb = get_swath_angle(feature, swath_angle_field_stb, swath_angle_stb_fallback)
+
             # check for LineString geometry
             if QgsWkbTypes.isSingleType(feature_geom.wkbType()):
                 # get list of vertices
@@ -438,275 +590,145 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
                 vertices_list = feature_geom.asMultiPolyline()
                 vertices_list_epsg3395 = feature_geom_epsg3395.asMultiPolyline()
 
+            # get centroid as point for UTM zone selection
+            centroid_point = feature_geom.centroid().asPoint()
+
+            # check if centroid needs to be transformed to get x/y in lon/lat
+            if not crs_line.isGeographic():
+                centroid_point = trans_line2geo.transform(centroid_point)
+
+            # get UTM zone of feature for buffering
+            lat, lon = centroid_point.y(), centroid_point.x()
+            crs_utm = self.get_utm_zone(lat, lon)
+
             for part_id, (vertices, vertices_t) in enumerate(zip(vertices_list, vertices_list_epsg3395)):
-                # list for unioned buffer
-                list_buffer_union_segments = []
-
-                # get centroid as point for UTM zone selection
-                centroid = feature_geom.centroid()
-                centroid_point = centroid.asPoint()
-
-                # check if centroid needs to be transformed to get x/y in lon/lat
-                if not crs_line.isGeographic():
-                    centroid_point = trans_line2geo.transform(centroid_point)
-
-                # get UTM zone of feature for buffering
-                lat, lon = centroid_point.y(), centroid_point.x()
-                crs_utm = self.get_utm_zone(lat, lon)
-
-                # create back and forth transformations for later
-                trans_merc2utm = QgsCoordinateTransform(crs_mercator, crs_utm, transform_context)
-                trans_utm2line = QgsCoordinateTransform(crs_utm, crs_line, transform_context)
-                trans_utm2raster = QgsCoordinateTransform(crs_utm, crs_raster, transform_context)
-
-                # split line into segments
-                for segment_id in range(len(vertices_t) - 1):
-                    # ===== (1) DENSIFY LINE VERTICES =====
-                    # create new Polyline geometry for line segment
-                    segment_geom = QgsGeometry.fromPolylineXY([vertices_t[segment_id], vertices_t[segment_id + 1]])
-
-                    # measure ellipsoidal distance between start and end vertex
-                    segment_length = da.measureLength(segment_geom)
-
-                    # calculate number of extra vertices to insert
-                    if densify_mode == self.densify_modes[0]:  # number of points
-                        extra_vertices = densify_value
-                    elif densify_mode == self.densify_modes[1]:  # distance
-                        extra_vertices = int(segment_length // densify_value) - 2
-                        extra_vertices = 0 if extra_vertices <= 0 else extra_vertices
-
-                    # Densify input line segment
-                    segment_geom_dense = segment_geom.densifyByCount(extra_vertices)
-                    # Transform segment from World Mercator (EPSG:3395) to local UTM zone
-                    segment_geom_dense_utm = QgsGeometry(segment_geom_dense)  # deep copy
-                    check = segment_geom_dense_utm.transform(trans_merc2utm)
-                    if check != 0:
-                        raise Exception('CRS transformation failed')
-                    # Transform segment from local UTM zone to raster CRS
-                    segment_geom_dense_raster = QgsGeometry(segment_geom_dense_utm)  # deep copy
-                    check = segment_geom_dense_raster.transform(trans_utm2raster)
-                    if check != 0:
-                        raise Exception('CRS transformation failed')
-                        
-                    # Extract segment vertices
-                    segment_vertices_utm = segment_geom_dense_utm.asPolyline()
-                    segment_vertices_raster = segment_geom_dense_raster.asPolyline()
-
-                    # initialize additional fields
-                    feature_id_field = QgsField('feature_id', QVariant.Int, 'Integer', len=5, prec=0)
-                    part_id_field = QgsField('part_id', QVariant.Int, 'Integer', len=5, prec=0)
-                    segment_id_field = QgsField('segment_id', QVariant.Int, 'Integer', len=5, prec=0)
-                    
-                    # init list of outer beams
-                    beams_stbd = []
-                    beams_port = []
-                    
-                    bearing = 0
-                    
-                    # loop over all vertices of line segment
-                    for i, pt in enumerate(segment_vertices_utm):
-                        # Calculate bearing (in degrees) using local UTM projection
-                        bearing = (
-                            degrees(da.bearing(pt, segment_vertices_utm[i + 1])) % 360
-                            if i < len(segment_vertices_utm) - 1 else bearing  # use previous bearing for last vertex
-                        )
-                        
-                        # Sample raster at densified point along line segement (in raster CRS)
-                        pt_depth, check = raster_layer.dataProvider().sample(segment_vertices_raster[i], band_number)
-                        if not check:
-                            # print(f'[WARN] No depth found. Skipping point < {i} >')
-                            continue
-                        
-                        # Get swath angle
-                        if swath_angle_mode == 0:
-                            swath_angle = get_swath_angle(feature, swath_angle_field, swath_angle_fallback)
-                            swath_angle_port = swath_angle_stb = swath_angle // 2
-                        elif swath_angle_mode == 1:
-                            swath_angle_port = get_swath_angle(feature, swath_angle_field_port, swath_angle_port_fallback)
-                            swath_angle_stb = get_swath_angle(feature, swath_angle_field_stb, swath_angle_stb_fallback)
-                        
-                        # Calculate horizontal distance (flat surface)
-                        dist_stbd_flat = abs(tan(radians(swath_angle_stb)) * pt_depth)
-                        dist_port_flat = abs(tan(radians(swath_angle_port)) * pt_depth)
-                        
-                        # Project starboard/port outer beams
-                        pt_stbd_flat = pt.project(dist_stbd_flat, (bearing + 90) % 360)
-                        pt_port_flat = pt.project(dist_port_flat, (bearing - 90) % 360)
-                        
-                        # Create swath line geometry (flat)
-                        swath_flat = QgsGeometry.fromPolylineXY([pt_port_flat, pt_stbd_flat])
-                        
-                        # Sample bathymetry along perpendicular line (swath)
-                        FACTOR_EXTEND = 1.5  # 50% extension to account for seafloor dipping away from ship
-                        dist_stbd_extend = dist_stbd_flat * FACTOR_EXTEND
-                        dist_port_extend = dist_port_flat * FACTOR_EXTEND
-                        n_swath_densify = 100
-    
-                        # Extend swath (horizontal) by 50% to each side
-                        swath_flat_extend = swath_flat.extendLine(dist_port_extend, dist_stbd_extend)
-                        swath_flat_extend_raster = QgsGeometry(swath_flat_extend)  # deep copy
-                        swath_flat_extend_raster.transform(trans_utm2raster)
-                        vertices_swath_flat = swath_flat_extend_raster.densifyByCount(n_swath_densify).asPolyline()
-                        swath_flat_depths = np.array([
-                            raster_layer.dataProvider().sample(v, band_number)[0] for v in vertices_swath_flat
-                        ])
-                        if len(swath_flat_depths) == 0:
-                            raise Exception('No depths could be sampled from the input raster!')
-                        
-                        # Interpolate NaNs in sampled depths
-                        idx_nans = np.isnan(swath_flat_depths)
-                        x = np.arange(len(swath_flat_depths))
-                        # Note: np.interp replaces outer NaNs with the last valid value
-                        swath_flat_depths[idx_nans] = np.interp(x[idx_nans], x[~idx_nans], swath_flat_depths[~idx_nans])
-                        
-                        # Calculate intersection of outer beams with bathymetry (sampled depths)
-                        # using an arbitrary reference system (x: distance along swath, y: depth)
-                        # Init beams
-                        beam_stbd = QgsGeometry.fromPolylineXY([QgsPointXY(0, 0), QgsPointXY(dist_stbd_flat, pt_depth)])
-                        beam_port = QgsGeometry.fromPolylineXY([QgsPointXY(0, 0), QgsPointXY(-dist_port_flat, pt_depth)])
-                        
-                        # Extend beams
-                        beam_stbd = beam_stbd.extendLine(0, beam_stbd.length() * FACTOR_EXTEND)
-                        beam_port = beam_port.extendLine(0, beam_port.length() * FACTOR_EXTEND)
-                        
-                        # Init bathymetric profile (extended)
-                        xx = np.linspace(-(dist_port_flat + dist_port_extend), dist_stbd_flat + dist_stbd_extend, n_swath_densify, endpoint=True)
-                        swath_bathy = QgsGeometry.fromPolylineXY([QgsPointXY(x, y) for x, y in zip(xx, swath_flat_depths)])
-                        
-                        # Get outer beam positions
-                        # STARBOARD
-                        intersection_stbd = beam_stbd.intersection(swath_bathy)
-                        if not intersection_stbd.isEmpty():
-                            # Project expected outer beam position
-                            if intersection_stbd.isMultipart():
-                                # print(f'[WARN] Multiple stbd intersections found for point < {i} > (using nearest point)')
-                                dist_stbd = abs(list(intersection_stbd.vertices())[0].x())
-                            else:
-                                dist_stbd = abs(intersection_stbd.asPoint().x())
-                            pt_stbd = pt.project(dist_stbd, (bearing + 90) % 360)
-                            pt_stbd_src = trans_utm2line.transform(QgsPointXY(pt_stbd))
-                            beams_stbd.append(pt_stbd_src)
-                        # else:
-                            # print(f'[WARN] No starboard intersection found for point < {i} >')
-                        
-                        # PORT
-                        intersection_port = beam_port.intersection(swath_bathy)
-                        if not intersection_port.isEmpty():
-                            # Project expected outer beam position
-                            if intersection_port.isMultipart():
-                                # print(f'[WARN] Multiple port intersections found for point < {i} >! Using nearest point.')
-                                dist_port = abs(list(intersection_port.vertices())[0].x())
-                            else:
-                                dist_port = abs(intersection_port.asPoint().x())
-                            pt_port = pt.project(dist_port, (bearing - 90) % 360)
-                            pt_port_src = trans_utm2line.transform(QgsPointXY(pt_port))
-                            beams_port.append(pt_port_src)
-                        # else:
-                            # print(f'[WARN] No port intersection found for point < {i} >!')
-                    
-                    if len(beams_stbd) == 0 or len(beams_port) == 0:
-                        # print(f'[WARN]  Found no valid depths along segment < {segment_id} >!')
-                        continue
-
-                    # Create coverage polygon for line segement
-                    buffer_union = QgsGeometry.fromPolygonXY([beams_stbd + beams_port[::-1]])
-                    list_buffer_union_segments.append(buffer_union)
-
-                    # [MODE] Create QgsFeature ONLY if required for output
-                    if not dissolve_buffer:
-                        # init fields
-                        buffer_fields = QgsFields()
-
-                        # loop through line feature fields
-                        for field in feature.fields():
-                            # and append all but the 'fid' field (if it exists)
-                            if field.name() != 'fid':
-                                buffer_fields.append(field)
-
-                        # append extra buffer fields (initial feature id, part id and segment id
-                        for buffer_field in [feature_id_field, part_id_field, segment_id_field]:
-                            buffer_fields.append(buffer_field)
-
-                        # if no input swath_angle field was selected on input, create one
-                        if swath_angle_mode == 0 and swath_angle_field == '':
-                            swath_angle_field_name = 'mbes_swath_angle'
-                            buffer_fields.append(
-                                QgsField(swath_angle_field_name, QVariant.Int, 'Integer', len=5, prec=0))
-                        elif swath_angle_mode == 1:
-                            if swath_angle_field_port == '':
-                                swath_angle_field_port_name = 'mbes_swath_angle_port'
-                                buffer_fields.append(
-                                    QgsField(swath_angle_field_port_name, QVariant.Int, 'Integer', len=5, prec=0))
-                            if swath_angle_field_stb == '':
-                                swath_angle_field_stb_name = 'mbes_swath_angle_stb'
-                                buffer_fields.append(
-                                    QgsField(swath_angle_field_stb_name, QVariant.Int, 'Integer', len=5, prec=0))
-
-                        # initialize polygon feature
-                        fpoly = QgsFeature(buffer_fields)
-
-                        # set attributes for polygon feature
-                        for field in feature.fields():
-                            # ignore 'fid' again
-                            if field.name() != 'fid':
-                                # set attribute from feature to buffer
-                                fpoly.setAttribute(field.name(), feature.attribute(field.name()))
-
-                        # set addtional buffer fields
-                        fpoly.setAttribute('feature_id', feature_id)
-                        fpoly.setAttribute('part_id', part_id)
-                        fpoly.setAttribute('segment_id', segment_id)
-                        if swath_angle_mode == 0:
-                            fpoly.setAttribute(swath_angle_field_name, swath_angle)
-                        elif swath_angle_mode == 1:
-                            fpoly.setAttribute(swath_angle_field_port_name, swath_angle_port)
-                            fpoly.setAttribute(swath_angle_field_stb_name, swath_angle_stb)
-
-                        # set geometry
-                        fpoly.setGeometry(buffer_union)
-
-                        # store segment coverage polygon
-                        if fpoly.hasGeometry() and fpoly.isValid():
-                            buffer_union_features.append(fpoly)
-                
+                parts.append({
+                    'feature_id': feature_id,
+                    'part_id': part_id,
+                    'vertices': vertices,
+                    'crs_utm': crs_utm,
+                    'swath_angle': swath_angle,
+                    'swath_angle_port': swath_angle_port,
+                    'swath_angle_stb': swath_angle_stb,
+                })
+                jobs.append({
+                    'vertices': [(v.x(), v.y()) for v in vertices_t],
+                    'crs_utm': crs_utm.authid(),
+                    'swath_angle_port': swath_angle_port,
+                    'swath_angle_stb': swath_angle_stb,
+                })
+
+        # feedback (progress per line segment)
+        n_segments = sum(len(part['vertices']) - 1 for part in parts)
+        total = 100.0 / n_segments if n_segments > 0 else 0
+        segments_done = 0
+
+        def set_progress(n=1):
+            nonlocal segments_done
+            segments_done += n
+            feedback.setProgress(int(segments_done * total))
+
+        # depth raster for coverage estimation (full resolution or depth pyramid level)
+        depth_layer, depth_band = raster_layer, band_number
+        if depth_pyramid > 0 and len(parts) > 0:
+            pyramid_layer = self.get_pyramid_layer(
+                raster_layer, band_number, parts, crs_line, transform_context,
+                self.pyramid_statistics[depth_pyramid], densify_mode, densify_value, feedback
+            )
+            if feedback.isCanceled():
+                return {}
+            if pyramid_layer is not None:
+                depth_layer, depth_band = pyramid_layer, 1
+
+        # ===== (2) ESTIMATE COVERAGE PER LINE PART =====
+        feedback.pushConsoleInfo(self.tr(f'Estimating coverage of {len(parts)} line parts...'))
+
+        pool = None
+        cache = None
+        if workers > 0 and len(jobs) > 1:
+            # fan out line parts to worker processes (results are returned in job order),
+            # each worker opens its own segment coverage cache
+            feedback.pushConsoleInfo(self.tr(f'Starting {workers} worker processes...'))
+            pool = coverage.create_process_pool(
+                workers, depth_layer, depth_band, crs_line, densify_mode, densify_value,
+                self.cache_path if use_cache else None, priority_layers
+            )
+            results = coverage.map_jobs(pool, jobs, feedback)
+        else:
+            # open persistent segment coverage cache
+            cache = CoverageCache(self.cache_path) if use_cache else None
+
+            # initialize block-wise raster sampler, mosaicked with priority rasters (shared by all features)
+            sampler = create_sampler(depth_layer, depth_band, priority_layers, transform_context)
+            estimator = coverage.CoverageEstimator(
+                sampler, crs_line, crs_raster, transform_context, densify_mode, densify_value, cache
+            )
+            results = (
+                estimator.part_coverage(
+                    job['vertices'], part['crs_utm'], job['swath_angle_port'], job['swath_angle_stb'],
+                    feedback, set_progress
+                )
+                for part, job in zip(parts, jobs)
+                if not feedback.isCanceled()
+            )
+
+        try:
+            # results stop on cancel and finished coverage is still written to sink:
+            # all finished segments (serial) or only completely finished line parts (worker processes)
+            for part, part_coverage in zip(parts, results):
+                # progress of worker processes (per line part)
+                if pool is not None:
+                    set_progress(len(part['vertices']) - 1)
+
+                if len(part_coverage) > 0:
+                    n_swaths += 1
+
+                # [COUNT] rasterize swath footprint of part
+                if count_grid is not None and len(part_coverage) > 0:
+                    rings = [ring for _, ring in part_coverage]
+                    x, y = utils.transform_xy(
+                        np.concatenate([ring[:, 0] for ring in rings]),
+                        np.concatenate([ring[:, 1] for ring in rings]),
+                        trans_line2raster
+                    )
+                    splits = np.cumsum([len(ring) for ring in rings])[:-1]
+                    count_grid.add_swath(np.split(np.column_stack((x, y)), splits))
+
+                # no coverage polygons required
+                if sink is None:
+                    continue
+
+                feature_id = part['feature_id']
+                part_id = part['part_id']
+                feature = line_features[feature_id]
+                vertices = part['vertices']
+
+                # Create coverage polygon for each line segment
+                list_buffer_union_segments = [
+                    (segment_id, QgsGeometry.fromPolygonXY([[QgsPointXY(x, y) for x, y in ring]]))
+                    for segment_id, ring in part_coverage
+                ]
+
                 # [DISSOLVE]
-                if dissolve_buffer and len(list_buffer_union_segments) > 0:
+                if (dissolve_buffer or dissolve_all) and len(list_buffer_union_segments) > 0:
                     # create coverage poylgon for all segments of part (aka feature for non MultiLineString)
-                    buffer_part = QgsGeometry.unaryUnion(list_buffer_union_segments)
-                    
+                    buffer_part = coverage.cascaded_union([geom for _, geom in list_buffer_union_segments])
+
                     # remove input line vertices from coverage polygon --> "infill corners"
-                    v_buffer = buffer_part.asPolygon()[0]  # outer ring
-                    v_filt = [v for v in v_buffer if v not in vertices]
-                    
-                    buffer_part = QgsGeometry.fromPolygonXY([v_filt])
-                    
-                    # init fields
-                    buffer_fields = QgsFields()
-
-                    # loop through line feature fields
-                    for field in feature.fields():
-                        # and append all but the 'fid' field (if it exists)
-                        if field.name() != 'fid':
-                            buffer_fields.append(field)
+                    buffer_part = coverage.infill_corners(buffer_part, vertices)
 
-                    # append extra buffer fields (initial feature id, part id and segment id
-                    for buffer_field in [feature_id_field, part_id_field, segment_id_field]:
-                        buffer_fields.append(buffer_field)
+                    # segment_id 999 marks coverage dissolved per feature (part)
+                    list_buffer_union_segments = [(999, buffer_part)]
 
-                    # if no input swath_angle field was selected on input, create one
-                    if swath_angle_mode == 0 and swath_angle_field == '':
-                        swath_angle_field_name = 'mbes_swath_angle'
-                        buffer_fields.append(QgsField(swath_angle_field_name, QVariant.Int, 'Integer', len=5, prec=0))
-                    elif swath_angle_mode == 1:
-                        if swath_angle_field_port == '':
-                            swath_angle_field_port_name = 'mbes_swath_angle_port'
-                            buffer_fields.append(
-                                QgsField(swath_angle_field_port_name, QVariant.Int, 'Integer', len=5, prec=0))
-                        if swath_angle_field_stb == '':
-                            swath_angle_field_stb_name = 'mbes_swath_angle_stb'
-                            buffer_fields.append(
-                                QgsField(swath_angle_field_stb_name, QVariant.Int, 'Integer', len=5, prec=0))
+                # [DISSOLVE ALL] keep part coverage for plan coverage polygon
+                if dissolve_all:
+                    plan_geometries.extend(geom for _, geom in list_buffer_union_segments)
+                    continue
 
+                # list for coverage features of part
+                buffer_union_features = []
+
+                for segment_id, buffer_union in list_buffer_union_segments:
                     # initialize polygon feature
                     fpoly = QgsFeature(buffer_fields)
 
@@ -720,48 +742,137 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
                     # set additional buffer fields
                     fpoly.setAttribute('feature_id', feature_id)
                     fpoly.setAttribute('part_id', part_id)
-                    fpoly.setAttribute('segment_id', 999)
+                    fpoly.setAttribute('segment_id', segment_id)
                     if swath_angle_mode == 0:
-                        fpoly.setAttribute(swath_angle_field_name, swath_angle)
+                        fpoly.setAttribute(swath_angle_field_name, part['swath_angle'])
                     elif swath_angle_mode == 1:
-                        fpoly.setAttribute(swath_angle_field_port_name, swath_angle_port)
-                        fpoly.setAttribute(swath_angle_field_stb_name, swath_angle_stb)
+                        fpoly.setAttribute(swath_angle_field_port_name, part['swath_angle_port'])
+                        fpoly.setAttribute(swath_angle_field_stb_name, part['swath_angle_stb'])
 
                     # set geometry
-                    fpoly.setGeometry(buffer_part)
+                    fpoly.setGeometry(buffer_union)
 
                     # store segment coverage polygon
                     if fpoly.hasGeometry() and fpoly.isValid():
                         buffer_union_features.append(fpoly)
 
-            # set progress
-            feedback.setProgress(int(feature_id * total))
-
-        # if buffer_union_features is empty, no buffer features where created
-        if buffer_union_features == []:
+                # write coverage features of part to sink
+                sink.addFeatures(buffer_union_features, QgsFeatureSink.FastInsert)
+        finally:
+            if pool is not None:
+                parallel.shutdown_pool(pool, feedback)
+            if cache is not None:
+                feedback.pushConsoleInfo(
+                    self.tr(f'Coverage cache: {cache.hits} segments reused, {cache.misses} segments computed')
+                )
+                cache.close()
+
+        if feedback.isCanceled() and pool is not None:
+            feedback.pushWarning(self.tr('Canceled! Coverage of finished line parts has been written to output.'))
+        elif feedback.isCanceled():
+            feedback.pushWarning(self.tr('Canceled! Coverage of finished line segments has been written to output.'))
+
+        # [DISSOLVE ALL] write single coverage feature for all input features
+        # (covers all lines, so line attributes and ids are left NULL)
+        if sink is not None and dissolve_all and len(plan_geometries) > 0:
+            feedback.pushConsoleInfo(self.tr('Dissolving coverage of all features...'))
+            fpoly = QgsFeature(buffer_fields)
+            fpoly.setGeometry(coverage.cascaded_union(plan_geometries))
+            if fpoly.hasGeometry() and fpoly.isValid():
+                sink.addFeature(fpoly, QgsFeatureSink.FastInsert)
+
+        # if no line part has coverage, no depth values could be sampled
+        if n_swaths == 0 and not feedback.isCanceled():
             raise Exception('No depth values could be sampled from the input raster! Please check input line and raster.')
 
-        # creating feature sink
-        feedback.pushConsoleInfo(self.tr('Creating feature sink...'))
-        (sink, dest_id) = self.parameterAsSink(
-            parameters, self.OUTPUT, context, buffer_fields, QgsWkbTypes.MultiPolygon, source.sourceCrs()
-        )
-        if sink is None:
-            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
-
-        # write coverage features to sink
-        feedback.pushConsoleInfo(self.tr('Writing features...'))
-        sink.addFeatures(buffer_union_features, QgsFeatureSink.FastInsert)
+        # [COUNT] write coverage count raster
+        if count_grid is not None and count_grid.count.size > 0:
+            feedback.pushConsoleInfo(self.tr('Writing coverage count raster...'))
+            write_array(count_grid.count, output_count, count_grid.extent(), crs_raster)
 
         # make variables accessible for post-processing
         self.output = dest_id
+        self.output_count = output_count if count_grid is not None else None
 
         result = {self.OUTPUT: self.output}
+        if self.output_count is not None:
+            result[self.OUTPUT_COUNT] = self.output_count
 
         return result
+
+    def get_pyramid_layer(self, raster_layer, band, parts, crs_line, transform_context, statistic,
+                          densify_mode, densify_value, feedback):
+        """Get depth pyramid level matching vertex spacing and expected swath width.
+
+        The expected swath width is estimated from the median depth at the line vertices,
+        the cell size should not exceed the spacing of the across-track profile samples
+        (and the vertex spacing for distance densify mode).
+
+        Parameters
+        ----------
+        raster_layer : QgsRasterLayer
+            bathymetry raster layer
+        band : int
+            raster band number
+        parts : list of dict
+            line parts (`vertices` in line CRS, `swath_angle_port`, `swath_angle_stb`)
+        crs_line : QgsCoordinateReferenceSystem
+            CRS of input lines
+        transform_context : QgsCoordinateTransformContext
+            transform context
+        statistic : str
+            'mean' or 'min' depth pyramid
+        densify_mode : int
+            densify mode
+        densify_value : int
+            number of points [#] or distance [m] or depth tolerance [%]
+        feedback : QgsProcessingFeedback
+            feedback
+
+        Returns
+        -------
+        layer : QgsRasterLayer or None
+            pyramid level raster (band 1), None if full resolution is used
+
+        """
+        # median depth at line vertices
+        trans_line2raster = utils.get_transform(crs_line, raster_layer.crs(), transform_context)
+        x = np.array([v.x() for part in parts for v in part['vertices']])
+        y = np.array([v.y() for part in parts for v in part['vertices']])
+        depth = RasterBlockSampler(raster_layer, band).sample(*utils.transform_xy(x, y, trans_line2raster))
+        if np.isnan(depth).all():
+            return None
+        depth = np.nanmedian(np.abs(depth))
+
+        # spacing of across-track profile samples for widest swath
+        swath_width = max(
+            swath.flat_swath_width(depth, part['swath_angle_port']) + swath.flat_swath_width(depth, part['swath_angle_stb'])
+            for part in parts
+        )
+        cell_size = swath.profile_spacing(swath_width)
+        if densify_mode == coverage.DENSIFY_DISTANCE and densify_value > 0:
+            cell_size = min(cell_size, densify_value)
+
+        pyramid = DepthPyramid(raster_layer, band, pyramid_directory(raster_layer, self.pyramid_root))
+        level = pyramid.level_for(cell_size)
+        if level == 0:
+            feedback.pushConsoleInfo(self.tr('Raster resolution matches swath estimation, no depth pyramid used.'))
+            return None
+
+        feedback.pushConsoleInfo(self.tr(
+            f'Using {statistic} depth pyramid level {level} (cell size ~{pyramid.res_m * 2 ** level:.0f} m, '
+            f'target {cell_size:.0f} m).'
+        ))
+        return pyramid.level_layer(level, statistic, feedback)
     
     def postProcessAlgorithm(self, context, feedback):  # noqa
         
+        # 100% done (coverage count raster only)
+        if not self.output:
+            feedback.setProgress(100)
+            feedback.pushInfo(self.tr(f'{utils.return_success()}! MBES coverage has been estimated!\n'))
+            return {self.OUTPUT_COUNT: self.output_count}
+
         # get layer from source and context
         mbes_coverage_layer = QgsProcessingUtils.mapLayerFromString(self.output, context)
 
@@ -782,6 +893,8 @@ class EstimateMBESCoverage(QgsProcessingAlgorithm, Planning):
         feedback.pushInfo(self.tr(f'{utils.return_success()}! MBES coverage has been estimated!\n'))
 
         result = {self.OUTPUT: self.output}
+        if self.output_count is not None:
+            result[self.OUTPUT_COUNT] = self.output_count
 
         return result
 
@@ -1,8 +1,6 @@
 import os
 import csv
 
-from qgis.core import QgsCoordinateTransform
-from qgis.core import QgsCoordinateReferenceSystem
 from qgis.core import QgsField
 from qgis.core import QgsFields
 from qgis.core import QgsProcessing
@@ -81,8 +79,7 @@ class ExportToBridge(QgsProcessingAlgorithm, Planning):
         self.config.set(self.module, 'export_format', export_format)
 
         # coordinate transformation
-        trans = QgsCoordinateTransform(source.sourceCrs(), QgsCoordinateReferenceSystem('EPSG:4326'),
-                                       context.transformContext())
+        trans = utils.get_transform(source.sourceCrs(), utils.get_crs('EPSG:4326'), context.transformContext())
 
         # geometry type
         geom_type = QgsWkbTypes.geometryType(source.wkbType())
@@ -0,0 +1,375 @@
+import os
+
+import numpy as np
+
+from qgis.core import QgsFeature
+from qgis.core import QgsGeometry
+from qgis.core import QgsLineString
+from qgis.core import QgsProcessing
+from qgis.core import QgsProcessingAlgorithm
+from qgis.core import QgsProcessingParameterBand
+from qgis.core import QgsProcessingParameterEnum
+from qgis.core import QgsProcessingParameterNumber
+from qgis.core import QgsProcessingParameterRasterLayer
+from qgis.core import QgsProcessingParameterVectorLayer
+from qgis.core import QgsProject
+
+from qgis.PyQt.QtCore import QCoreApplication
+from PyQt5.QtGui import QIcon
+
+from .planning import Planning
+from . import swath
+from .. import utils
+from ..raster import RasterBlockSampler
+
+
+class OptimizeLineSpacing(QgsProcessingAlgorithm, Planning):
+    """Optimize Line Spacing."""
+
+    # Processing parameters
+    # inputs:
+    INPUT = 'INPUT'
+    INPUT_RASTER = 'INPUT_RASTER'
+    BAND = 'BAND'
+    SWATH_ANGLE_PORT = 'SWATH_ANGLE_PORT'
+    SWATH_ANGLE_STARBOARD = 'SWATH_ANGLE_STARBOARD'
+    TARGET_OVERLAP = 'TARGET_OVERLAP'
+    SIDE = 'SIDE'
+    NUMBER_OF_LINES = 'NUMBER_OF_LINES'
+    SAMPLE_DISTANCE = 'SAMPLE_DISTANCE'
+    # outputs:
+    OUTPUT = 'OUTPUT'
+
+    def __init__(self):
+        """Initialize OptimizeLineSpacing."""
+        super(OptimizeLineSpacing, self).__init__()
+
+        # available sides to create parallels
+        self.sides = [self.tr('Starboard / Right'),
+                      self.tr('Port / Left')]
+
+        # fixed-point iterations for swath width at next line position
+        self.iterations = 3
+
+        # simplification tolerance of output lines
+        self.simplify_tolerance = 5  # m
+
+        # initialize default configuration
+        self.initConfig()
+
+    def initConfig(self):
+        """Get default values from CruiseToolsConfig."""
+        self.side = self.config.getint(self.module, 'side')
+        self.number_of_lines = self.config.getint(self.module, 'number_of_lines')
+        self.swath_angle_port = self.config.getint(self.module, 'swath_angle_port')
+        self.swath_angle_stb = self.config.getint(self.module, 'swath_angle_stb')
+        self.raster_layer_name = self.config.get(self.module, 'raster_layer')
+        self.target_overlap = self.config.getint(self.module, 'target_overlap', fallback=10)
+        self.sample_distance = self.config.getint(self.module, 'sample_distance', fallback=100)
+
+    def initAlgorithm(self, config=None):  # noqa
+        self.addParameter(
+            QgsProcessingParameterVectorLayer(
+                name=self.INPUT,
+                description=self.tr('Input line planning layer'),
+                types=[QgsProcessing.TypeVectorLine],
+                defaultValue=None,
+                optional=False)
+        )
+        raster_layers = [lyr for lyr in QgsProject.instance().mapLayers().values() if lyr.type() == 1]
+        raster_layer_names = [r.name() for r in raster_layers]
+        self.addParameter(
+            QgsProcessingParameterRasterLayer(
+                name=self.INPUT_RASTER,
+                description=self.tr('Input bathymetry raster layer'),
+                defaultValue=(
+                    self.raster_layer_name
+                    if self.raster_layer_name in raster_layer_names
+                    else None
+                ),
+                optional=False)
+        )
+        self.addParameter(
+            QgsProcessingParameterBand(
+                name=self.BAND,
+                description=self.tr('Band number'),
+                defaultValue=1,
+                parentLayerParameterName=self.INPUT_RASTER,
+                optional=False,
+                allowMultiple=False)
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                name=self.SWATH_ANGLE_PORT,
+                description=self.tr('Swath angle PORT [degrees]'),
+                type=QgsProcessingParameterNumber.Integer,
+                optional=False,
+                defaultValue=self.swath_angle_port,
+                minValue=5,
+                maxValue=80)
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                name=self.SWATH_ANGLE_STARBOARD,
+                description=self.tr('Swath angle STARBOARD [degrees]'),
+                type=QgsProcessingParameterNumber.Integer,
+                optional=False,
+                defaultValue=self.swath_angle_stb,
+                minValue=5,
+                maxValue=80)
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                name=self.TARGET_OVERLAP,
+                description=self.tr('Target swath overlap [%]'),
+                type=QgsProcessingParameterNumber.Integer,
+                optional=False,
+                defaultValue=self.target_overlap,
+                minValue=0,
+                maxValue=90)
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                name=self.SIDE,
+                description=self.tr('Side'),
+                options=self.sides,
+                defaultValue=self.side,
+                optional=False,
+                allowMultiple=False)
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                name=self.NUMBER_OF_LINES,
+                description=self.tr('Number of lines'),
+                type=QgsProcessingParameterNumber.Integer,
+                optional=False,
+                defaultValue=self.number_of_lines,
+                minValue=1,
+                maxValue=500)
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                name=self.SAMPLE_DISTANCE,
+                description=self.tr('Depth sampling distance along lines [meters]'),
+                type=QgsProcessingParameterNumber.Integer,
+                optional=False,
+                defaultValue=self.sample_distance,
+                minValue=1,
+                maxValue=100000)
+        )
+
+    def processAlgorithm(self, parameters, context, feedback):  # noqa
+        # get input variables
+        layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        raster_layer = self.parameterAsRasterLayer(parameters, self.INPUT_RASTER, context)
+        band_number = self.parameterAsInt(parameters, self.BAND, context)
+        swath_angle_port = self.parameterAsInt(parameters, self.SWATH_ANGLE_PORT, context)
+        swath_angle_stb = self.parameterAsInt(parameters, self.SWATH_ANGLE_STARBOARD, context)
+        target_overlap = self.parameterAsInt(parameters, self.TARGET_OVERLAP, context)
+        side = self.parameterAsInt(parameters, self.SIDE, context)
+        number_of_lines = self.parameterAsInt(parameters, self.NUMBER_OF_LINES, context)
+        sample_distance = self.parameterAsInt(parameters, self.SAMPLE_DISTANCE, context)
+
+        # set new default values in config
+        feedback.pushConsoleInfo(self.tr('Storing new default settings in config...'))
+        self.config.set(self.module, 'side', side)
+        self.config.set(self.module, 'number_of_lines', number_of_lines)
+        self.config.set(self.module, 'swath_angle_port', swath_angle_port)
+        self.config.set(self.module, 'swath_angle_stb', swath_angle_stb)
+        self.config.set(self.module, 'raster_layer', raster_layer.name())
+        self.config.set(self.module, 'target_overlap', target_overlap)
+        self.config.set(self.module, 'sample_distance', sample_distance)
+
+        # normal vectors point to starboard, flip them for port side
+        sign = 1 if side == 0 else -1
+
+        # swath angle facing the next line (lines alternate direction --> lawn mower pattern):
+        # lines in direction of the reference line face the next line with the selected side,
+        # reversed lines with the opposite side
+        angle_side, angle_other = (swath_angle_stb, swath_angle_port) if side == 0 else (swath_angle_port, swath_angle_stb)
+
+        # get CRS and project transform_context
+        crs_layer = layer.sourceCrs()
+        crs_raster = raster_layer.crs()
+        transform_context = context.transformContext()
+
+        # initialize block-wise raster sampler
+        sampler = RasterBlockSampler(raster_layer, band_number)
+
+        # get features
+        features = list(layer.getFeatures())
+
+        # empty list for original features to be deleted
+        # this is necessary to keep the original line in order with the new lines
+        features_to_delete = []
+
+        # empty list for new line features
+        features_to_add = []
+
+        feedback.pushConsoleInfo(self.tr('Creating depth-adaptive parallel lines...'))
+
+        for feature_idx, feature in enumerate(features):
+            if feedback.isCanceled():
+                break
+
+            features_to_delete.append(feature)
+            features_to_add.append(feature)
+
+            # get feature geometry (first part of multi line geometries)
+            geom = feature.geometry()
+            if geom.isEmpty():
+                continue
+
+            # determine best fitting UTM zone
+            centroid = geom.centroid()
+            if crs_layer.isGeographic():
+                lat, lon = centroid.asPoint().y(), centroid.asPoint().x()
+            else:
+                trans_layer2geo = utils.get_transform(crs_layer, utils.get_crs('EPSG:4326'), transform_context)
+                centroid.transform(trans_layer2geo)
+                lat, lon = centroid.asPoint().y(), centroid.asPoint().x()
+            crs_utm = self.get_utm_zone(lat, lon)
+
+            # create transformations
+            trans_layer2utm = utils.get_transform(crs_layer, crs_utm, transform_context)
+            trans_utm2layer = utils.get_transform(crs_utm, crs_layer, transform_context)
+            trans_utm2raster = utils.get_transform(crs_utm, crs_raster, transform_context)
+
+            # transform geometry to UTM and densify to depth sampling distance
+            geom_utm = QgsGeometry(geom)
+            geom_utm.transform(trans_layer2utm)
+            if geom_utm.isMultipart():
+                geom_utm = QgsGeometry.fromPolylineXY(geom_utm.asMultiPolyline()[0])
+            geom_utm = geom_utm.densifyByDistance(sample_distance)
+            xy = np.array([(v.x(), v.y()) for v in geom_utm.asPolyline()])
+            x, y = xy[:, 0], xy[:, 1]
+
+            # sample depths along reference line
+            depth = self.sample_depth(sampler, x, y, trans_utm2raster)
+
+            spacings = []
+            for i in range(number_of_lines):
+                if np.isnan(depth).all():
+                    feedback.reportError(
+                        self.tr(f'Feature {feature.id()}: no depth values at line {i}, stopping.'), fatalError=False
+                    )
+                    break
+
+                # swath angle towards next line and of next line back towards current line
+                angle = angle_side if i % 2 == 0 else angle_other
+
+                # normal vectors towards next line
+                nx, ny = swath.line_normals(x, y)
+                nx, ny = sign * nx, sign * ny
+
+                # swath width of current line towards next line
+                width_current = swath.flat_swath_width(depth, angle)
+
+                # fixed-point iteration for swath width of next line (depth at next line position),
+                # last pass samples depths at the final spacing
+                depth_next = depth
+                for _ in range(self.iterations + 1):
+                    width_next = swath.flat_swath_width(depth_next, angle)
+                    spacing = swath.line_spacing(width_current, width_next, target_overlap)
+                    depth_sampled = self.sample_depth(sampler, x + spacing * nx, y + spacing * ny, trans_utm2raster)
+                    depth_next = np.where(np.isnan(depth_sampled), depth, depth_sampled)
+                spacings.append(float(np.mean(spacing)))
+
+                # next line (depths at new vertices are already sampled)
+                x, y = x + spacing * nx, y + spacing * ny
+                depth = depth_sampled
+
+                # create line geometry in layer CRS
+                geom_parallel = QgsGeometry(QgsLineString(x.tolist(), y.tolist()))
+                geom_parallel = geom_parallel.simplify(self.simplify_tolerance)
+                geom_parallel.transform(trans_utm2layer)
+
+                # reverse every second vector direction to create lawn mower pattern
+                if i % 2 == 0:
+                    geom_parallel = QgsGeometry(geom_parallel.constGet().reversed())
+
+                # initialize new feature with attributes of reference line
+                feature_parallel = QgsFeature(feature.fields())
+                feature_parallel.setAttributes(feature.attributes())
+                feature_parallel.setGeometry(geom_parallel)
+                features_to_add.append(feature_parallel)
+
+            if len(spacings) > 0:
+                feedback.pushConsoleInfo(self.tr(
+                    f'Feature {feature.id()}: {len(spacings)} lines, '
+                    f'mean spacing {np.mean(spacings):.0f} m (min {np.min(spacings):.0f} m, max {np.max(spacings):.0f} m)'
+                ))
+
+            feedback.setProgress(int((feature_idx + 1) * 100 / len(features)))
+
+        # set layer to edit mode
+        if not layer.isEditable():
+            layer.startEditing()
+
+        # delete original features
+        for feature in features_to_delete:
+            layer.deleteFeature(feature.id())
+
+        # add new features to layer
+        layer.addFeatures(features_to_add)
+
+        # 100% done
+        feedback.setProgress(100)
+        feedback.pushInfo(self.tr(f'{utils.return_success()}! Depth-adaptive parallel lines have been planned!\n'))
+
+        result = {self.OUTPUT: layer}
+
+        return result
+
+    def sample_depth(self, sampler, x, y, trans_utm2raster):
+        """Sample depths along line and interpolate gaps.
+
+        Parameters
+        ----------
+        sampler : RasterBlockSampler
+            sampler for bathymetry raster
+        x : numpy.ndarray
+            x coordinates (UTM)
+        y : numpy.ndarray
+            y coordinates (UTM)
+        trans_utm2raster : QgsCoordinateTransform
+            transformation from UTM to raster CRS
+
+        Returns
+        -------
+        depth : numpy.ndarray
+            sampled depths (NaN only if no depth was found along the whole line)
+
+        """
+        depth = sampler.sample(*utils.transform_xy(x, y, trans_utm2raster))
+        return swath.fill_nans(depth[None, :])[0]
+
+    def name(self):  # noqa
+        return 'optimizelinespacing'
+
+    def icon(self):  # noqa
+        icon = QIcon(f'{self.plugin_dir}/icons/parallel_line_planning.png')
+        return icon
+
+    def displayName(self):  # noqa
+        return self.tr('Optimize Line Spacing')
+
+    def group(self):  # noqa
+        return self.tr('Planning')
+
+    def groupId(self):  # noqa
+        return 'planning'
+
+    def tr(self, string):  # noqa
+        return QCoreApplication.translate('Processing', string)
+
+    def shortHelpString(self):  # noqa
+        doc = f'{self.plugin_dir}/doc/optimize_line_spacing.help'
+        if not os.path.exists(doc):
+            return ''
+        with open(doc) as helpf:
+            help = helpf.read()
+        return help
+
+    def createInstance(self):  # noqa
+        return OptimizeLineSpacing()
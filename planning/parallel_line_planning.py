@@ -1,7 +1,6 @@
 import os
 
 from qgis.core import Qgis
-from qgis.core import QgsCoordinateTransform
 from qgis.core import QgsFeature
 from qgis.core import QgsGeometry
 from qgis.core import QgsProcessing
@@ -150,8 +149,8 @@ class ParallelLinePlanning(QgsProcessingAlgorithm, Planning):
             crs_utm = self.get_utm_zone(lat, lon)
 
             # create transformations
-            trans_layer2utm = QgsCoordinateTransform(crs_layer, crs_utm, transform_context)
-            trans_utm2layer = QgsCoordinateTransform(crs_utm, crs_layer, transform_context)
+            trans_layer2utm = utils.get_transform(crs_layer, crs_utm, transform_context)
+            trans_utm2layer = utils.get_transform(crs_utm, crs_layer, transform_context)
 
             # transform geometry to UTM
             geom.transform(trans_layer2utm)
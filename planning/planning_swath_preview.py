@@ -0,0 +1,222 @@
+import numpy as np
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QColor
+
+from qgis.core import QgsApplication
+from qgis.core import QgsGeometry
+from qgis.core import QgsPointXY
+from qgis.core import QgsProject
+from qgis.core import QgsRasterLayer
+from qgis.core import QgsTask
+from qgis.core import QgsWkbTypes
+
+from qgis.gui import QgsRubberBand
+
+from .. import config
+from .. import utils
+from ..raster import RasterBlockSampler
+from .planning import Planning
+from .coverage import segment_swath_edges
+
+# delay after last mouse move before swath is computed [ms]
+DEBOUNCE_INTERVAL = 150
+
+# number of vertices of previewed segment
+PREVIEW_VERTICES = 32
+
+
+def compute_swath_preview(task, x, y, sampler, trans_utm2raster, swath_angle_port, swath_angle_stb):
+    """Compute swath footprint polygon of a line segment (run in background task).
+
+    Parameters
+    ----------
+    task : QgsTask
+        background task running this function
+    x : numpy.ndarray
+        x coordinates of segment vertices (local UTM)
+    y : numpy.ndarray
+        y coordinates of segment vertices (local UTM)
+    sampler : RasterBlockSampler
+        sampler for bathymetry raster
+    trans_utm2raster : QgsCoordinateTransform
+        transformation from local UTM to raster CRS
+    swath_angle_port : int or float
+        port swath angle [degrees]
+    swath_angle_stb : int or float
+        starboard swath angle [degrees]
+
+    Returns
+    -------
+    geom : QgsGeometry or None
+        swath footprint polygon (local UTM), None if no valid depths were found
+
+    """
+    edge_port, edge_stbd = segment_swath_edges(
+        x, y, sampler, trans_utm2raster, swath_angle_port, swath_angle_stb
+    )
+    if task.isCanceled() or len(edge_stbd) == 0 or len(edge_port) == 0:
+        return None
+
+    ring = np.vstack((edge_stbd, edge_port[::-1]))
+    return QgsGeometry.fromPolygonXY([[QgsPointXY(*xy) for xy in ring]])
+
+
+class LineSwathPreview(QObject, Planning):
+    """Live preview of estimated MBES swath footprint of the line segment under construction."""
+
+    def __init__(self, canvas, layer, raster_layer, swath_angle_port, swath_angle_stb, band=1):
+        super().__init__()
+        self.canvas = canvas
+        self.layer = layer
+        self.crs_raster = raster_layer.crs()
+        self.swath_angle_port = swath_angle_port
+        self.swath_angle_stb = swath_angle_stb
+
+        # Block-wise raster sampler (own provider, tiles around the cursor stay in shared block cache)
+        self.sampler = RasterBlockSampler(raster_layer, band)
+
+        # Swath footprint drawn on canvas
+        self.rubber_band = QgsRubberBand(self.canvas, QgsWkbTypes.PolygonGeometry)
+        self.rubber_band.setColor(QColor(0, 120, 255, 150))
+        self.rubber_band.setFillColor(QColor(0, 120, 255, 50))
+        self.rubber_band.setWidth(1)
+
+        # Debounce mouse moves: compute swath only when cursor rests for a moment
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_INTERVAL)
+        self.timer.timeout.connect(self.start_task)
+
+        # Init variables
+        self.task = None
+        self.pending = None
+        self.generation = 0
+
+    @classmethod
+    def from_config(cls, canvas, layer):
+        """Create swath preview from PLANNING settings of CruiseToolsConfig.
+
+        Parameters
+        ----------
+        canvas : QgsMapCanvas
+            map canvas to draw swath footprint on
+        layer : QgsVectorLayer
+            line planning layer being digitized
+
+        Returns
+        -------
+        LineSwathPreview or None
+            swath preview, None if disabled or bathymetry raster is not loaded in project
+
+        """
+        cfg = config.CruiseToolsConfig()
+        if not cfg.getboolean('PLANNING', 'swath_preview', fallback=True):
+            return None
+
+        raster_layer_name = cfg.get('PLANNING', 'raster_layer')
+        raster_layers = [
+            lyr for lyr in QgsProject.instance().mapLayersByName(raster_layer_name) if isinstance(lyr, QgsRasterLayer)
+        ]
+        if len(raster_layers) == 0:
+            return None
+
+        # same swath angles as Estimate MBES Coverage (0: total angle, 1: port/starboard angles)
+        if cfg.getint('PLANNING', 'swath_angle_mode', fallback=0) == 0:
+            swath_angle_port = swath_angle_stb = cfg.getint('PLANNING', 'swath_angle') // 2
+        else:
+            swath_angle_port = cfg.getint('PLANNING', 'swath_angle_port')
+            swath_angle_stb = cfg.getint('PLANNING', 'swath_angle_stb')
+
+        return cls(canvas, layer, raster_layers[0], swath_angle_port, swath_angle_stb)
+
+    def update(self, point_start, point_cursor):
+        """Request swath preview for segment under construction (debounced).
+
+        Parameters
+        ----------
+        point_start : QgsPointXY
+            start point of segment (layer CRS)
+        point_cursor : QgsPointXY
+            current cursor position (layer CRS)
+
+        """
+        self.pending = (QgsPointXY(point_start), QgsPointXY(point_cursor))
+        self.timer.start()
+
+    def start_task(self):
+        """Compute swath of latest requested segment in background task."""
+        # only one task at a time (sampler is not shared between threads), latest request follows
+        if self.task is not None or self.pending is None:
+            return
+        point_start, point_cursor = self.pending
+        self.pending = None
+        if point_start == point_cursor:
+            return
+
+        # determine best fitting UTM zone and transformations (GUI thread)
+        transform_context = QgsProject.instance().transformContext()
+        trans_layer2geo = utils.get_transform(self.layer.crs(), utils.get_crs('EPSG:4326'), transform_context)
+        point_geo = trans_layer2geo.transform(point_start)
+        crs_utm = self.get_utm_zone(point_geo.y(), point_geo.x())
+        trans_layer2utm = utils.get_transform(self.layer.crs(), crs_utm, transform_context)
+        trans_utm2raster = utils.get_transform(crs_utm, self.crs_raster, transform_context)
+
+        # densify segment in local UTM
+        start = trans_layer2utm.transform(point_start)
+        end = trans_layer2utm.transform(point_cursor)
+        x = np.linspace(start.x(), end.x(), PREVIEW_VERTICES)
+        y = np.linspace(start.y(), end.y(), PREVIEW_VERTICES)
+
+        generation = self.generation
+        self.task = QgsTask.fromFunction(
+            'MBES swath preview', compute_swath_preview,
+            x, y, self.sampler, trans_utm2raster, self.swath_angle_port, self.swath_angle_stb,
+            on_finished=lambda exception, result=None: self.on_finished(exception, result, generation, crs_utm),
+            flags=QgsTask.Silent | QgsTask.CanCancel,
+        )
+        QgsApplication.taskManager().addTask(self.task)
+
+    def on_finished(self, exception, result, generation, crs_utm):
+        """Draw computed swath footprint and start next pending request.
+
+        Parameters
+        ----------
+        exception : Exception or None
+            exception raised in background task
+        result : QgsGeometry or None
+            swath footprint polygon (local UTM)
+        generation : int
+            reset counter when task was started (outdated results are dropped)
+        crs_utm : QgsCoordinateReferenceSystem
+            CRS of swath footprint
+
+        """
+        task, self.task = self.task, None
+        if task is not None and task.isCanceled():
+            # canceled by reset, nothing to report
+            pass
+        elif exception is not None:
+            print(f'[ERROR] MBES swath preview failed: {exception}')
+        elif generation == self.generation:
+            if result is None:
+                self.rubber_band.reset(QgsWkbTypes.PolygonGeometry)
+            else:
+                self.rubber_band.setToGeometry(result, crs_utm)
+
+        if self.pending is not None:
+            self.start_task()
+
+    def reset(self):
+        """Clear swath preview and drop outstanding requests."""
+        self.timer.stop()
+        self.pending = None
+        self.generation += 1
+        if self.task is not None:
+            self.task.cancel()
+        self.rubber_band.reset(QgsWkbTypes.PolygonGeometry)
+
+    def remove(self):
+        """Remove swath preview from canvas."""
+        self.reset()
+        self.canvas.scene().removeItem(self.rubber_band)
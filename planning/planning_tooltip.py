@@ -17,9 +17,10 @@ from qgis.utils import iface
 
 
 class LinePlanningToolTip(QObject):
-    def __init__(self, canvas):
+    def __init__(self, canvas, preview=None):
         super().__init__()
         self.canvas = canvas
+        self.preview = preview  # optional LineSwathPreview of segment under construction
         self.layer = canvas.currentLayer()
         self.map_tool = self.canvas.mapTool()
 
@@ -238,9 +239,15 @@ class LinePlanningToolTip(QObject):
             txt += f'\n{duration} @ {self.speed_kn:g} kn'
         QToolTip.showText(self.canvas.mapToGlobal(event.pos()), txt, self.canvas)
 
+        # Update (debounced) swath preview of segment
+        if self.preview is not None:
+            self.preview.update(self.point_start, point_cursor)
+
     def reset(self):
         """Reset the internal state of the tool."""
         # print('[DEBUG] Reset')
         self.click_counter = 0
         self.distance_m = None
         self.point_start = None
+        if self.preview is not None:
+            self.preview.reset()
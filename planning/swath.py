@@ -0,0 +1,247 @@
+import numpy as np
+
+# extension of flat swath (per side) to account for seafloor dipping away from ship
+FACTOR_EXTEND = 1.5
+
+# number of depth samples along across-track profiles
+N_PROFILE_SAMPLES = 100
+
+
+def flat_swath_width(depth, angle):
+    """Calculate horizontal distance of outer beam for a flat seafloor.
+
+    Parameters
+    ----------
+    depth : float or numpy.ndarray
+        water depth at nadir
+    angle : float or numpy.ndarray
+        beam angle from nadir [degrees]
+
+    Returns
+    -------
+    distance : float or numpy.ndarray
+        horizontal distance from nadir
+
+    """
+    return np.abs(np.tan(np.radians(angle)) * depth)
+
+
+def profile_offsets(dist_port_flat, dist_stbd_flat, n_samples=N_PROFILE_SAMPLES):
+    """Create across-track offsets of (extended) swath profiles.
+
+    Parameters
+    ----------
+    dist_port_flat : numpy.ndarray
+        flat swath width to port per vertex
+    dist_stbd_flat : numpy.ndarray
+        flat swath width to starboard per vertex
+    n_samples : int
+        number of samples per profile (Default value = N_PROFILE_SAMPLES)
+
+    Returns
+    -------
+    offsets : numpy.ndarray
+        across-track offsets (vertices x samples), port negative, starboard positive
+
+    """
+    start = -np.asarray(dist_port_flat, dtype=np.float64) * (1 + FACTOR_EXTEND)
+    stop = np.asarray(dist_stbd_flat, dtype=np.float64) * (1 + FACTOR_EXTEND)
+    t = np.linspace(0, 1, n_samples)
+
+    return start[:, None] + (stop - start)[:, None] * t[None, :]
+
+
+def profile_spacing(swath_width_flat, n_samples=N_PROFILE_SAMPLES):
+    """Calculate sample spacing of (extended) swath profiles, see `profile_offsets`.
+
+    Parameters
+    ----------
+    swath_width_flat : float or numpy.ndarray
+        flat swath width (port + starboard)
+    n_samples : int
+        number of samples per profile (Default value = N_PROFILE_SAMPLES)
+
+    Returns
+    -------
+    spacing : float or numpy.ndarray
+        distance between neighbouring profile samples
+
+    """
+    return (1 + FACTOR_EXTEND) * swath_width_flat / (n_samples - 1)
+
+
+def fill_nans(values):
+    """Linearly interpolate NaNs along rows of 2D array.
+
+    Leading/trailing NaNs are replaced by the nearest valid value (like `np.interp`).
+    Rows without any valid value remain NaN.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        2D array (rows x samples)
+
+    Returns
+    -------
+    filled : numpy.ndarray
+        copy of `values` with interpolated NaNs
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n_rows, n_cols = values.shape
+    valid = ~np.isnan(values)
+    idx = np.arange(n_cols)
+    rows = np.arange(n_rows)[:, None]
+
+    # index of previous and next valid sample for each position
+    prev_idx = np.maximum.accumulate(np.where(valid, idx, -1), axis=1)
+    next_idx = np.minimum.accumulate(np.where(valid, idx, n_cols)[:, ::-1], axis=1)[:, ::-1]
+    has_prev = prev_idx >= 0
+    has_next = next_idx < n_cols
+
+    v_prev = values[rows, np.clip(prev_idx, 0, n_cols - 1)]
+    v_next = values[rows, np.clip(next_idx, 0, n_cols - 1)]
+
+    # interpolation weights (zero at valid samples)
+    span = next_idx - prev_idx
+    weight = np.where(has_prev & has_next & (span > 0), (idx - prev_idx) / np.where(span > 0, span, 1), 0.)
+
+    filled = np.where(
+        has_prev & has_next,
+        v_prev + weight * (v_next - v_prev),
+        np.where(has_prev, v_prev, v_next)
+    )
+
+    return filled
+
+
+def beam_intersection(offsets, depths, slope, max_dist):
+    """Intersect outer beams with seafloor profiles (one per row).
+
+    The beam is a straight line from the transducer (0, 0) with `slope`
+    (depth per horizontal distance). For each row the intersection closest
+    to nadir within [0, `max_dist`] is returned.
+
+    Parameters
+    ----------
+    offsets : numpy.ndarray
+        horizontal distance from nadir (rows x samples), ascending along rows
+    depths : numpy.ndarray
+        seafloor depth at `offsets` (rows x samples)
+    slope : numpy.ndarray
+        beam slope per row
+    max_dist : numpy.ndarray
+        horizontal beam length per row
+
+    Returns
+    -------
+    dist : numpy.ndarray
+        horizontal distance of intersection per row (NaN if none)
+
+    """
+    # difference between seafloor and beam (sign change marks intersection)
+    g = depths - slope[:, None] * offsets
+    g0, g1 = g[:, :-1], g[:, 1:]
+    x0, x1 = offsets[:, :-1], offsets[:, 1:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = x0 + g0 / (g0 - g1) * (x1 - x0)
+        hit = (g0 * g1 <= 0) & (g0 != g1) & (x >= 0) & (x <= max_dist[:, None])
+
+    dist = np.where(hit, x, np.inf).min(axis=1)
+    dist[np.isinf(dist)] = np.nan
+
+    return dist
+
+
+def swath_edges(depth, offsets, profile_depths, dist_port_flat, dist_stbd_flat):
+    """Calculate port and starboard footprint distances for across-track profiles.
+
+    Parameters
+    ----------
+    depth : numpy.ndarray
+        nadir depth per vertex
+    offsets : numpy.ndarray
+        across-track offsets (vertices x samples), see `profile_offsets`
+    profile_depths : numpy.ndarray
+        sampled depths at `offsets` (vertices x samples), may contain NaN
+    dist_port_flat : numpy.ndarray
+        flat swath width to port per vertex
+    dist_stbd_flat : numpy.ndarray
+        flat swath width to starboard per vertex
+
+    Returns
+    -------
+    dist_port, dist_stbd : (numpy.ndarray, numpy.ndarray)
+        horizontal footprint distance to port/starboard (NaN if no intersection)
+
+    """
+    depths = fill_nans(profile_depths)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope_port = depth / dist_port_flat
+        slope_stbd = depth / dist_stbd_flat
+
+    dist_stbd = beam_intersection(offsets, depths, slope_stbd, dist_stbd_flat * (1 + FACTOR_EXTEND))
+    # mirror profiles for port side (distances ascending from nadir)
+    dist_port = beam_intersection(-offsets[:, ::-1], depths[:, ::-1], slope_port, dist_port_flat * (1 + FACTOR_EXTEND))
+
+    return dist_port, dist_stbd
+
+
+def line_normals(x, y):
+    """Calculate unit normal vectors (pointing to starboard) at polyline vertices.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        x coordinates of vertices (projected CRS, at least two vertices)
+    y : numpy.ndarray
+        y coordinates of vertices (projected CRS, at least two vertices)
+
+    Returns
+    -------
+    nx, ny : (numpy.ndarray, numpy.ndarray)
+        normal vector components per vertex
+
+    """
+    # tangents from central differences (one-sided at line ends)
+    tx = np.gradient(x)
+    ty = np.gradient(y)
+    norm = np.hypot(tx, ty)
+    norm[norm == 0] = 1
+
+    return ty / norm, -tx / norm
+
+
+def line_spacing(width_current, width_next, overlap, window=5):
+    """Calculate spacing of adjacent survey lines for target swath overlap.
+
+    The overlap is relative to the combined facing swath widths of both lines,
+    i.e. for a flat seafloor and symmetric swaths (width `W`) the spacing is `W * (1 - overlap)`.
+    A running minimum over `window` vertices keeps the overlap at least at the
+    target where depths change quickly along the line.
+
+    Parameters
+    ----------
+    width_current : numpy.ndarray
+        swath width of current line towards next line per vertex
+    width_next : numpy.ndarray
+        swath width of next line towards current line per vertex
+    overlap : float
+        target overlap [%]
+    window : int
+        number of vertices of running minimum (Default value = 5)
+
+    Returns
+    -------
+    spacing : numpy.ndarray
+        distance to next line per vertex
+
+    """
+    spacing = (width_current + width_next) * (1 - overlap / 100)
+    if window > 1 and len(spacing) > 1:
+        padded = np.pad(spacing, window // 2, mode='edge')
+        spacing = np.lib.stride_tricks.sliding_window_view(padded, 2 * (window // 2) + 1).min(axis=1)
+
+    return spacing
@@ -17,7 +17,9 @@ from .vector import SwapVectors
 from .planning import CreatePlanningFile
 from .planning import PlanningLinesToVertices
 from .planning import ParallelLinePlanning
+from .planning import OptimizeLineSpacing
 from .planning import EstimateMBESCoverage
+from .planning import AnalyzeMBESCoverage
 from .planning import ExportToBridge
 
 
@@ -40,7 +42,9 @@ class CruiseToolsProvider(QgsProcessingProvider):
         self.addAlgorithm(CreatePlanningFile())
         self.addAlgorithm(PlanningLinesToVertices())
         self.addAlgorithm(ParallelLinePlanning())
+        self.addAlgorithm(OptimizeLineSpacing())
         self.addAlgorithm(EstimateMBESCoverage())
+        self.addAlgorithm(AnalyzeMBESCoverage())
         self.addAlgorithm(ExportToBridge())
 
     def icon(self):
@@ -0,0 +1,1067 @@
+from collections import OrderedDict
+import hashlib
+import json
+import math
+import os
+import threading
+import warnings
+
+import numpy as np
+
+from qgis.core import Qgis
+from qgis.core import QgsCoordinateTransformContext
+from qgis.core import QgsPointXY
+from qgis.core import QgsRasterBlock
+from qgis.core import QgsRasterFileWriter
+from qgis.core import QgsRasterLayer
+from qgis.core import QgsRectangle
+from qgis.core import QgsSpatialIndex
+from qgis.core import QgsUnitTypes
+
+from qgis.PyQt.QtCore import QByteArray
+
+from . import config
+from . import utils
+
+# mapping: QGIS raster data type --> NumPy dtype
+DTYPES = {
+    Qgis.Byte: np.uint8,
+    Qgis.Int8: np.int8,
+    Qgis.UInt16: np.uint16,
+    Qgis.Int16: np.int16,
+    Qgis.UInt32: np.uint32,
+    Qgis.Int32: np.int32,
+    Qgis.Float32: np.float32,
+    Qgis.Float64: np.float64,
+}
+
+# statistics of depth pyramid levels (see `reduce_2x2`)
+PYRAMID_STATISTICS = ('mean', 'min', 'lowest', 'highest')
+
+# minimum size (longer side) of coarsest depth pyramid level [cells]
+PYRAMID_MIN_SIZE = 256
+
+# number of cells read at once when building depth pyramid levels
+PYRAMID_STRIP_CELLS = 2 ** 24
+
+# approximate length of one degree latitude [m]
+METERS_PER_DEGREE = 111320
+
+# default memory budget of shared raster block cache [MB]
+BLOCK_CACHE_SIZE = 256
+
+
+def block_view(block):
+    """Wrap data of QgsRasterBlock as NumPy array without copying.
+
+    The array is a read-only view on the memory of the block,
+    so keep the block alive as long as the view is used.
+
+    Parameters
+    ----------
+    block : QgsRasterBlock
+        raster block read from data provider
+
+    Returns
+    -------
+    view : numpy.ndarray or None
+        2D array (rows x columns) in data type of block,
+        None if block is invalid, empty or of unsupported data type (e.g. complex, ARGB)
+
+    """
+    dtype = DTYPES.get(block.dataType())
+    if dtype is None or not block.isValid() or block.isEmpty():
+        return None
+
+    data = block.data()
+    try:
+        buffer = memoryview(data)
+    except TypeError:
+        # bindings without buffer protocol for QByteArray (one copy)
+        buffer = bytes(data)
+
+    view = np.frombuffer(buffer, dtype=dtype).reshape(block.height(), block.width())
+    view.flags.writeable = False
+
+    return view
+
+
+def block_to_array(block, scale=1.0, offset=0.0, nodata_ranges=()):
+    """Convert QgsRasterBlock to float NumPy array with NoData as NaN.
+
+    Values are converted from a view on the block data (see `block_view`),
+    so the float array is the only copy. NoData is masked on the original
+    values (before scaling). Note that `QgsRasterDataProvider.block()`
+    already applies the band scale/offset of the provider, only pass them
+    for unscaled blocks.
+
+    Parameters
+    ----------
+    block : QgsRasterBlock
+        raster block
+    scale : float
+        scale factor applied to values (Default value = 1.0)
+    offset : float
+        offset added to scaled values (Default value = 0.0)
+    nodata_ranges : iterable of (float, float)
+        additional (user defined) NoData ranges [min, max] (Default value = ())
+
+    Returns
+    -------
+    array : numpy.ndarray
+        2D array (rows x columns) of raster values
+
+    """
+    view = block_view(block)
+    if view is None:
+        return np.full((block.height(), block.width()), np.nan)
+
+    array = view.astype(np.float64)
+
+    # mask NoData value of block and NoData ranges
+    if block.hasNoDataValue():
+        array[view == block.noDataValue()] = np.nan
+    for vmin, vmax in nodata_ranges:
+        array[(array >= vmin) & (array <= vmax)] = np.nan
+
+    if scale != 1.0:
+        array *= scale
+    if offset != 0.0:
+        array += offset
+
+    return array
+
+
+def rasterize_polygon(mask, col, row):
+    """Burn polygon ring into boolean mask (scanline fill of pixel centers).
+
+    Parameters
+    ----------
+    mask : numpy.ndarray
+        2D boolean array (rows x columns), updated in place
+    col : numpy.ndarray
+        ring x coordinates in pixel units (0: left edge of first column)
+    row : numpy.ndarray
+        ring y coordinates in pixel units (0: top edge of first row)
+
+    """
+    n_rows, n_cols = mask.shape
+
+    # ring edges
+    c0, c1 = col, np.roll(col, -1)
+    r0, r1 = row, np.roll(row, -1)
+
+    # pixel rows with centers inside ring extent
+    i0 = max(int(np.ceil(row.min() - 0.5)), 0)
+    i1 = min(int(np.floor(row.max() - 0.5)), n_rows - 1)
+    if i1 < i0:
+        return
+    yc = np.arange(i0, i1 + 1)[:, None] + 0.5
+
+    # intersections of pixel center rows with ring edges (rows x edges)
+    crosses = (r0 <= yc) != (r1 <= yc)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = c0 + (yc - r0) / (r1 - r0) * (c1 - c0)
+    x = np.sort(np.where(crosses, x, np.inf), axis=1)
+
+    # pairs of intersections enclose pixel centers inside ring (even-odd rule)
+    n_pairs = int(crosses.sum(axis=1).max()) // 2
+    if n_pairs == 0:
+        return
+    starts = x[:, 0:2 * n_pairs:2]
+    ends = x[:, 1:2 * n_pairs:2]
+    valid = np.isfinite(starts) & np.isfinite(ends)
+
+    # first/last+1 column of each span (pixel centers in [start, end))
+    j0 = np.clip(np.ceil(np.where(valid, starts, 0) - 0.5), 0, n_cols).astype(np.int64)
+    j1 = np.clip(np.ceil(np.where(valid, ends, 0) - 0.5), 0, n_cols).astype(np.int64)
+    valid &= j1 > j0
+
+    # fill spans via cumulative sum of span start/end markers
+    rows = np.broadcast_to(np.arange(i1 - i0 + 1)[:, None], valid.shape)[valid]
+    diff = np.zeros((i1 - i0 + 1, n_cols + 1), dtype=np.int32)
+    np.add.at(diff, (rows, j0[valid]), 1)
+    np.add.at(diff, (rows, j1[valid]), -1)
+    mask[i0:i1 + 1] |= np.cumsum(diff[:, :-1], axis=1) > 0
+
+
+def create_raster(path, data_type, n_cols, n_rows, extent, crs):
+    """Create empty single band raster file for (block-wise) writing.
+
+    Parameters
+    ----------
+    path : str
+        output raster file path (format from file extension, default GeoTIFF)
+    data_type : Qgis.DataType
+        raster data type (key of `DTYPES`)
+    n_cols : int
+        number of raster columns
+    n_rows : int
+        number of raster rows
+    extent : QgsRectangle
+        raster extent
+    crs : QgsCoordinateReferenceSystem
+        raster CRS
+
+    Returns
+    -------
+    provider : QgsRasterDataProvider
+        editable data provider of created raster (call `setEditable(False)` when done)
+
+    """
+    writer = QgsRasterFileWriter(path)
+    driver = QgsRasterFileWriter.driverForExtension(os.path.splitext(path)[1])
+    if driver:
+        writer.setOutputFormat(driver)
+
+    provider = writer.createOneBandRaster(data_type, n_cols, n_rows, extent, crs)
+    if provider is None or not provider.isValid():
+        raise Exception(f'Raster file could not be created: {path}')
+
+    provider.setEditable(True)
+
+    return provider
+
+
+def write_block(provider, array, col=0, row=0):
+    """Write 2D NumPy array to raster created by `create_raster`.
+
+    Parameters
+    ----------
+    provider : QgsRasterDataProvider
+        editable raster data provider
+    array : numpy.ndarray
+        2D array (rows x columns), dtype must match raster data type
+    col : int
+        column offset of array in raster (Default value = 0)
+    row : int
+        row offset of array in raster (Default value = 0)
+
+    """
+    n_rows, n_cols = array.shape
+    data_type = [k for k, v in DTYPES.items() if np.dtype(v) == array.dtype][0]
+
+    block = QgsRasterBlock(data_type, n_cols, n_rows)
+    block.setData(QByteArray(np.ascontiguousarray(array).tobytes()))
+    provider.writeBlock(block, 1, col, row)
+
+
+def write_array(array, path, extent, crs, nodata=None):
+    """Write 2D NumPy array as single band raster file.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        2D array (rows x columns), dtype must be in `DTYPES`
+    path : str
+        output raster file path (format from file extension, default GeoTIFF)
+    extent : QgsRectangle
+        raster extent
+    crs : QgsCoordinateReferenceSystem
+        raster CRS
+    nodata : float or None
+        NoData value (Default value = None)
+
+    """
+    data_type = [k for k, v in DTYPES.items() if np.dtype(v) == array.dtype][0]
+    n_rows, n_cols = array.shape
+
+    provider = create_raster(path, data_type, n_cols, n_rows, extent, crs)
+    write_block(provider, array)
+    if nodata is not None:
+        provider.setNoDataValue(1, nodata)
+    provider.setEditable(False)
+
+
+def raster_signature(provider):
+    """Get signature of raster data source (changes when file is updated).
+
+    Parameters
+    ----------
+    provider : QgsRasterDataProvider
+        raster data provider
+
+    Returns
+    -------
+    signature : tuple
+        data source URI and (if available) file modification time and size
+
+    """
+    uri = provider.dataSourceUri()
+    path = uri.split('|')[0]
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return uri, stat.st_mtime, stat.st_size
+
+    return (uri,)
+
+
+class BlockCache:
+    """Least recently used cache of raster tiles shared by all samplers.
+
+    Tiles are keyed by raster signature (see `raster_signature`), band and
+    tile index, so repeated runs of any tool over the same area read the
+    tiles from memory instead of the data source. Tiles are evicted (least
+    recently used first) once their total size exceeds `max_size`.
+    Access is thread-safe (samplers may run in background tasks).
+
+    """
+
+    def __init__(self, max_size):
+        """Initialize BlockCache.
+
+        Parameters
+        ----------
+        max_size : int
+            memory budget of cached tiles [bytes], 0 disables caching
+
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.tiles = OrderedDict()
+        self.lock = threading.Lock()
+
+        # cache statistics
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get cached tile (marked as recently used).
+
+        Parameters
+        ----------
+        key : tuple
+            tile key
+
+        Returns
+        -------
+        tile : numpy.ndarray or None
+            cached tile, None if not cached
+
+        """
+        with self.lock:
+            tile = self.tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self.tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def put(self, key, tile):
+        """Store tile and evict least recently used tiles exceeding memory budget.
+
+        Parameters
+        ----------
+        key : tuple
+            tile key
+        tile : numpy.ndarray
+            tile array (must not be modified afterwards)
+
+        """
+        if tile.nbytes > self.max_size:
+            return
+
+        with self.lock:
+            old = self.tiles.pop(key, None)
+            if old is not None:
+                self.size -= old.nbytes
+            self.tiles[key] = tile
+            self.size += tile.nbytes
+            while self.size > self.max_size:
+                _, evicted = self.tiles.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def resize(self, max_size):
+        """Change memory budget (evicts tiles if necessary).
+
+        Parameters
+        ----------
+        max_size : int
+            memory budget of cached tiles [bytes], 0 disables caching
+
+        """
+        with self.lock:
+            self.max_size = max_size
+            while self.size > self.max_size:
+                _, evicted = self.tiles.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def clear(self):
+        """Remove all tiles from cache."""
+        with self.lock:
+            self.tiles.clear()
+            self.size = 0
+
+
+_block_cache = BlockCache(BLOCK_CACHE_SIZE * 1024 ** 2)
+
+
+def block_cache():
+    """Get shared raster block cache of Cruise Tools.
+
+    The memory budget is (re)read from the `block_cache_size` option
+    of the RASTER section of CruiseToolsConfig [MB].
+
+    Returns
+    -------
+    cache : BlockCache
+        shared block cache
+
+    """
+    cfg = config.CruiseToolsConfig()
+    max_size = int(cfg.getfloat('RASTER', 'block_cache_size', fallback=BLOCK_CACHE_SIZE) * 1024 ** 2)
+    if max_size != _block_cache.max_size:
+        _block_cache.resize(max(max_size, 0))
+
+    return _block_cache
+
+
+class RasterBlockSampler:
+    """Sample raster values for many coordinates at once.
+
+    Instead of calling `QgsRasterDataProvider.sample()` for each point,
+    the raster is read in blocks (tiles aligned to the pixel grid) via
+    `QgsRasterDataProvider.block()` and all points falling into a tile
+    are looked up by index math. Tiles are read through a block cache
+    shared by all samplers (see `block_cache`).
+
+    """
+
+    def __init__(self, raster_layer, band, tile_size=256, cache=None):
+        """Initialize RasterBlockSampler.
+
+        Parameters
+        ----------
+        raster_layer : QgsRasterLayer
+            input raster layer
+        band : int
+            raster band number
+        tile_size : int
+            tile edge length in pixels (Default value = 256)
+        cache : BlockCache or None
+            tile cache, shared block cache of Cruise Tools if None (Default value = None)
+
+        """
+        # own provider instance, the sampler may be used outside the main thread
+        # (e.g. algorithms running as background task)
+        self.provider = raster_layer.dataProvider().clone()
+        self.band = band
+        self.tile_size = tile_size
+        self.cache = cache if cache is not None else block_cache()
+
+        # raster grid definition
+        self.extent = self.provider.extent()
+        self.xsize = self.provider.xSize()
+        self.ysize = self.provider.ySize()
+
+        # providers without pixel grid (e.g. WMS) can only be sampled point-wise
+        self.gridded = self.xsize > 0 and self.ysize > 0
+        if self.gridded:
+            self.res_x = self.extent.width() / self.xsize
+            self.res_y = self.extent.height() / self.ysize
+            self.tiles_x = -(-self.xsize // tile_size)
+
+        # user defined NoData ranges
+        self.nodata_ranges = [(r.min(), r.max()) for r in self.provider.userNoDataValues(band)]
+
+        # cache key of raster band (user NoData ranges are applied to cached tiles)
+        self.cache_key = (raster_signature(self.provider), band, tile_size, tuple(self.nodata_ranges))
+
+        # read counter
+        self.block_reads = 0
+
+    def read_tile(self, tile_x, tile_y):
+        """Read raster tile from data provider (or cache).
+
+        Parameters
+        ----------
+        tile_x : int
+            tile column index
+        tile_y : int
+            tile row index
+
+        Returns
+        -------
+        tile : numpy.ndarray
+            2D array of raster values (NoData as NaN)
+
+        """
+        key = self.cache_key + (tile_x, tile_y)
+        tile = self.cache.get(key)
+        if tile is not None:
+            return tile
+
+        # pixel window of tile
+        c0 = tile_x * self.tile_size
+        c1 = min(c0 + self.tile_size, self.xsize)
+        r0 = tile_y * self.tile_size
+        r1 = min(r0 + self.tile_size, self.ysize)
+
+        # extent of pixel window
+        tile_extent = QgsRectangle(
+            self.extent.xMinimum() + c0 * self.res_x,
+            self.extent.yMaximum() - r1 * self.res_y,
+            self.extent.xMinimum() + c1 * self.res_x,
+            self.extent.yMaximum() - r0 * self.res_y,
+        )
+
+        block = self.provider.block(self.band, tile_extent, c1 - c0, r1 - r0)
+        self.block_reads += 1
+
+        tile = block_to_array(block, nodata_ranges=self.nodata_ranges)
+
+        # store tile in shared cache (read-only, evicts least recently used tiles)
+        tile.flags.writeable = False
+        self.cache.put(key, tile)
+
+        return tile
+
+    def sample(self, x, y):
+        """Sample raster values at coordinates (in raster CRS).
+
+        Parameters
+        ----------
+        x : array_like
+            x coordinates
+        y : array_like
+            y coordinates
+
+        Returns
+        -------
+        values : numpy.ndarray
+            sampled values (same shape as `x`), NaN where outside raster or NoData
+
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        shape = x.shape
+        x = x.ravel()
+        y = y.ravel()
+        values = np.full(x.shape, np.nan)
+
+        if not self.gridded:
+            for i, (xi, yi) in enumerate(zip(x, y)):
+                value, ok = self.provider.sample(QgsPointXY(xi, yi), self.band)
+                if ok:
+                    values[i] = value
+            return values.reshape(shape)
+
+        # pixel indices of coordinates
+        with np.errstate(invalid='ignore'):
+            col = np.floor((x - self.extent.xMinimum()) / self.res_x)
+            row = np.floor((self.extent.yMaximum() - y) / self.res_y)
+            valid = (col >= 0) & (col < self.xsize) & (row >= 0) & (row < self.ysize)
+
+        idx = np.flatnonzero(valid)
+        if idx.size == 0:
+            return values.reshape(shape)
+
+        col = np.where(valid, col, 0).astype(np.int64)
+        row = np.where(valid, row, 0).astype(np.int64)
+
+        # group points by tile
+        tile_ids = (row[idx] // self.tile_size) * self.tiles_x + (col[idx] // self.tile_size)
+        order = np.argsort(tile_ids, kind='stable')
+        splits = np.flatnonzero(np.diff(tile_ids[order])) + 1
+
+        for group in np.split(idx[order], splits):
+            tile_x = int(col[group[0]] // self.tile_size)
+            tile_y = int(row[group[0]] // self.tile_size)
+            tile = self.read_tile(tile_x, tile_y)
+            values[group] = tile[row[group] - tile_y * self.tile_size, col[group] - tile_x * self.tile_size]
+
+        return values.reshape(shape)
+
+
+class RasterMosaicSampler:
+    """Sample values from an ordered list of rasters (priority mosaic).
+
+    Each value is taken from the first raster (highest priority) with valid
+    data at the point, e.g. local high-resolution grids on top of GEBCO.
+    Raster extents are indexed in a spatial index, every raster is read
+    lazily in tiles by its own `RasterBlockSampler`, so only the blocks
+    touched by the sampled points are read.
+
+    """
+
+    def __init__(self, raster_layers, bands, crs, transform_context, tile_size=256, cache=None):
+        """Initialize RasterMosaicSampler.
+
+        Parameters
+        ----------
+        raster_layers : list of QgsRasterLayer
+            input raster layers (highest priority first)
+        bands : list of int
+            raster band number per layer
+        crs : QgsCoordinateReferenceSystem
+            CRS of sampled coordinates
+        transform_context : QgsCoordinateTransformContext
+            transform context for transformations to raster CRSs
+        tile_size : int
+            tile edge length in pixels (Default value = 256)
+        cache : BlockCache or None
+            tile cache, shared block cache of Cruise Tools if None (Default value = None)
+
+        """
+        self.crs = crs
+        self.samplers = []
+        self.transforms = []
+        self.extents = []
+        self.index = QgsSpatialIndex()
+
+        for idx, (raster_layer, band) in enumerate(zip(raster_layers, bands)):
+            sampler = RasterBlockSampler(raster_layer, band, tile_size, cache)
+
+            # transformation from sampling CRS to raster CRS (None if identical)
+            if raster_layer.crs() == crs:
+                transform = None
+                extent = sampler.extent
+            else:
+                transform = utils.get_transform(crs, raster_layer.crs(), transform_context)
+                extent = utils.get_transform(raster_layer.crs(), crs, transform_context).transformBoundingBox(
+                    sampler.extent
+                )
+
+            self.samplers.append(sampler)
+            self.transforms.append(transform)
+            self.extents.append(extent)
+            self.index.addFeature(idx, extent)
+
+    @property
+    def block_reads(self):
+        """Total number of blocks read from all rasters."""
+        return sum(sampler.block_reads for sampler in self.samplers)
+
+    def sample(self, x, y):
+        """Sample raster values at coordinates (in sampling CRS).
+
+        Parameters
+        ----------
+        x : array_like
+            x coordinates
+        y : array_like
+            y coordinates
+
+        Returns
+        -------
+        values : numpy.ndarray
+            sampled values (same shape as `x`), NaN where outside all rasters or NoData
+
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        shape = x.shape
+        x = x.ravel()
+        y = y.ravel()
+        values = np.full(x.shape, np.nan)
+
+        finite = np.isfinite(x) & np.isfinite(y)
+        if not finite.any():
+            return values.reshape(shape)
+
+        # rasters overlapping the sampled points (in priority order)
+        bbox = QgsRectangle(x[finite].min(), y[finite].min(), x[finite].max(), y[finite].max())
+        for idx in sorted(self.index.intersects(bbox)):
+            extent = self.extents[idx]
+            todo = np.isnan(values) & finite
+            todo &= (x >= extent.xMinimum()) & (x <= extent.xMaximum())
+            todo &= (y >= extent.yMinimum()) & (y <= extent.yMaximum())
+            if not todo.any():
+                continue
+
+            x_raster, y_raster = x[todo], y[todo]
+            if self.transforms[idx] is not None:
+                x_raster, y_raster = utils.transform_xy(x_raster, y_raster, self.transforms[idx])
+            values[todo] = self.samplers[idx].sample(x_raster, y_raster)
+
+        return values.reshape(shape)
+
+
+def create_sampler(raster_layer, band, priority_layers=None, transform_context=None, **kwargs):
+    """Create sampler for raster layer, optionally mosaicked with higher priority rasters.
+
+    Sampled coordinates are always in the CRS of `raster_layer`.
+
+    Parameters
+    ----------
+    raster_layer : QgsRasterLayer
+        input (base) raster layer, e.g. GEBCO
+    band : int
+        raster band number of base raster
+    priority_layers : list of QgsRasterLayer or None
+        rasters sampled before base raster, highest priority first (band 1) (Default value = None)
+    transform_context : QgsCoordinateTransformContext or None
+        transform context for transformations between raster CRSs (Default value = None)
+    **kwargs
+        settings passed to samplers (`tile_size`, `cache`)
+
+    Returns
+    -------
+    sampler : RasterBlockSampler or RasterMosaicSampler
+        raster sampler
+
+    """
+    priority_layers = [lyr for lyr in (priority_layers or []) if lyr.id() != raster_layer.id()]
+    if len(priority_layers) == 0:
+        return RasterBlockSampler(raster_layer, band, **kwargs)
+
+    if transform_context is None:
+        transform_context = QgsCoordinateTransformContext()
+
+    return RasterMosaicSampler(
+        priority_layers + [raster_layer], [1] * len(priority_layers) + [band],
+        raster_layer.crs(), transform_context, **kwargs
+    )
+
+
+class RasterStackSampler:
+    """Sample several rasters/bands in one pass (one value column each).
+
+    Coordinates are transformed only once per distinct raster CRS,
+    all columns of a CRS are sampled from the same transformed points.
+
+    """
+
+    def __init__(self, samplers, crs, transform_context=None):
+        """Initialize RasterStackSampler.
+
+        Parameters
+        ----------
+        samplers : list of (sampler, QgsCoordinateReferenceSystem)
+            sampler of each column and CRS of its coordinates (e.g. raster CRS, see `create_sampler`)
+        crs : QgsCoordinateReferenceSystem
+            CRS of sampled coordinates
+        transform_context : QgsCoordinateTransformContext or None
+            transform context for transformations to raster CRSs (Default value = None)
+
+        """
+        if transform_context is None:
+            transform_context = QgsCoordinateTransformContext()
+
+        self.samplers = [sampler for sampler, _ in samplers]
+
+        # columns grouped by CRS: (transformation or None, column indices)
+        self.groups = []
+        crs_list = []
+        for column, (_, sampler_crs) in enumerate(samplers):
+            if sampler_crs in crs_list:
+                self.groups[crs_list.index(sampler_crs)][1].append(column)
+                continue
+            transform = None if sampler_crs == crs else utils.get_transform(crs, sampler_crs, transform_context)
+            crs_list.append(sampler_crs)
+            self.groups.append((transform, [column]))
+
+    @property
+    def block_reads(self):
+        """Total number of blocks read from all rasters."""
+        return sum(sampler.block_reads for sampler in self.samplers)
+
+    def sample(self, x, y):
+        """Sample all columns at coordinates.
+
+        Parameters
+        ----------
+        x : array_like
+            x coordinates
+        y : array_like
+            y coordinates
+
+        Returns
+        -------
+        values : numpy.ndarray
+            sampled values (shape of `x` plus one axis of columns), NaN where outside raster or NoData
+
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        values = np.full(x.shape + (len(self.samplers),), np.nan)
+
+        for transform, columns in self.groups:
+            if transform is None:
+                x_crs, y_crs = x, y
+            else:
+                x_crs, y_crs = utils.transform_xy(x, y, transform)
+            for column in columns:
+                values[..., column] = self.samplers[column].sample(x_crs, y_crs)
+
+        return values
+
+
+def create_stack_sampler(columns, crs, priority_layers=None, transform_context=None):
+    """Create sampler for several raster bands, the first one optionally mosaicked with higher priority rasters.
+
+    Parameters
+    ----------
+    columns : list of (QgsRasterLayer, int)
+        raster layer and band number of each column
+    crs : QgsCoordinateReferenceSystem
+        CRS of sampled coordinates
+    priority_layers : list of QgsRasterLayer or None
+        rasters sampled before raster of first column, highest priority first (band 1) (Default value = None)
+    transform_context : QgsCoordinateTransformContext or None
+        transform context for transformations to raster CRSs (Default value = None)
+
+    Returns
+    -------
+    sampler : RasterStackSampler
+        raster sampler (one value column per raster band)
+
+    """
+    samplers = []
+    for i, (raster_layer, band) in enumerate(columns):
+        sampler = create_sampler(raster_layer, band, priority_layers if i == 0 else None, transform_context)
+        samplers.append((sampler, raster_layer.crs()))
+
+    return RasterStackSampler(samplers, crs, transform_context)
+
+
+def reduce_2x2(array, statistic):
+    """Reduce 2D array to half resolution (2 x 2 cells), ignoring NaNs.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        2D array (rows x columns), NoData as NaN
+    statistic : str
+        'mean': mean value, 'min': value closest to zero (shallowest depth, independent of sign),
+        'lowest': minimum value, 'highest': maximum value
+
+    Returns
+    -------
+    reduced : numpy.ndarray
+        2D float32 array (ceil(rows / 2) x ceil(columns / 2))
+
+    """
+    n_rows, n_cols = array.shape
+    padded = np.full((n_rows + n_rows % 2, n_cols + n_cols % 2), np.nan)
+    padded[:n_rows, :n_cols] = array
+    cells = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+
+    with warnings.catch_warnings():
+        # all-NaN cells are NaN in reduced array
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        if statistic == 'mean':
+            reduced = np.nanmean(cells, axis=(1, 3))
+        elif statistic == 'lowest':
+            reduced = np.nanmin(cells, axis=(1, 3))
+        elif statistic == 'highest':
+            reduced = np.nanmax(cells, axis=(1, 3))
+        else:
+            vmin = np.nanmin(cells, axis=(1, 3))
+            vmax = np.nanmax(cells, axis=(1, 3))
+            reduced = np.where(np.abs(vmin) <= np.abs(vmax), vmin, vmax)
+
+    return reduced.astype(np.float32)
+
+
+def pyramid_directory(raster_layer, fallback_root):
+    """Get directory of depth pyramid cached beside raster file.
+
+    Parameters
+    ----------
+    raster_layer : QgsRasterLayer
+        input raster layer
+    fallback_root : str
+        root directory for pyramids of rasters without (writable) file source
+
+    Returns
+    -------
+    directory : str
+        pyramid directory
+
+    """
+    path = raster_layer.source().split('|')[0]
+    if os.path.isfile(path) and os.access(os.path.dirname(os.path.abspath(path)), os.W_OK):
+        return f'{path}.pyramid'
+
+    return os.path.join(fallback_root, hashlib.sha1(raster_layer.source().encode('utf-8')).hexdigest())
+
+
+class DepthPyramid:
+    """Aggregated (mean/min/...) depth pyramid of a raster band, cached on disk.
+
+    Level `k` has a cell size of `2 ** k` raster cells. Levels are built on
+    demand, each from the previous one, reading strips of rows, and are
+    stored as GeoTIFF files in the pyramid directory. The pyramid is rebuilt
+    when the raster file changes.
+
+    """
+
+    def __init__(self, raster_layer, band, directory):
+        """Initialize DepthPyramid.
+
+        Parameters
+        ----------
+        raster_layer : QgsRasterLayer
+            input raster layer
+        band : int
+            raster band number
+        directory : str
+            pyramid directory (see `pyramid_directory`)
+
+        """
+        self.raster_layer = raster_layer
+        self.band = band
+        self.directory = directory
+
+        # raster grid definition
+        provider = raster_layer.dataProvider()
+        self.extent = provider.extent()
+        self.xsize = provider.xSize()
+        self.ysize = provider.ySize()
+
+        # cell size of full resolution raster [m]
+        crs = raster_layer.crs()
+        res = self.extent.height() / self.ysize if self.ysize > 0 else 0
+        if crs.isGeographic():
+            self.res_m = res * METERS_PER_DEGREE
+        else:
+            self.res_m = res * QgsUnitTypes.fromUnitToUnitFactor(crs.mapUnits(), QgsUnitTypes.DistanceMeters)
+
+        # coarsest level still has at least PYRAMID_MIN_SIZE cells along its longer side
+        size = max(self.xsize, self.ysize)
+        self.max_level = max(int(math.floor(math.log2(size / PYRAMID_MIN_SIZE))), 0) if size > 0 else 0
+
+        # signature of raster source (pyramid is invalid if it changes)
+        path = raster_layer.source().split('|')[0]
+        self.signature = {'source': raster_layer.source(), 'band': band}
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            self.signature.update({'mtime': stat.st_mtime, 'size': stat.st_size})
+
+    def level_for(self, cell_size):
+        """Get coarsest pyramid level with cell size not larger than `cell_size`.
+
+        Parameters
+        ----------
+        cell_size : float
+            target cell size [m]
+
+        Returns
+        -------
+        level : int
+            pyramid level (0: full resolution)
+
+        """
+        if self.res_m <= 0 or cell_size <= self.res_m:
+            return 0
+
+        return min(int(math.floor(math.log2(cell_size / self.res_m))), self.max_level)
+
+    def path(self, level, statistic):
+        """Get file path of pyramid level."""
+        return os.path.join(self.directory, f'{statistic}_b{self.band}_{2 ** level}.tif')
+
+    def check_signature(self):
+        """Remove cached levels if raster source changed since they were built."""
+        os.makedirs(self.directory, exist_ok=True)
+        signature_file = os.path.join(self.directory, f'pyramid_b{self.band}.json')
+        if os.path.isfile(signature_file):
+            with open(signature_file) as f:
+                if json.load(f) == self.signature:
+                    return
+        for statistic in PYRAMID_STATISTICS:
+            for level in range(1, self.max_level + 1):
+                if os.path.isfile(self.path(level, statistic)):
+                    os.remove(self.path(level, statistic))
+        with open(signature_file, 'w') as f:
+            json.dump(self.signature, f)
+
+    def level_layer(self, level, statistic, feedback=None):
+        """Get raster layer of pyramid level (built if missing).
+
+        Parameters
+        ----------
+        level : int
+            pyramid level (1 ... `max_level`)
+        statistic : str
+            aggregation statistic of levels (see `reduce_2x2`)
+        feedback : QgsFeedback or None
+            feedback for messages and cancellation (Default value = None)
+
+        Returns
+        -------
+        layer : QgsRasterLayer or None
+            pyramid level raster (band 1), None if canceled
+
+        """
+        self.check_signature()
+        for k in range(1, level + 1):
+            if not os.path.isfile(self.path(k, statistic)):
+                if feedback is not None:
+                    feedback.pushConsoleInfo(f'Building {statistic} depth pyramid level {k} ({2 ** k} x {2 ** k} cells)...')
+                if not self.build_level(k, statistic, feedback):
+                    return None
+
+        return QgsRasterLayer(self.path(level, statistic), f'{statistic}_{2 ** level}', 'gdal')
+
+    def build_level(self, level, statistic, feedback=None):
+        """Build pyramid level from previous level (strips of rows).
+
+        Parameters
+        ----------
+        level : int
+            pyramid level (>= 1)
+        statistic : str
+            aggregation statistic of levels (see `reduce_2x2`)
+        feedback : QgsFeedback or None
+            feedback for cancellation (Default value = None)
+
+        Returns
+        -------
+        built : bool
+            False if canceled
+
+        """
+        # source: full resolution raster or previous level
+        if level == 1:
+            provider = self.raster_layer.dataProvider().clone()
+            band = self.band
+            nodata_ranges = [(r.min(), r.max()) for r in provider.userNoDataValues(band)]
+        else:
+            source_layer = QgsRasterLayer(self.path(level - 1, statistic), 'source', 'gdal')
+            provider = source_layer.dataProvider()
+            band = 1
+            nodata_ranges = []
+        extent = provider.extent()
+        n_cols, n_rows = provider.xSize(), provider.ySize()
+        res_x, res_y = extent.width() / n_cols, extent.height() / n_rows
+
+        # grid of new level (same origin, last row/column may extend beyond source extent)
+        n_cols_level, n_rows_level = -(-n_cols // 2), -(-n_rows // 2)
+        extent_level = QgsRectangle(
+            extent.xMinimum(), extent.yMaximum() - 2 * n_rows_level * res_y,
+            extent.xMinimum() + 2 * n_cols_level * res_x, extent.yMaximum(),
+        )
+
+        # write to temporary file first, so interrupted builds are not used
+        path = self.path(level, statistic)
+        path_tmp = path.replace('.tif', '_tmp.tif')
+        writer = create_raster(
+            path_tmp, Qgis.Float32, n_cols_level, n_rows_level, extent_level, self.raster_layer.crs()
+        )
+        writer.setNoDataValue(1, np.nan)
+
+        # strips of even number of rows
+        strip_rows = max(2, (PYRAMID_STRIP_CELLS // n_cols) // 2 * 2)
+        for r0 in range(0, n_rows, strip_rows):
+            if feedback is not None and feedback.isCanceled():
+                writer.setEditable(False)
+                os.remove(path_tmp)
+                return False
+            r1 = min(r0 + strip_rows, n_rows)
+            strip_extent = QgsRectangle(
+                extent.xMinimum(), extent.yMaximum() - r1 * res_y,
+                extent.xMaximum(), extent.yMaximum() - r0 * res_y,
+            )
+            strip = block_to_array(provider.block(band, strip_extent, n_cols, r1 - r0))
+            for vmin, vmax in nodata_ranges:
+                strip[(strip >= vmin) & (strip <= vmax)] = np.nan
+            write_block(writer, reduce_2x2(strip, statistic), 0, r0 // 2)
+
+        writer.setEditable(False)
+        del writer
+        os.replace(path_tmp, path)
+
+        return True
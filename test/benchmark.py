@@ -0,0 +1,441 @@
+# coding=utf-8
+"""Benchmark suite for the Cruise Tools planning algorithms.
+
+Generates a synthetic bathymetry grid and a line plan, runs the planning
+algorithms headlessly and writes wall time, peak memory and raster block
+reads per run to a JSON report.
+
+Usage (from the QGIS Python environment)::
+
+    python test/benchmark.py --raster-size 4000 --lines 20 --vertices 50 -o report.json
+    python test/benchmark.py --compare report_old.json report_new.json
+
+The grid is written in row blocks, so grids of several GB can be created
+(e.g. ``--raster-size 40000`` creates a 6.4 GB Float32 GeoTIFF).
+
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# plugin directory and its parent (plugin is imported as package)
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGINS_DIR = os.path.dirname(PLUGIN_DIR)
+
+# relative slowdown reported as regression by --compare
+REGRESSION_THRESHOLD = 0.1
+
+
+def create_bathymetry(path, size, extent, block_rows=512):
+    """Create synthetic bathymetry GeoTIFF (EPSG:4326, Float32, positive up).
+
+    The seafloor deepens from a shelf (-200 m) to an abyssal plain (-5000 m)
+    with a shelf break across the grid plus ridges and a deterministic noise.
+
+    Parameters
+    ----------
+    path : str
+        output GeoTIFF path
+    size : int
+        number of rows and columns
+    extent : (float, float, float, float)
+        grid extent (lon_min, lat_min, lon_max, lat_max)
+    block_rows : int
+        number of rows written at once (Default value = 512)
+
+    """
+    from osgeo import gdal
+    from osgeo import osr
+
+    lon_min, lat_min, lon_max, lat_max = extent
+    res_x = (lon_max - lon_min) / size
+    res_y = (lat_max - lat_min) / size
+
+    driver = gdal.GetDriverByName('GTiff')
+    dataset = driver.Create(path, size, size, 1, gdal.GDT_Float32,
+                            options=['TILED=YES', 'COMPRESS=NONE', 'BIGTIFF=IF_SAFER'])
+    dataset.SetGeoTransform((lon_min, res_x, 0, lat_max, 0, -res_y))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    dataset.SetProjection(srs.ExportToWkt())
+    band = dataset.GetRasterBand(1)
+    band.SetNoDataValue(-99999)
+
+    rng = np.random.default_rng(42)
+    u = np.linspace(0, 1, size)[None, :]
+    for r0 in range(0, size, block_rows):
+        r1 = min(r0 + block_rows, size)
+        v = np.linspace(r0 / size, r1 / size, r1 - r0, endpoint=False)[:, None]
+
+        # shelf break (tanh) + ridges + noise
+        depth = -200 - 2400 * (1 + np.tanh((u - 0.3 - 0.1 * np.sin(6 * v)) * 12))
+        depth += 150 * np.sin(40 * u + 15 * v) * (u > 0.3)
+        depth += rng.normal(0, 5, depth.shape)
+
+        band.WriteArray(depth.astype(np.float32), 0, r0)
+
+    band.FlushCache()
+    dataset = None
+
+
+def create_line_plan(n_lines, n_vertices, extent):
+    """Create memory layer with lawn mower pattern of survey lines (EPSG:4326).
+
+    Parameters
+    ----------
+    n_lines : int
+        number of lines
+    n_vertices : int
+        number of vertices per line
+    extent : (float, float, float, float)
+        extent covered by the plan (lon_min, lat_min, lon_max, lat_max)
+
+    Returns
+    -------
+    layer : QgsVectorLayer
+        line planning layer
+
+    """
+    from qgis.core import QgsFeature
+    from qgis.core import QgsGeometry
+    from qgis.core import QgsPointXY
+    from qgis.core import QgsVectorLayer
+
+    lon_min, lat_min, lon_max, lat_max = extent
+    layer = QgsVectorLayer('LineString?crs=EPSG:4326&field=name:string(50)', 'plan', 'memory')
+
+    features = []
+    lats = np.linspace(lat_min, lat_max, n_lines + 2)[1:-1]
+    lons = np.linspace(lon_min, lon_max, n_vertices + 2)[1:-1]
+    for i, lat in enumerate(lats):
+        # slightly meandering lines (vertices are not collinear)
+        line = [QgsPointXY(lon, lat + 0.002 * (-1) ** j) for j, lon in enumerate(lons)]
+        if i % 2:
+            line = line[::-1]
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes([f'line_{i + 1:03d}'])
+        feature.setGeometry(QgsGeometry.fromPolylineXY(line))
+        features.append(feature)
+
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+
+    return layer
+
+
+class BlockReadCounter:
+    """Count raster block reads of all RasterBlockSampler instances."""
+
+    def __init__(self, sampler_class, cache=None):
+        """Initialize BlockReadCounter.
+
+        Parameters
+        ----------
+        sampler_class : type
+            RasterBlockSampler class of plugin
+        cache : BlockCache or None
+            shared block cache of plugin, cleared before each run (Default value = None)
+
+        """
+        self.sampler_class = sampler_class
+        self.cache = cache
+        self.samplers = []
+        self.init = sampler_class.__init__
+
+        counter = self
+
+        def init(sampler, *args, **kwargs):
+            counter.init(sampler, *args, **kwargs)
+            counter.samplers.append(sampler)
+
+        sampler_class.__init__ = init
+
+    def reset(self):
+        """Forget samplers (and cached blocks) of previous runs."""
+        self.samplers = []
+        if self.cache is not None:
+            self.cache.clear()
+
+    def count(self):
+        """Get total number of block reads (in this process).
+
+        Returns
+        -------
+        block_reads : int
+            number of raster blocks read
+
+        """
+        return sum(sampler.block_reads for sampler in self.samplers)
+
+
+def run_case(name, algorithm, parameters, counter, repeat):
+    """Run processing algorithm and measure runtime and memory.
+
+    Parameters
+    ----------
+    name : str
+        benchmark case name
+    algorithm : str
+        processing algorithm id
+    parameters : dict or callable
+        algorithm parameters (or function creating fresh parameters per run)
+    counter : BlockReadCounter
+        raster block read counter
+    repeat : int
+        number of runs
+
+    Returns
+    -------
+    result : dict
+        benchmark result (best and all wall times, peak memory, block reads)
+
+    """
+    import processing
+    from qgis.core import QgsProcessingContext
+    from qgis.core import QgsProcessingFeedback
+
+    times = []
+    peak_memory = 0
+    block_reads = 0
+    for _ in range(repeat):
+        counter.reset()
+        context = QgsProcessingContext()
+        feedback = QgsProcessingFeedback()
+
+        params = parameters() if callable(parameters) else dict(parameters)
+
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        processing.run(algorithm, params, context=context, feedback=feedback)
+        times.append(time.perf_counter() - t0)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        block_reads = counter.count()
+
+    result = {
+        'case': name,
+        'algorithm': algorithm,
+        'wall_time_s': min(times),
+        'wall_times_s': times,
+        'peak_python_memory_mb': peak_memory / 1024 ** 2,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'raster_block_reads': block_reads,
+    }
+    print(f'{name:40s} {result["wall_time_s"]:10.3f} s {result["peak_python_memory_mb"]:10.1f} MB '
+          f'{block_reads:8d} blocks')
+
+    return result
+
+
+def run_benchmarks(args):
+    """Create synthetic data, run all benchmark cases and write report.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        command line arguments
+
+    """
+    from qgis.core import Qgis
+    from qgis.core import QgsApplication
+    from qgis.core import QgsRasterLayer
+
+    # headless QGIS with processing framework
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    sys.path.append(os.path.join(QgsApplication.pkgDataPath(), 'python', 'plugins'))
+    from processing.core.Processing import Processing
+    Processing.initialize()
+
+    # import plugin as package and register provider
+    sys.path.insert(0, PLUGINS_DIR)
+    plugin = importlib.import_module(os.path.basename(PLUGIN_DIR))
+    provider_module = importlib.import_module(f'{plugin.__name__}.provider')
+    raster_module = importlib.import_module(f'{plugin.__name__}.raster')
+    config_module = importlib.import_module(f'{plugin.__name__}.config')
+    QgsApplication.processingRegistry().addProvider(provider_module.CruiseToolsProvider())
+
+    counter = BlockReadCounter(raster_module.RasterBlockSampler, raster_module.block_cache())
+
+    # algorithms store their settings as new defaults, restore config afterwards
+    config_file = config_module.CruiseToolsConfig().config_file
+    config_backup = f'{config_file}.benchmark'
+    shutil.copyfile(config_file, config_backup)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='cruisetools_benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+    extent = (0.0, 50.0, args.extent, 50.0 + args.extent)
+
+    try:
+        # synthetic input data
+        raster_path = os.path.join(workdir, f'bathymetry_{args.raster_size}.tif')
+        if not os.path.exists(raster_path):
+            print(f'Creating {args.raster_size} x {args.raster_size} bathymetry grid...')
+            create_bathymetry(raster_path, args.raster_size, extent)
+        raster_layer = QgsRasterLayer(raster_path, 'bathymetry', 'gdal')
+
+        def plan():
+            return create_line_plan(args.lines, args.vertices, extent)
+
+        mbes_parameters = {
+            'INPUT_LINE': plan(),
+            'INPUT_RASTER': raster_layer,
+            'BAND': 1,
+            'DISSOLVE_BUFFER': True,
+            'SWATH_ANGLE_MODE': 0,
+            'SWATH_ANGLE_FIELD': '',
+            'SWATH_ANGLE': 120,
+            'DENSIFY_MODE': 0,
+            'DENSIFY_VALUE': args.densify,
+            'WORKERS': 0,
+            'USE_CACHE': False,
+            'OUTPUT': 'TEMPORARY_OUTPUT',
+        }
+
+        cases = [
+            ('EstimateMBESCoverage (dissolved)', 'cruisetools:estimatembescoverage', mbes_parameters),
+            ('EstimateMBESCoverage (segments)', 'cruisetools:estimatembescoverage',
+             dict(mbes_parameters, DISSOLVE_BUFFER=False)),
+            ('EstimateMBESCoverage (adaptive)', 'cruisetools:estimatembescoverage',
+             dict(mbes_parameters, DENSIFY_MODE=2, DENSIFY_VALUE=5)),
+            ('EstimateMBESCoverage (count raster)', 'cruisetools:estimatembescoverage',
+             dict(mbes_parameters, OUTPUT=None, OUTPUT_COUNT=os.path.join(workdir, 'count.tif'))),
+            ('ParallelLinePlanning', 'cruisetools:parallellineplanning',
+             lambda: {'INPUT': plan(), 'OFFSET': 1000, 'SIDE': 0, 'NUMBER_OF_LINES': 5}),
+            ('PlanningLinesToVertices', 'cruisetools:planninglinestovertices',
+             lambda: {'INPUT': plan(), 'LATLON_DD': True, 'LATLON_DDM': True, 'OUTPUT': 'TEMPORARY_OUTPUT'}),
+        ]
+        if args.workers > 0:
+            cases.insert(2, (f'EstimateMBESCoverage ({args.workers} workers)', 'cruisetools:estimatembescoverage',
+                             dict(mbes_parameters, WORKERS=args.workers)))
+
+        results = [
+            run_case(name, algorithm, parameters, counter, args.repeat)
+            for name, algorithm, parameters in cases
+            if args.filter is None or args.filter.lower() in name.lower()
+        ]
+    finally:
+        shutil.move(config_backup, config_file)
+        if args.workdir is None and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'plugin_version': plugin_version(),
+        'git_commit': git_commit(),
+        'qgis_version': Qgis.version(),
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': {
+            'raster_size': args.raster_size,
+            'extent_deg': args.extent,
+            'lines': args.lines,
+            'vertices': args.vertices,
+            'densify': args.densify,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Report written to {args.output}')
+
+    qgs.exitQgis()
+
+
+def plugin_version():
+    """Get plugin version from metadata.txt."""
+    with open(os.path.join(PLUGIN_DIR, 'metadata.txt')) as f:
+        for line in f:
+            if line.startswith('version='):
+                return line.split('=', 1)[1].strip()
+    return None
+
+
+def git_commit():
+    """Get git commit of plugin directory (if available)."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PLUGIN_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(path_old, path_new, threshold=REGRESSION_THRESHOLD):
+    """Compare two benchmark reports and print relative changes.
+
+    Parameters
+    ----------
+    path_old : str
+        baseline report
+    path_new : str
+        new report
+    threshold : float
+        relative slowdown reported as regression (Default value = REGRESSION_THRESHOLD)
+
+    Returns
+    -------
+    regressions : int
+        number of cases slower than `threshold`
+
+    """
+    with open(path_old) as f:
+        old = {r['case']: r for r in json.load(f)['results']}
+    with open(path_new) as f:
+        new = {r['case']: r for r in json.load(f)['results']}
+
+    regressions = 0
+    for case, result in new.items():
+        if case not in old:
+            print(f'{case:40s} (new)')
+            continue
+        change = result['wall_time_s'] / old[case]['wall_time_s'] - 1
+        memory = result['peak_python_memory_mb'] - old[case]['peak_python_memory_mb']
+        reads = result['raster_block_reads'] - old[case]['raster_block_reads']
+        flag = 'REGRESSION' if change > threshold else ''
+        regressions += change > threshold
+        print(f'{case:40s} {change:+8.1%} time {memory:+10.1f} MB {reads:+8d} blocks {flag}')
+
+    return regressions
+
+
+def main():
+    """Parse command line arguments and run benchmarks or compare reports."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--raster-size', type=int, default=2000, help='grid rows/columns (default: 2000)')
+    parser.add_argument('--extent', type=float, default=1.0, help='grid extent in degrees (default: 1.0)')
+    parser.add_argument('--lines', type=int, default=10, help='number of survey lines (default: 10)')
+    parser.add_argument('--vertices', type=int, default=20, help='vertices per line (default: 20)')
+    parser.add_argument('--densify', type=int, default=100, help='points per segment (default: 100)')
+    parser.add_argument('--workers', type=int, default=0, help='also run MBES coverage with worker processes')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, best time is reported (default: 3)')
+    parser.add_argument('--filter', default=None, help='only run cases containing this string')
+    parser.add_argument('--workdir', default=None, help='directory for synthetic data (reused if it exists)')
+    parser.add_argument('--keep', action='store_true', help='keep temporary synthetic data')
+    parser.add_argument('-o', '--output', default='benchmark_report.json', help='JSON report path')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two JSON reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare_reports(*args.compare) else 0)
+
+    run_benchmarks(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# coding=utf-8
+"""Tests for raster sampling and NumPy raster kernels (raster.py).
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'simon.dreutter@awi.de'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, Simon Dreutter'
+
+import os
+import unittest
+
+import numpy as np
+
+from qgis.core import QgsPointXY
+from qgis.core import QgsRasterLayer
+
+from ..raster import RasterBlockSampler
+from ..raster import rasterize_polygon
+from ..raster import reduce_2x2
+
+from .utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+
+class RasterBlockSamplerTest(unittest.TestCase):
+    """Test tiled raster sampling."""
+
+    def setUp(self):
+        """Runs before each test."""
+        path = os.path.join(os.path.dirname(__file__), 'tenbytenraster.asc')
+        self.layer = QgsRasterLayer(path, 'TestRaster')
+        self.extent = self.layer.extent()
+
+    def test_pixel_centers(self):
+        """Values at pixel centers across several tiles match provider.sample()."""
+        col, row = np.meshgrid(np.arange(10), np.arange(10))
+        x = self.extent.xMinimum() + (col + 0.5) * 10
+        y = self.extent.yMaximum() - (row + 0.5) * 10
+
+        values = RasterBlockSampler(self.layer, 1, tile_size=4).sample(x, y)
+        self.assertEqual(values.shape, (10, 10))
+
+        provider = self.layer.dataProvider()
+        expected = [provider.sample(QgsPointXY(xi, yi), 1)[0] for xi, yi in zip(x.ravel(), y.ravel())]
+        np.testing.assert_allclose(values.ravel(), expected)
+        np.testing.assert_allclose(values, col)
+
+    def test_outside(self):
+        """Coordinates outside the raster are NaN."""
+        x = np.array([self.extent.xMinimum() - 5, self.extent.xMaximum() + 5, self.extent.center().x()])
+        y = np.array([self.extent.center().y(), self.extent.center().y(), self.extent.yMinimum() - 5])
+        values = RasterBlockSampler(self.layer, 1, tile_size=4).sample(x, y)
+        self.assertTrue(np.isnan(values).all())
+
+
+class RasterizePolygonTest(unittest.TestCase):
+    """Test scanline fill of polygon rings."""
+
+    def test_square(self):
+        """Only pixel centers inside the ring are set."""
+        mask = np.zeros((5, 5), dtype=bool)
+        rasterize_polygon(mask, np.array([1., 3., 3., 1.]), np.array([1., 1., 3., 3.]))
+        expected = np.zeros((5, 5), dtype=bool)
+        expected[1:3, 1:3] = True
+        np.testing.assert_array_equal(mask, expected)
+
+    def test_triangle(self):
+        """Pixel centers are tested against sloped edges."""
+        mask = np.zeros((4, 4), dtype=bool)
+        rasterize_polygon(mask, np.array([0., 4., 0.]), np.array([0., 4., 4.]))
+        np.testing.assert_array_equal(mask, np.tril(np.ones((4, 4), dtype=bool), -1))
+
+    def test_hole_even_odd(self):
+        """Overlapping ring parts are filled with even-odd rule, mask is only extended."""
+        mask = np.zeros((6, 6), dtype=bool)
+        mask[0, 0] = True
+        # outer square and inner square traversed as one ring
+        col = np.array([0., 6., 6., 0., 0., 2., 2., 4., 4., 2., 2., 0.])
+        row = np.array([0., 0., 6., 6., 0., 0., 2., 2., 4., 4., 0., 0.])
+        rasterize_polygon(mask, col, row)
+        expected = np.ones((6, 6), dtype=bool)
+        expected[2:4, 2:4] = False
+        np.testing.assert_array_equal(mask, expected)
+
+    def test_clipped_to_mask(self):
+        """Rings extending beyond the mask are clipped, rings outside leave it unchanged."""
+        mask = np.zeros((3, 3), dtype=bool)
+        rasterize_polygon(mask, np.array([-5., 1., 1., -5.]), np.array([-5., -5., 10., 10.]))
+        expected = np.zeros((3, 3), dtype=bool)
+        expected[:, 0] = True
+        np.testing.assert_array_equal(mask, expected)
+
+        rasterize_polygon(mask, np.array([10., 12., 12., 10.]), np.array([10., 10., 12., 12.]))
+        np.testing.assert_array_equal(mask, expected)
+
+
+class Reduce2x2Test(unittest.TestCase):
+    """Test reduction of depth grids to half resolution."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.array = np.array([
+            [-10., -20., -30.],
+            [np.nan, -40., -50.],
+            [-60., np.nan, np.nan],
+        ])
+
+    def test_mean(self):
+        """Mean ignores NaNs, odd sizes are padded."""
+        reduced = reduce_2x2(self.array, 'mean')
+        self.assertEqual(reduced.shape, (2, 2))
+        self.assertEqual(reduced.dtype, np.float32)
+        np.testing.assert_allclose(reduced, [[-70. / 3., -40.], [-60., np.nan]])
+
+    def test_min_shallowest(self):
+        """'min' keeps value closest to zero, independent of sign."""
+        np.testing.assert_allclose(reduce_2x2(self.array, 'min'), [[-10., -30.], [-60., np.nan]])
+        np.testing.assert_allclose(reduce_2x2(-self.array, 'min'), [[10., 30.], [60., np.nan]])
+
+    def test_lowest_highest(self):
+        """'lowest'/'highest' keep minimum/maximum value."""
+        np.testing.assert_allclose(reduce_2x2(self.array, 'lowest'), [[-40., -50.], [-60., np.nan]])
+        np.testing.assert_allclose(reduce_2x2(self.array, 'highest'), [[-10., -30.], [-60., np.nan]])
+
+
+if __name__ == "__main__":
+    unittest.main()
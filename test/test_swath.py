@@ -0,0 +1,111 @@
+# coding=utf-8
+"""Tests for swath geometry kernels (planning/swath.py).
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'simon.dreutter@awi.de'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, Simon Dreutter'
+
+import unittest
+
+import numpy as np
+
+from ..planning import swath
+
+
+class FillNansTest(unittest.TestCase):
+    """Test linear interpolation of NaNs along profiles."""
+
+    def test_interior_and_edges(self):
+        """Interior NaNs are interpolated, leading/trailing NaNs take nearest valid value."""
+        values = np.array([[np.nan, 1., np.nan, 3., np.nan, np.nan]])
+        np.testing.assert_allclose(swath.fill_nans(values), [[1., 1., 2., 3., 3., 3.]])
+
+    def test_rows_independent(self):
+        """Rows are filled independently, rows without valid values stay NaN."""
+        values = np.array([
+            [0., np.nan, np.nan, 6.],
+            [np.nan, np.nan, np.nan, np.nan],
+            [5., 4., 3., 2.],
+        ])
+        filled = swath.fill_nans(values)
+        np.testing.assert_allclose(filled[0], [0., 2., 4., 6.])
+        self.assertTrue(np.isnan(filled[1]).all())
+        np.testing.assert_array_equal(filled[2], values[2])
+
+    def test_input_unchanged(self):
+        """Input array is not modified."""
+        values = np.array([[1., np.nan, 3.]])
+        swath.fill_nans(values)
+        self.assertTrue(np.isnan(values[0, 1]))
+
+
+class BeamIntersectionTest(unittest.TestCase):
+    """Test intersection of outer beams with seafloor profiles."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.offsets = np.linspace(0, 300, 61)[None, :]
+
+    def test_flat_seafloor(self):
+        """45 degree beam hits flat seafloor at distance equal to depth."""
+        depths = np.full_like(self.offsets, 100.)
+        dist = swath.beam_intersection(self.offsets, depths, np.array([1.]), np.array([250.]))
+        np.testing.assert_allclose(dist, [100.])
+
+    def test_sloped_seafloor(self):
+        """Beam hits seafloor dipping away from nadir further out."""
+        depths = 100. + 0.5 * self.offsets
+        dist = swath.beam_intersection(self.offsets, depths, np.array([1.]), np.array([250.]))
+        np.testing.assert_allclose(dist, [200.])
+
+    def test_beyond_max_dist(self):
+        """No intersection within beam length returns NaN."""
+        depths = np.full_like(self.offsets, 100.)
+        dist = swath.beam_intersection(self.offsets, depths, np.array([1.]), np.array([50.]))
+        self.assertTrue(np.isnan(dist[0]))
+
+
+class SwathEdgesTest(unittest.TestCase):
+    """Test port/starboard footprint distances."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.depth = np.array([100.])
+        self.dist_flat = swath.flat_swath_width(self.depth, 45)
+        self.offsets = swath.profile_offsets(self.dist_flat, self.dist_flat)
+
+    def test_flat_seafloor(self):
+        """Flat seafloor gives flat swath width on both sides."""
+        profile_depths = np.full_like(self.offsets, 100.)
+        dist_port, dist_stbd = swath.swath_edges(
+            self.depth, self.offsets, profile_depths, self.dist_flat, self.dist_flat
+        )
+        np.testing.assert_allclose(dist_port, [100.])
+        np.testing.assert_allclose(dist_stbd, [100.])
+
+    def test_sloped_seafloor_with_gaps(self):
+        """Seafloor deepening to starboard widens starboard and narrows port swath (NaNs filled)."""
+        profile_depths = 100. + 0.5 * self.offsets
+        profile_depths[0, 10:20] = np.nan
+        dist_port, dist_stbd = swath.swath_edges(
+            self.depth, self.offsets, profile_depths, self.dist_flat, self.dist_flat
+        )
+        np.testing.assert_allclose(dist_port, [200. / 3.])
+        np.testing.assert_allclose(dist_stbd, [200.])
+
+    def test_profile_spacing(self):
+        """Profile spacing matches spacing of profile offsets."""
+        np.testing.assert_allclose(
+            np.diff(self.offsets[0]), swath.profile_spacing(2 * self.dist_flat[0])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,14 @@ from qgis.core import *
 import os
 import random
 import math
+import threading
+
+import numpy as np
+
+# memoized CRS and coordinate transformations (shared by all tools)
+_crs_cache = {}
+_transform_cache = {}
+_cache_lock = threading.Lock()
 
 
 def dd2ddm(latitude, longitude):
@@ -50,6 +58,119 @@ def dd2ddm(latitude, longitude):
     return lat_ddm, lon_ddm
 
 
+def transform_xy(x, y, transform):
+    """Transform coordinate arrays with a single coordinate transformation call
+
+    Parameters
+    ----------
+    x : array_like
+        x coordinates
+    y : array_like
+        y coordinates
+    transform : QgsCoordinateTransform
+        coordinate transformation
+
+    Returns
+    -------
+    x_t, y_t : (numpy.ndarray, numpy.ndarray)
+        transformed coordinates (same shape as input)
+
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.size == 0 or transform.isShortCircuited():
+        return x.copy(), y.copy()
+
+    # transform all coordinates at once as (helper) LineString geometry
+    line = QgsLineString(x.ravel().tolist(), y.ravel().tolist())
+    try:
+        line.transform(transform)
+    except QgsCsException:
+        raise Exception('CRS transformation failed')
+
+    # read transformed coordinates back as whole arrays (no point objects per vertex)
+    x_t = np.asarray(line.xVector(), dtype=np.float64)
+    y_t = np.asarray(line.yVector(), dtype=np.float64)
+
+    return x_t.reshape(x.shape), y_t.reshape(y.shape)
+
+
+def crs_key(crs):
+    """Get hashable key of CRS
+
+    Parameters
+    ----------
+    crs : QgsCoordinateReferenceSystem
+        input CRS
+
+    Returns
+    -------
+    key : str
+        authority ID or (if not available) WKT of CRS
+
+    """
+    return crs.authid() or crs.toWkt(Qgis.CrsWktVariant.Preferred)
+
+
+def get_crs(definition):
+    """Get (memoized) CRS from definition string
+
+    Parameters
+    ----------
+    definition : str
+        CRS definition, e.g. 'EPSG:4326'
+
+    Returns
+    -------
+    crs : QgsCoordinateReferenceSystem
+        CRS (copy of cached instance)
+
+    """
+    with _cache_lock:
+        crs = _crs_cache.get(definition)
+        if crs is None:
+            crs = QgsCoordinateReferenceSystem(definition)
+            _crs_cache[definition] = crs
+
+    return QgsCoordinateReferenceSystem(crs)
+
+
+def get_transform(crs_src, crs_dst, transform_context):
+    """Get (memoized) coordinate transformation
+
+    Transformations are cached by source CRS, destination CRS and the coordinate
+    operations of the transform context. A copy is returned, so the transformation
+    can safely be used in the calling thread.
+
+    Parameters
+    ----------
+    crs_src : QgsCoordinateReferenceSystem
+        source CRS
+    crs_dst : QgsCoordinateReferenceSystem
+        destination CRS
+    transform_context : QgsCoordinateTransformContext
+        transform context (e.g. of project or processing context)
+
+    Returns
+    -------
+    transform : QgsCoordinateTransform
+        coordinate transformation from `crs_src` to `crs_dst`
+
+    """
+    key = (
+        crs_key(crs_src),
+        crs_key(crs_dst),
+        tuple(sorted(transform_context.coordinateOperations().items())),
+    )
+    with _cache_lock:
+        transform = _transform_cache.get(key)
+        if transform is None:
+            transform = QgsCoordinateTransform(crs_src, crs_dst, transform_context)
+            _transform_cache[key] = transform
+
+    return QgsCoordinateTransform(transform)
+
+
 def get_driver_from_path(file_path):
     """Get GDAL driver from file path
 
@@ -0,0 +1,217 @@
+from math import floor
+
+import numpy as np
+
+from qgis.core import Qgis
+from qgis.core import QgsCoordinateReferenceSystem
+from qgis.core import QgsCoordinateTransformContext
+from qgis.core import QgsRasterLayer
+from qgis.core import QgsWkbTypes
+
+from .. import parallel
+from ..raster import create_stack_sampler
+
+# per-process state of profile worker processes
+_worker = {}
+
+
+def line_vertices(geom):
+    """Get vertex coordinates of (multi) line geometry.
+
+    Parts are concatenated in order; the gap between the end of one part
+    and the start of the next one has zero length (like `QgsGeometry.interpolate`).
+
+    Parameters
+    ----------
+    geom : QgsGeometry
+        line geometry
+
+    Returns
+    -------
+    x, y : (numpy.ndarray, numpy.ndarray)
+        vertex coordinates
+    part_starts : numpy.ndarray
+        indices of first vertex of each part
+
+    """
+    if QgsWkbTypes.isMultiType(geom.wkbType()):
+        parts = geom.asMultiPolyline()
+    else:
+        parts = [geom.asPolyline()]
+    parts = [part for part in parts if len(part) > 0]
+    if len(parts) == 0:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=np.int64)
+
+    xy = np.array([(v.x(), v.y()) for part in parts for v in part], dtype=np.float64)
+    part_starts = np.cumsum([0] + [len(part) for part in parts[:-1]])
+
+    return xy[:, 0], xy[:, 1], part_starts
+
+
+def cumulative_length(x, y, part_starts=None):
+    """Calculate cumulative (planar) length at each vertex.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        vertex x coordinates
+    y : numpy.ndarray
+        vertex y coordinates
+    part_starts : numpy.ndarray or None
+        indices of first vertex of each part, jumps to these vertices have zero length (Default value = None)
+
+    Returns
+    -------
+    length : numpy.ndarray
+        cumulative length (0 at first vertex)
+
+    """
+    segment_length = np.hypot(np.diff(x), np.diff(y))
+    if part_starts is not None and len(part_starts) > 1:
+        segment_length[np.asarray(part_starts[1:]) - 1] = 0
+
+    return np.concatenate(([0.0], np.cumsum(segment_length)))
+
+
+def interpolate_line(x, y, length, distances):
+    """Interpolate points along line at given distances.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        vertex x coordinates
+    y : numpy.ndarray
+        vertex y coordinates
+    length : numpy.ndarray
+        cumulative length at vertices (see `cumulative_length`)
+    distances : numpy.ndarray
+        distances along line (clipped to line length)
+
+    Returns
+    -------
+    x_points, y_points : (numpy.ndarray, numpy.ndarray)
+        interpolated point coordinates
+
+    """
+    return np.interp(distances, length, x), np.interp(distances, length, y)
+
+
+def profile_points(x, y, part_starts, distance, length_m):
+    """Create evenly spaced profile points along line.
+
+    Points are spaced `distance` meters apart (ellipsoidal), starting at the
+    first vertex. Ellipsoidal distances are mapped proportionally to the
+    planar line length in the layer CRS.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        vertex x coordinates (see `line_vertices`)
+    y : numpy.ndarray
+        vertex y coordinates
+    part_starts : numpy.ndarray
+        indices of first vertex of each part
+    distance : float
+        point spacing [m]
+    length_m : float
+        ellipsoidal line length [m]
+
+    Returns
+    -------
+    x_points, y_points : (numpy.ndarray, numpy.ndarray)
+        profile point coordinates (layer CRS)
+
+    """
+    if len(x) == 0 or length_m <= 0:
+        return np.empty(0), np.empty(0)
+
+    length = cumulative_length(x, y, part_starts)
+    num_steps = int(floor(length_m / distance))
+    distances = np.arange(num_steps + 1) * distance * (length[-1] / length_m)
+
+    return interpolate_line(x, y, length, distances)
+
+
+def sample_profile(job, sampler):
+    """Create profile points of line and sample rasters.
+
+    Parameters
+    ----------
+    job : dict
+        profile job with `x`, `y`, `part_starts` (see `line_vertices`), `distance` and `length_m`
+    sampler : RasterStackSampler
+        raster sampler for coordinates in line CRS (one column per raster band)
+
+    Returns
+    -------
+    x, y, values : (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        profile point coordinates (line CRS) and raster values (points x columns, NoData as NaN)
+
+    """
+    x, y = profile_points(job['x'], job['y'], job['part_starts'], job['distance'], job['length_m'])
+    if len(x) == 0:
+        return x, y, np.empty((0, len(sampler.samplers)))
+
+    return x, y, sampler.sample(x, y)
+
+
+def init_worker(prefix_path, column_sources, crs_line_wkt, priority_sources=()):
+    """Initialize profile worker process (own QGIS instance and raster handles)."""
+    app = parallel.init_qgis(prefix_path)
+
+    raster_layers = {}
+    columns = []
+    for source, provider, band in column_sources:
+        if (source, provider) not in raster_layers:
+            raster_layers[(source, provider)] = QgsRasterLayer(source, f'raster_{len(raster_layers)}', provider)
+        columns.append((raster_layers[(source, provider)], band))
+    priority_layers = [
+        QgsRasterLayer(source, f'priority_{i}', provider) for i, (source, provider) in enumerate(priority_sources)
+    ]
+    crs_line = QgsCoordinateReferenceSystem.fromWkt(crs_line_wkt)
+
+    _worker['app'] = app
+    _worker['raster_layers'] = list(raster_layers.values()) + priority_layers
+    _worker['sampler'] = create_stack_sampler(columns, crs_line, priority_layers, QgsCoordinateTransformContext())
+
+
+def run_worker_job(job):
+    """Sample profile of line in worker process (see `sample_profile`)."""
+    return sample_profile(job, _worker['sampler'])
+
+
+def create_process_pool(n_workers, columns, crs_line, priority_layers=None):
+    """Create process pool for profile sampling.
+
+    Each worker opens its own raster handles from the layer sources.
+
+    Parameters
+    ----------
+    n_workers : int
+        number of worker processes
+    columns : list of (QgsRasterLayer, int)
+        raster layer and band number of each value column
+    crs_line : QgsCoordinateReferenceSystem
+        CRS of input lines
+    priority_layers : list of QgsRasterLayer or None
+        rasters sampled before raster of first column, highest priority first (Default value = None)
+
+    Returns
+    -------
+    pool : concurrent.futures.ProcessPoolExecutor
+        process pool (use `map_jobs` to run profile jobs)
+
+    """
+    return parallel.create_process_pool(
+        n_workers, init_worker,
+        (
+            [(lyr.source(), lyr.providerType(), band) for lyr, band in columns],
+            crs_line.toWkt(Qgis.CrsWktVariant.Preferred),
+            [(lyr.source(), lyr.providerType()) for lyr in (priority_layers or [])]
+        )
+    )
+
+
+def map_jobs(pool, jobs, feedback=None):
+    """Run profile jobs in process pool and yield results in job order (see `parallel.map_jobs`)."""
+    return parallel.map_jobs(pool, run_worker_job, jobs, feedback)
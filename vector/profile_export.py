@@ -0,0 +1,174 @@
+import csv
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+# Parquet export is available if pyarrow is installed (not shipped with QGIS on all platforms)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# columns of profile sample tables (followed by one float64 column per sampled raster band)
+PROFILE_COLUMNS = (
+    ('line_fid', np.int64),
+    ('distance', np.float64),
+    ('x', np.float64),
+    ('y', np.float64),
+)
+
+# number of samples per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 2 ** 20
+
+
+def parquet_available():
+    """Check if Parquet export is available (pyarrow installed)."""
+    return pq is not None
+
+
+def line_table_path(path):
+    """Get path of line attribute table (CSV) belonging to profile sample file."""
+    return f'{os.path.splitext(path)[0]}_lines.csv'
+
+
+def write_line_table(path, field_names, rows):
+    """Write line attribute table as Comma Separated Value [CSV].
+
+    Parameters
+    ----------
+    path : str
+        output CSV file
+    field_names : list of str
+        column names (first column: `line_fid`)
+    rows : iterable of list
+        attribute values per line (None as empty cell)
+
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+        csv_writer = csv.writer(csvfile, dialect='excel')
+        csv_writer.writerow(field_names)
+        for row in rows:
+            csv_writer.writerow(['' if value is None else value for value in row])
+
+
+class ProfileColumnWriter:
+    """Stream profile samples to a columnar file.
+
+    Samples are written line by line as typed columns (see `PROFILE_COLUMNS`, plus value columns):
+      - `.npz`: NumPy archive of one array per column, loadable with `numpy.load`.
+        Columns are streamed to temporary files and packed into the
+        (uncompressed) archive on `close`, so memory use does not grow with
+        the number of samples.
+      - `.parquet`: Apache Parquet file (requires pyarrow), written in row groups.
+
+    """
+
+    def __init__(self, path, value_columns=('value',)):
+        """Initialize ProfileColumnWriter.
+
+        Parameters
+        ----------
+        path : str
+            output file (`.npz` or `.parquet`)
+        value_columns : iterable of str
+            names of raster value columns (Default value = ('value',))
+
+        """
+        self.path = path
+        self.columns = list(PROFILE_COLUMNS) + [(name, np.float64) for name in value_columns]
+        self.format = os.path.splitext(path)[1].lower().lstrip('.')
+        self.n_samples = 0
+
+        if self.format == 'parquet':
+            if pq is None:
+                raise ImportError('Parquet export requires the Python package pyarrow')
+            self.schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in self.columns])
+            self.writer = pq.ParquetWriter(path, self.schema)
+            self.chunks = []
+            self.chunk_size = 0
+        elif self.format == 'npz':
+            self.tmp_dir = tempfile.mkdtemp(prefix='profile_', dir=os.path.dirname(os.path.abspath(path)))
+            self.files = {
+                name: open(os.path.join(self.tmp_dir, f'column_{i}.bin'), 'wb')
+                for i, (name, _) in enumerate(self.columns)
+            }
+        else:
+            raise ValueError(f'Unsupported columnar format: {self.format} (use .npz or .parquet)')
+
+    def write(self, line_fid, distance, x, y, values):
+        """Append profile samples of one line.
+
+        Parameters
+        ----------
+        line_fid : int
+            feature id of line
+        distance : numpy.ndarray
+            distance of samples along line [m]
+        x : numpy.ndarray
+            x coordinates of samples
+        y : numpy.ndarray
+            y coordinates of samples
+        values : numpy.ndarray
+            raster values (samples x value columns, NoData as NaN)
+
+        """
+        n = len(x)
+        if n == 0:
+            return
+
+        arrays = [np.full(n, line_fid), distance, x, y] + list(np.reshape(values, (n, -1)).T)
+        columns = {
+            name: np.ascontiguousarray(array, dtype=dtype) for (name, dtype), array in zip(self.columns, arrays)
+        }
+        self.n_samples += n
+
+        if self.format == 'parquet':
+            self.chunks.append(columns)
+            self.chunk_size += n
+            if self.chunk_size >= PARQUET_ROW_GROUP_SIZE:
+                self.flush()
+        else:
+            for name, array in columns.items():
+                self.files[name].write(array.tobytes())
+
+    def flush(self):
+        """Write buffered samples as Parquet row group."""
+        if len(self.chunks) == 0:
+            return
+        table = pa.table(
+            {name: np.concatenate([chunk[name] for chunk in self.chunks]) for name, _ in self.columns},
+            schema=self.schema,
+        )
+        self.writer.write_table(table)
+        self.chunks = []
+        self.chunk_size = 0
+
+    def close(self):
+        """Finish output file."""
+        if self.format == 'parquet':
+            self.flush()
+            self.writer.close()
+            return
+
+        for f in self.files.values():
+            f.close()
+        try:
+            # pack column files into NumPy archive (same layout as `numpy.savez`)
+            with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for name, dtype in self.columns:
+                    header = {
+                        'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                        'fortran_order': False,
+                        'shape': (self.n_samples,),
+                    }
+                    with archive.open(f'{name}.npy', 'w', force_zip64=True) as npy:
+                        np.lib.format.write_array_header_1_0(npy, header)
+                        with open(self.files[name].name, 'rb') as src:
+                            shutil.copyfileobj(src, npy)
+        finally:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
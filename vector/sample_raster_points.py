@@ -1,20 +1,26 @@
+from math import isnan
 import os
 
-from qgis.core import QgsCoordinateTransform
+import numpy as np
+
+from qgis.core import QgsFeatureRequest
 from qgis.core import QgsProcessing
 from qgis.core import QgsProcessingAlgorithm
 from qgis.core import QgsProcessingParameterBand
 from qgis.core import QgsProcessingParameterBoolean
+from qgis.core import QgsProcessingParameterMultipleLayers
 from qgis.core import QgsProcessingParameterRasterLayer
 from qgis.core import QgsProcessingParameterVectorLayer
 from qgis.core import QgsProject
+from qgis.core import QgsVectorDataProvider
 from qgis.core import QgsWkbTypes
 
-from qgis.PyQt.QtCore import QCoreApplication
+from qgis.PyQt.QtCore import QCoreApplication, QVariant
 from PyQt5.QtGui import QIcon
 
 from .vector import Vector
 from .. import utils
+from ..raster import create_stack_sampler
 
 
 class SampleRasterPoints(QgsProcessingAlgorithm, Vector):
@@ -26,6 +32,8 @@ class SampleRasterPoints(QgsProcessingAlgorithm, Vector):
     SELECTED = 'SELECTED'
     INPUT_RASTER = 'INPUT_RASTER'
     BAND = 'BAND'
+    INPUT_RASTERS_PRIORITY = 'INPUT_RASTERS_PRIORITY'
+    INPUT_RASTERS_ADDITIONAL = 'INPUT_RASTERS_ADDITIONAL'
     # outputs:
     OUTPUT = 'OUTPUT'
 
@@ -39,6 +47,8 @@ class SampleRasterPoints(QgsProcessingAlgorithm, Vector):
     def initConfig(self):
         """Get default values from CruiseToolsConfig."""
         self.raster_layer_name = self.config.getint(self.module, 'raster_layer')
+        self.priority_raster_names = self.config.get(self.module, 'priority_rasters', fallback='').split(';')
+        self.additional_raster_names = self.config.get(self.module, 'additional_rasters', fallback='').split(';')
 
 
     def initAlgorithm(self, config=None):  # noqa
@@ -79,6 +89,22 @@ class SampleRasterPoints(QgsProcessingAlgorithm, Vector):
                 optional=False,
                 allowMultiple=False)
         )
+        self.addParameter(
+            QgsProcessingParameterMultipleLayers(
+                name=self.INPUT_RASTERS_PRIORITY,
+                description=self.tr('Higher priority raster layers (in priority order, band 1)'),
+                layerType=QgsProcessing.TypeRaster,
+                defaultValue=[name for name in self.priority_raster_names if name in raster_layer_names] or None,
+                optional=True)
+        )
+        self.addParameter(
+            QgsProcessingParameterMultipleLayers(
+                name=self.INPUT_RASTERS_ADDITIONAL,
+                description=self.tr('Additional raster layers (e.g. backscatter, slope; all bands sampled in same pass)'),
+                layerType=QgsProcessing.TypeRaster,
+                defaultValue=[name for name in self.additional_raster_names if name in raster_layer_names] or None,
+                optional=True)
+        )
 
     def processAlgorithm(self, parameters, context, feedback):  # noqa
         # get input variables as self.* for use in post-processing
@@ -86,10 +112,14 @@ class SampleRasterPoints(QgsProcessingAlgorithm, Vector):
         self.selected = self.parameterAsBoolean(parameters, self.SELECTED, context)
         self.raster_layer = self.parameterAsRasterLayer(parameters, self.INPUT_RASTER, context)
         self.band_number = self.parameterAsInt(parameters, self.BAND, context)
+        self.priority_layers = self.parameterAsLayerList(parameters, self.INPUT_RASTERS_PRIORITY, context)
+        self.additional_layers = self.parameterAsLayerList(parameters, self.INPUT_RASTERS_ADDITIONAL, context)
 
         # set new default values in config
         feedback.pushConsoleInfo(self.tr('Storing new default settings in config...'))
         self.config.set(self.module, 'raster_layer', self.raster_layer.name())
+        self.config.set(self.module, 'priority_rasters', ';'.join(lyr.name() for lyr in self.priority_layers))
+        self.config.set(self.module, 'additional_rasters', ';'.join(lyr.name() for lyr in self.additional_layers))
 
         result = {}
 
@@ -111,61 +141,73 @@ class SampleRasterPoints(QgsProcessingAlgorithm, Vector):
         # get project transformContext for ellipsoidal measurements
         transform_context = context.transformContext()
 
-        # sanitize and set field name
-        raster_value_field_name = self.raster_layer.name()
-        raster_value_field_name = raster_value_field_name.replace(' ', '_')
+        # sampled raster bands and value fields (named after rasters)
+        columns, raster_value_fields = self.raster_sample_fields(
+            self.raster_layer, self.band_number, self.additional_layers
+        )
 
         # get crs's
         crs_point = self.vector_layer.sourceCrs()
-        crs_raster = self.raster_layer.crs()
 
-        # create transformations for later
-        trans_point2raster = QgsCoordinateTransform(crs_point, crs_raster, transform_context)
+        # raster sampler for all bands (first one mosaicked with higher priority rasters, if any),
+        # points are transformed once per raster CRS
+        sampler = create_stack_sampler(columns, crs_point, self.priority_layers, transform_context)
 
-        # with edit(layer):
+        # commit pending edits (values are written to the data provider directly)
+        if self.vector_layer.isEditable():
+            self.vector_layer.commitChanges()
 
-        if not self.vector_layer.isEditable():
-            self.vector_layer.startEditing()
+        provider = self.vector_layer.dataProvider()
+        if not provider.capabilities() & QgsVectorDataProvider.ChangeAttributeValues:
+            feedback.reportError(self.tr('Attribute values of this layer cannot be changed!'), fatalError=True)
+            return {}
 
         # delete fields previously created by Cruise Tools
-        feedback.pushConsoleInfo(self.tr('Removing old sample field...'))
-        self.delete_fields_by_prefix(self.vector_layer, raster_value_field_name)
+        feedback.pushConsoleInfo(self.tr('Removing old sample fields...'))
+        self.delete_fields_by_prefix(self.vector_layer, [field.name() for field in raster_value_fields])
 
-        # get raster dtype as mapped QVariant
-        feedback.pushConsoleInfo(self.tr('Creating new sample field...'))
-        raster_value_field = self.raster_band_field(self.raster_layer, self.band_number, raster_value_field_name)
-
-        # create field for raster value
-        self.vector_layer.addAttribute(raster_value_field)
+        # create fields for raster values (data types of raster bands)
+        feedback.pushConsoleInfo(self.tr('Creating new sample fields...'))
+        provider.addAttributes(raster_value_fields)
 
         # update attribute table fields
         self.vector_layer.updateFields()
-
-        # get all features
-        features = self.get_features(self.vector_layer, selected=self.selected)
-
-        feedback.pushConsoleInfo(self.tr('Sampling raster points...'))
-        for feature in features:
-            # get geometry of feature
-            point = feature.geometry().asPoint()
-
-            # transform geometry to EPSG:4326 CRS
-            point_raster_crs = trans_point2raster.transform(point)
-
-            # sample raster value
-            raster_value, no_error = self.raster_layer.dataProvider().sample(point_raster_crs, self.band_number)
-
-            # check if valid depth was sampled, otherwise set to NULL
-            if not no_error:
-                raster_value = None
-
-            # set attribute value
-            feature.setAttribute(feature.fieldNameIndex(raster_value_field_name), raster_value)
-
-            # update attribute table
-            self.vector_layer.updateFeature(feature)
-
-        self.vector_layer.commitChanges()
+        field_idxs = [self.vector_layer.fields().indexFromName(field.name()) for field in raster_value_fields]
+
+        # get (selected) feature IDs and coordinates, without attributes
+        request = QgsFeatureRequest().setNoAttributes()
+        if self.selected and self.vector_layer.selectedFeatureCount() > 0:
+            request.setFilterFids(self.vector_layer.selectedFeatureIds())
+
+        fids, x, y = [], [], []
+        for feature in self.vector_layer.getFeatures(request):
+            geom = feature.geometry()
+            if geom.isEmpty():
+                continue
+            point = geom.asPoint()
+            fids.append(feature.id())
+            x.append(point.x())
+            y.append(point.y())
+
+        # sample all raster bands (tile by tile)
+        feedback.pushConsoleInfo(self.tr(f'Sampling {len(columns)} raster band(s) at {len(fids)} points...'))
+        raster_values = sampler.sample(np.array(x), np.array(y)).reshape(len(fids), len(columns))
+        feedback.setProgress(50)
+
+        # write all values at once, NoData as NULL
+        feedback.pushConsoleInfo(self.tr('Writing sampled values...'))
+        to_values = [int if field.type() == QVariant.Int else float for field in raster_value_fields]
+        attribute_map = {
+            fid: {
+                field_idx: None if isnan(value) else to_value(value)
+                for field_idx, to_value, value in zip(field_idxs, to_values, values)
+            }
+            for fid, values in zip(fids, raster_values.tolist())
+        }
+        if not provider.changeAttributeValues(attribute_map):
+            feedback.reportError(self.tr('Sampled values could not be written!'), fatalError=True)
+            return {}
+        self.vector_layer.reload()
 
         # 100% done
         feedback.setProgress(100)
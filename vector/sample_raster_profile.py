@@ -1,30 +1,43 @@
-from math import floor
+from math import isnan
 import os
 
-from qgis.core import QgsCoordinateTransform
+import numpy as np
+
+from qgis.core import QgsApplication
 from qgis.core import QgsDistanceArea
 from qgis.core import QgsFeature
 from qgis.core import QgsFeatureSink
 from qgis.core import QgsField
 from qgis.core import QgsFields
 from qgis.core import QgsGeometry
+from qgis.core import QgsPointXY
 from qgis.core import QgsProcessing
 from qgis.core import QgsProcessingAlgorithm
 from qgis.core import QgsProcessingException
 from qgis.core import QgsProcessingParameterBand
 from qgis.core import QgsProcessingParameterBoolean
+from qgis.core import QgsProcessingParameterDefinition
+from qgis.core import QgsProcessingParameterEnum
 from qgis.core import QgsProcessingParameterFeatureSink
+from qgis.core import QgsProcessingParameterFileDestination
+from qgis.core import QgsProcessingParameterMultipleLayers
 from qgis.core import QgsProcessingParameterNumber
 from qgis.core import QgsProcessingParameterRasterLayer
 from qgis.core import QgsProcessingParameterVectorLayer
 from qgis.core import QgsProject
 from qgis.core import QgsWkbTypes
 
-from qgis.PyQt.QtCore import QCoreApplication, QVariant
+from qgis.PyQt.QtCore import QCoreApplication, Qt, QVariant
 from PyQt5.QtGui import QIcon, QColor
 
 from .vector import Vector
+from . import profile
+from . import profile_export
+from .. import parallel
 from .. import utils
+from ..raster import DepthPyramid
+from ..raster import create_stack_sampler
+from ..raster import pyramid_directory
 
 
 class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
@@ -37,13 +50,30 @@ class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
     DISTANCE = 'DISTANCE'
     INPUT_RASTER = 'INPUT_RASTER'
     BAND = 'BAND'
+    INPUT_RASTERS_PRIORITY = 'INPUT_RASTERS_PRIORITY'
+    INPUT_RASTERS_ADDITIONAL = 'INPUT_RASTERS_ADDITIONAL'
+    AGGREGATION = 'AGGREGATION'
+    WORKERS = 'WORKERS'
     # outputs:
     OUTPUT = 'OUTPUT'
+    OUTPUT_COLUMNAR = 'OUTPUT_COLUMNAR'
 
     def __init__(self):
         """Initialize SampleRasterProfile."""
         super(SampleRasterProfile, self).__init__()
 
+        # sampling resolution: full raster or pyramid level matching sample distance
+        self.aggregation_modes = [
+            'Full resolution (point sample)',
+            'Pyramid level matching sample distance (mean)',
+            'Pyramid level matching sample distance (minimum)',
+            'Pyramid level matching sample distance (maximum)',
+        ]
+        self.aggregation_statistics = {1: 'mean', 2: 'lowest', 3: 'highest'}
+
+        # pyramids of rasters without writable file source (in QGIS profile directory)
+        self.pyramid_root = os.path.join(QgsApplication.qgisSettingsDirPath(), 'cruisetools', 'depth_pyramids')
+
         # initialize default configuration
         self.initConfig()
 
@@ -51,6 +81,9 @@ class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
         """Get default values from CruiseToolsConfig."""
         self.distance = self.config.getint(self.module, 'distance')
         self.raster_layer_name = self.config.getint(self.module, 'raster_layer')
+        self.priority_raster_names = self.config.get(self.module, 'priority_rasters', fallback='').split(';')
+        self.additional_raster_names = self.config.get(self.module, 'additional_rasters', fallback='').split(';')
+        self.aggregation = self.config.getint(self.module, 'aggregation', fallback=0)
 
 
     def initAlgorithm(self, config=None):  # noqa
@@ -100,15 +133,65 @@ class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
                 optional=False,
                 allowMultiple=False)
         )
+        self.addParameter(
+            QgsProcessingParameterMultipleLayers(
+                name=self.INPUT_RASTERS_PRIORITY,
+                description=self.tr('Higher priority raster layers (in priority order, band 1)'),
+                layerType=QgsProcessing.TypeRaster,
+                defaultValue=[name for name in self.priority_raster_names if name in raster_layer_names] or None,
+                optional=True)
+        )
+        self.addParameter(
+            QgsProcessingParameterMultipleLayers(
+                name=self.INPUT_RASTERS_ADDITIONAL,
+                description=self.tr('Additional raster layers (e.g. backscatter, slope; all bands sampled in same pass)'),
+                layerType=QgsProcessing.TypeRaster,
+                defaultValue=[name for name in self.additional_raster_names if name in raster_layer_names] or None,
+                optional=True)
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                name=self.AGGREGATION,
+                description=self.tr('Sampling resolution (aggregated raster pyramid for coarse profiles)'),
+                options=self.aggregation_modes,
+                defaultValue=self.aggregation,
+                optional=False,
+                allowMultiple=False)
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                name=self.WORKERS,
+                description=self.tr('Number of worker processes (0: run in QGIS process)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=0,
+                optional=True,
+                minValue=0,
+                maxValue=os.cpu_count() or 1)
+        )
+        self.parameterDefinition(self.WORKERS).setFlags(
+            QgsProcessingParameterDefinition.FlagAdvanced
+        )
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 name=self.OUTPUT,
                 description=self.tr('Profile samples'),
                 type=QgsProcessing.TypeVectorPoint,
                 defaultValue=None,
-                optional=False,
+                optional=True,
                 createByDefault=True)
         )
+        file_filter = 'NumPy archive (*.npz)'
+        if profile_export.parquet_available():
+            file_filter += ';;Parquet (*.parquet)'
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                name=self.OUTPUT_COLUMNAR,
+                description=self.tr('Profile samples (columnar file for dense profiles)'),
+                fileFilter=file_filter,
+                defaultValue=None,
+                optional=True,
+                createByDefault=False)
+        )
 
     def processAlgorithm(self, parameters, context, feedback):  # noqa
         # get input variables as self.* for use in post-processing
@@ -117,11 +200,19 @@ class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
         distance = self.parameterAsInt(parameters, self.DISTANCE, context)
         raster_layer = self.parameterAsRasterLayer(parameters, self.INPUT_RASTER, context)
         band_number = self.parameterAsInt(parameters, self.BAND, context)
+        priority_layers = self.parameterAsLayerList(parameters, self.INPUT_RASTERS_PRIORITY, context)
+        additional_layers = self.parameterAsLayerList(parameters, self.INPUT_RASTERS_ADDITIONAL, context)
+        aggregation = self.parameterAsEnum(parameters, self.AGGREGATION, context)
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        output_columnar = self.parameterAsFileOutput(parameters, self.OUTPUT_COLUMNAR, context)
 
         # set new default values in config
         feedback.pushConsoleInfo(self.tr('Storing new default settings in config...'))
         self.config.set(self.module, 'distance', distance)
         self.config.set(self.module, 'raster_layer', raster_layer.name())
+        self.config.set(self.module, 'priority_rasters', ';'.join(lyr.name() for lyr in priority_layers))
+        self.config.set(self.module, 'additional_rasters', ';'.join(lyr.name() for lyr in additional_layers))
+        self.config.set(self.module, 'aggregation', aggregation)
 
         # catch undefined project CRS
         project_crs = QgsProject.instance().crs()
@@ -135,10 +226,22 @@ class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
 
         # get crs's
         crs_line = self.vector_layer.sourceCrs()
-        crs_raster = raster_layer.crs()
 
-        # create transformations for later
-        trans_line2raster = QgsCoordinateTransform(crs_line, crs_raster, transform_context)
+        # sampled raster bands and value fields (named after rasters)
+        columns, raster_value_fields = self.raster_sample_fields(raster_layer, band_number, additional_layers)
+
+        # sampled rasters (full resolution or pyramid level matching sample distance)
+        if aggregation > 0:
+            statistic = self.aggregation_statistics[aggregation]
+            columns = [self.get_pyramid_layer(lyr, band, distance, statistic, feedback) for lyr, band in columns]
+            raster_value_fields = [
+                self.raster_band_field(lyr, band, field.name()) for (lyr, band), field in zip(columns, raster_value_fields)
+            ]
+            priority_layers = [
+                self.get_pyramid_layer(lyr, 1, distance, statistic, feedback)[0] for lyr in priority_layers
+            ]
+            if feedback.isCanceled():
+                return {}
 
         # set fields and attributes
         reserved = {"fid", "ogc_fid", "id"}
@@ -153,18 +256,30 @@ class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
                 continue  # skip reserved fid-like fields
             fields.append(field)
 
-        # sanitize name and create raster field
-        self.raster_value_field_name = raster_layer.name().replace(' ', '_')
-        raster_value_field = self.raster_band_field(raster_layer, band_number, self.raster_value_field_name)
-        fields.append(raster_value_field)
+        # raster value fields
+        for field in raster_value_fields:
+            fields.append(field)
 
         # creating feature sink
         feedback.pushConsoleInfo(self.tr('Creating feature sink...'))
         (sink, dest_id) = self.parameterAsSink(
             parameters, self.OUTPUT, context, fields, QgsWkbTypes.Point, self.vector_layer.sourceCrs()
         )
-        if sink is None:
+        if sink is None and self.OUTPUT in parameters and parameters[self.OUTPUT] is not None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+        if sink is None and not output_columnar:
+            raise QgsProcessingException(self.tr('No output selected. Please set the profile samples layer and/or file.'))
+
+        # columnar output (samples as typed columns, line attributes in separate table)
+        column_writer = None
+        if output_columnar:
+            feedback.pushConsoleInfo(self.tr('Creating columnar output file...'))
+            try:
+                column_writer = profile_export.ProfileColumnWriter(
+                    output_columnar, [field.name() for field in raster_value_fields]
+                )
+            except (ImportError, ValueError) as error:
+                raise QgsProcessingException(self.tr(str(error)))
 
         # set up distance calculator (always in meters)
         da = QgsDistanceArea()
@@ -174,48 +289,95 @@ class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
         # get all features
         features = self.get_features(self.vector_layer, selected=selected)
 
-        feedback.pushConsoleInfo(self.tr('Sampling raster points...'))
+        # source attributes copied to profile points
+        source_fields = [field.name() for field in self.vector_layer.fields() if field.name().lower() not in reserved]
+
+        # profile jobs (line vertices and ellipsoidal length), in feature order
+        profile_features, jobs = [], []
         for feature in features:
             # get geometry of feature
             geom = feature.geometry()
             if not geom:
                 continue
 
-            # total length in meters (ellipsoidal)
-            length = da.measureLength(geom)
-            num_steps = int(floor(length / distance))
+            x, y, part_starts = profile.line_vertices(geom)
+            profile_features.append(feature)
+            jobs.append({
+                'x': x,
+                'y': y,
+                'part_starts': part_starts,
+                'distance': distance,
+                'length_m': da.measureLength(geom),  # total length in meters (ellipsoidal)
+            })
+
+        # line attribute table of columnar output
+        if column_writer is not None:
+            line_rows = []
+            for feature in profile_features:
+                row = [feature.id()]
+                for name in source_fields:
+                    # clean up NULL values, dates/times as ISO strings
+                    value = feature[name]
+                    if not type(value) in [float, int, str, bool]:
+                        if value is None or value.isNull():
+                            value = None
+                        elif hasattr(value, 'toString'):
+                            value = value.toString(Qt.ISODate)
+                    row.append(value)
+                line_rows.append(row)
+            profile_export.write_line_table(
+                profile_export.line_table_path(output_columnar), ['line_fid'] + source_fields, line_rows
+            )
 
-            for i in range(num_steps + 1):
-                d_meters = i * distance
-                frac = d_meters / length
-                point = geom.interpolate(frac * geom.length()).asPoint()
+        feedback.pushConsoleInfo(self.tr('Sampling raster points...'))
+        pool = None
+        if workers > 0 and len(jobs) > 1:
+            # fan out lines to worker processes with own raster handles (results are returned in feature order)
+            feedback.pushConsoleInfo(self.tr(f'Starting {workers} worker processes...'))
+            pool = profile.create_process_pool(workers, columns, crs_line, priority_layers)
+            results = profile.map_jobs(pool, jobs, feedback)
+        else:
+            # raster sampler for all bands (first one mosaicked with higher priority rasters, if any),
+            # profile points are transformed once per raster CRS
+            sampler = create_stack_sampler(columns, crs_line, priority_layers, transform_context)
+            results = (
+                profile.sample_profile(job, sampler)
+                for job in jobs
+                if not feedback.isCanceled()
+            )
 
-                if not point:
+        try:
+            # stream profile points to outputs line by line
+            for i, (feature, (x, y, raster_values)) in enumerate(zip(profile_features, results)):
+                feedback.setProgress(100 * i / len(jobs))
+                if len(x) == 0:
                     continue
 
-                # transform to raster CRS for sampling
-                point_raster_crs = trans_line2raster.transform(point)
-
-                # sample raster
-                raster_value, no_error = raster_layer.dataProvider().sample(point_raster_crs, band_number)
+                # typed columns (distance along line in meters)
+                if column_writer is not None:
+                    column_writer.write(feature.id(), np.arange(len(x)) * distance, x, y, raster_values)
 
-                # check if valid depth was sampled, otherwise set to NULL
-                if not no_error:
-                    raster_value = None
-
-                # create feature
-                out_feat = QgsFeature(fields)
-                out_feat.setGeometry(QgsGeometry.fromPointXY(point))
-
-                # set attributes from line feature
-                attrs = [feature.id()]
-                attrs += [feature[field.name()] for field in self.vector_layer.fields()
-                          if field.name().lower() not in reserved]
-                attrs += [raster_value]
-                out_feat.setAttributes(attrs)
+                if sink is None:
+                    continue
 
-                # add feature to sink
-                sink.addFeature(out_feat, QgsFeatureSink.FastInsert)
+                # attributes from line feature
+                attrs = [feature.id()] + [feature[name] for name in source_fields]
+
+                # create features, NoData as NULL
+                out_feats = []
+                for xi, yi, values in zip(x.tolist(), y.tolist(), raster_values.tolist()):
+                    out_feat = QgsFeature(fields)
+                    out_feat.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(xi, yi)))
+                    out_feat.setAttributes(attrs + [None if isnan(value) else value for value in values])
+                    out_feats.append(out_feat)
+
+                # add features to sink
+                sink.addFeatures(out_feats, QgsFeatureSink.FastInsert)
+        finally:
+            if pool is not None:
+                parallel.shutdown_pool(pool, feedback)
+            if column_writer is not None:
+                column_writer.close()
 
         # make variables accessible for post-processing
         self.output = dest_id
@@ -224,10 +386,50 @@ class SampleRasterProfile(QgsProcessingAlgorithm, Vector):
         feedback.setProgress(100)
         feedback.pushInfo(self.tr(f'{utils.return_success()}! Profiles are sampled!\n'))
 
-        result = {self.OUTPUT: self.output}
+        result = {self.OUTPUT: self.output, self.OUTPUT_COLUMNAR: output_columnar or None}
 
         return result
 
+    def get_pyramid_layer(self, raster_layer, band, distance, statistic, feedback):
+        """Get pyramid level with cell size matching sample distance.
+
+        Parameters
+        ----------
+        raster_layer : QgsRasterLayer
+            input raster layer
+        band : int
+            raster band number
+        distance : int
+            sample distance [m]
+        statistic : str
+            aggregation statistic of pyramid (see `reduce_2x2`)
+        feedback : QgsProcessingFeedback
+            feedback
+
+        Returns
+        -------
+        layer : QgsRasterLayer
+            pyramid level raster (or `raster_layer` if full resolution matches sample distance)
+        band : int
+            raster band number of `layer`
+
+        """
+        pyramid = DepthPyramid(raster_layer, band, pyramid_directory(raster_layer, self.pyramid_root))
+        level = pyramid.level_for(distance)
+        if level == 0:
+            feedback.pushConsoleInfo(self.tr(f'{raster_layer.name()}: resolution matches sample distance, no pyramid used.'))
+            return raster_layer, band
+
+        feedback.pushConsoleInfo(self.tr(
+            f'{raster_layer.name()}: using {statistic} pyramid level {level} '
+            f'(cell size ~{pyramid.res_m * 2 ** level:.0f} m)'
+        ))
+        layer = pyramid.level_layer(level, statistic, feedback)
+        if layer is None:
+            return raster_layer, band
+
+        return layer, 1
+
     def name(self):  # noqa
         return 'samplerasterprofile'
 
@@ -3,14 +3,13 @@ import os
 
 from qgis.core import edit
 from qgis.core import Qgis
-from qgis.core import QgsCoordinateReferenceSystem
-from qgis.core import QgsCoordinateTransform
 from qgis.core import QgsDistanceArea
 from qgis.core import QgsFeatureRequest
 from qgis.core import QgsField
 from qgis.core import QgsGeometry
 from qgis.core import QgsMultiLineString
 from qgis.core import QgsUnitTypes
+from qgis.core import QgsVectorDataProvider
 from qgis.core import QgsWkbTypes
 
 from qgis.PyQt.QtCore import QVariant
@@ -119,9 +118,13 @@ class Vector(object):
         return
 
     def write_point_coordinates(self, layer, transform_context, latlon_dd=False, latlon_ddm=False, xy=False,
-                                crs_xy=None):
+                                crs_xy=None, chunk_size=None):
         """Write the point coordinates (LAT/LONG) of the SHP file into the attribute table.
 
+        Pending edits of the layer are saved first. Coordinates of all points are
+        transformed at once and written to the data provider in one batch
+        (or in batches of `chunk_size` features to limit memory use on huge layers).
+
         Parameters
         ----------
         layer : QgsVectorLayer
@@ -136,6 +139,8 @@ class Vector(object):
             write XY (Default value = False)
         crs_xy : QgsCoordinateReferenceSystem or None
             output CRS for XY coordinate attribute (Default value = None)
+        chunk_size : int or None
+            number of features per batch, all at once if None (Default value = None)
 
         Returns
         -------
@@ -172,27 +177,31 @@ class Vector(object):
 
         # get CRS of input layer and create coordinate transformation to EPSG:4326
         crs_layer = layer.crs()
-        trans_4326 = QgsCoordinateTransform(crs_layer, QgsCoordinateReferenceSystem('EPSG:4326'), transform_context)
-        trans_xy = QgsCoordinateTransform(crs_layer, crs_xy, transform_context)
+        trans_4326 = utils.get_transform(crs_layer, utils.get_crs('EPSG:4326'), transform_context)
+        trans_xy = utils.get_transform(crs_layer, crs_xy, transform_context)
 
-        # with edit(layer):
+        # commit pending edits (values are written to the data provider directly)
+        if layer.isEditable():
+            layer.commitChanges()
 
-        if not layer.isEditable():
-            layer.startEditing()
+        provider = layer.dataProvider()
+        if not provider.capabilities() & QgsVectorDataProvider.ChangeAttributeValues:
+            return 1, 'Attribute values of this layer cannot be changed!\n'
 
         # delete fields previously created by Cruise Tools
         prefix_list = ['lat_D', 'lon_D', 'x_epsg', 'y_epsg']
         self.delete_fields_by_prefix(layer, prefix_list)
 
+        new_fields = []
         if latlon_dd:
             # create fields for lat_DD and lon_DD coordinates in attribute table
-            layer.addAttribute(QgsField(lat_dd_field, QVariant.Double, len=10, prec=6))
-            layer.addAttribute(QgsField(lon_dd_field, QVariant.Double, len=10, prec=6))
+            new_fields.append(QgsField(lat_dd_field, QVariant.Double, len=10, prec=6))
+            new_fields.append(QgsField(lon_dd_field, QVariant.Double, len=10, prec=6))
 
         if latlon_ddm:
             # create fields for lat_DDM and lon_DDM coordinates in attribute table
-            layer.addAttribute(QgsField(lat_ddm_field, QVariant.String, len=11))
-            layer.addAttribute(QgsField(lon_ddm_field, QVariant.String, len=12))
+            new_fields.append(QgsField(lat_ddm_field, QVariant.String, len=11))
+            new_fields.append(QgsField(lon_ddm_field, QVariant.String, len=12))
 
         if xy:
             # set field precision depending on if CRS is geographic or not
@@ -201,46 +210,66 @@ class Vector(object):
             else:
                 prec = 2
             # create fields for lat_DDM and lon_DDM coordinates in attribute table
-            layer.addAttribute(QgsField(x_field, QVariant.Double, len=10, prec=prec))
-            layer.addAttribute(QgsField(y_field, QVariant.Double, len=10, prec=prec))
+            new_fields.append(QgsField(x_field, QVariant.Double, len=10, prec=prec))
+            new_fields.append(QgsField(y_field, QVariant.Double, len=10, prec=prec))
 
-        # update attribute table fields
-        layer.updateFields()
+        provider.addAttributes(new_fields)
 
-        # get all features
-        features = self.get_features(layer, selected=False)
-
-        for feature in features:
-            # get geometry of feature
-            geom = feature.geometry().asPoint()
+        # update attribute table fields and resolve field indices once
+        layer.updateFields()
+        fields = layer.fields()
+        lat_dd_idx, lon_dd_idx = fields.indexFromName(lat_dd_field), fields.indexFromName(lon_dd_field)
+        lat_ddm_idx, lon_ddm_idx = fields.indexFromName(lat_ddm_field), fields.indexFromName(lon_ddm_field)
+        x_idx, y_idx = fields.indexFromName(x_field), fields.indexFromName(y_field)
+
+        def write_chunk(fids, x, y):
+            """Transform coordinates of points and write attribute values of all features at once."""
+            attribute_map = {fid: {} for fid in fids}
+
+            if latlon_dd or latlon_ddm:
+                # transform geometries to EPSG:4326 CRS
+                lon, lat = utils.transform_xy(x, y, trans_4326)
+                for fid, lat_i, lon_i in zip(fids, lat.tolist(), lon.tolist()):
+                    if latlon_dd:
+                        attribute_map[fid][lat_dd_idx] = lat_i
+                        attribute_map[fid][lon_dd_idx] = lon_i
+                    if latlon_ddm:
+                        # convert DD to DDM
+                        lat_ddm, lon_ddm = utils.dd2ddm(lat_i, lon_i)
+                        attribute_map[fid][lat_ddm_idx] = lat_ddm
+                        attribute_map[fid][lon_ddm_idx] = lon_ddm
 
-            # transform geometry to EPSG:4326 CRS
-            geom_4326 = trans_4326.transform(geom)
+            if xy:
+                # transform geometries to output CRS
+                x_xy, y_xy = utils.transform_xy(x, y, trans_xy)
+                for fid, x_i, y_i in zip(fids, x_xy.tolist(), y_xy.tolist()):
+                    attribute_map[fid][x_idx] = x_i
+                    attribute_map[fid][y_idx] = y_i
 
-            # transform geometry to EPSG:4326 CRS
-            geom_xy = trans_xy.transform(geom)
+            return provider.changeAttributeValues(attribute_map)
 
-            if latlon_dd:
-                # set geometry of each feature in the vector layer into separate fields
-                feature.setAttribute(feature.fieldNameIndex(lat_dd_field), geom_4326.y())
-                feature.setAttribute(feature.fieldNameIndex(lon_dd_field), geom_4326.x())
+        # get feature IDs and coordinates of all features, without attributes
+        request = QgsFeatureRequest().setNoAttributes()
 
-            if latlon_ddm:
-                # convert DD to DDM
-                lat_ddm, lon_ddm = utils.dd2ddm(geom_4326.y(), geom_4326.x())
-                # set DDM geometry of each feature
-                feature.setAttribute(feature.fieldNameIndex(lat_ddm_field), lat_ddm)
-                feature.setAttribute(feature.fieldNameIndex(lon_ddm_field), lon_ddm)
+        fids, x, y = [], [], []
+        for feature in layer.getFeatures(request):
+            geom = feature.geometry()
+            if geom.isEmpty():
+                continue
+            point = geom.asPoint()
+            fids.append(feature.id())
+            x.append(point.x())
+            y.append(point.y())
 
-            if xy:
-                # set geometry of each feature in the vector layer into separate fields
-                feature.setAttribute(feature.fieldNameIndex(x_field), geom_xy.x())
-                feature.setAttribute(feature.fieldNameIndex(y_field), geom_xy.y())
+            if chunk_size is not None and len(fids) >= chunk_size:
+                if not write_chunk(fids, x, y):
+                    return 1, 'Coordinate attributes could not be written!\n'
+                fids, x, y = [], [], []
 
-            # update attribute table
-            layer.updateFeature(feature)
+        if len(fids) > 0 and not write_chunk(fids, x, y):
+            return 1, 'Coordinate attributes could not be written!\n'
 
-        layer.commitChanges()
+        layer.reload()
 
         return 0, None
 
@@ -502,8 +531,8 @@ class Vector(object):
         else:
             epsg_code = f'327{utm_band:02d}'
 
-        # create CRS
-        crs_utm = QgsCoordinateReferenceSystem(f'EPSG:{epsg_code}')
+        # get (memoized) CRS
+        crs_utm = utils.get_crs(f'EPSG:{epsg_code}')
 
         return crs_utm
 
@@ -542,3 +571,50 @@ class Vector(object):
         var_type, length, precision = mapping.get(dtype, (QVariant.String, 255, 0))
 
         return QgsField(name, var_type, len=length, prec=precision)
+
+    def raster_sample_fields(self, raster_layer, band, additional_layers=None):
+        """Get sampled raster bands and their value fields.
+
+        The selected band of the input raster comes first, followed by all
+        bands of the additional rasters (if the input raster is listed again,
+        only its other bands). Field names are the sanitized layer names,
+        with band suffix (`_b2`) for multi-band rasters.
+
+        Parameters
+        ----------
+        raster_layer : QgsRasterLayer
+            input raster layer
+        band : int
+            band number of input raster
+        additional_layers : list of QgsRasterLayer or None
+            additional raster layers, all bands are sampled (Default value = None)
+
+        Returns
+        -------
+        columns : list of (QgsRasterLayer, int)
+            raster layer and band number of each value column
+        fields : list of QgsField
+            value field of each column
+
+        """
+        columns = [(raster_layer, band)]
+        for layer in additional_layers or []:
+            for b in range(1, layer.bandCount() + 1):
+                if layer.id() == raster_layer.id() and b == band:
+                    continue
+                columns.append((layer, b))
+
+        fields, names = [], set()
+        for layer, b in columns:
+            name = layer.name().replace(' ', '_')
+            if layer.bandCount() > 1 and (layer, b) != columns[0]:
+                name = f'{name}_b{b}'
+            # unique field names (e.g. layers with same name)
+            unique_name, i = name, 1
+            while unique_name in names:
+                unique_name = f'{name}_{i}'
+                i += 1
+            names.add(unique_name)
+            fields.append(self.raster_band_field(layer, b, unique_name))
+
+        return columns, fields
@@ -4,6 +4,8 @@ from qgis.core import QgsProcessing
 from qgis.core import QgsProcessingAlgorithm
 from qgis.core import QgsProcessingParameterBoolean
 from qgis.core import QgsProcessingParameterCrs
+from qgis.core import QgsProcessingParameterDefinition
+from qgis.core import QgsProcessingParameterNumber
 from qgis.core import QgsProcessingParameterVectorLayer
 
 from qgis.PyQt.QtCore import QCoreApplication
@@ -23,6 +25,7 @@ class WritePointCoordinates(QgsProcessingAlgorithm, Vector):
     LATLON_DDM = 'LATLON_DDM'
     XY = 'XY'
     CRS_XY = 'CRS_XY'
+    CHUNK_SIZE = 'CHUNK_SIZE'
     # outputs:
     OUTPUT = 'OUTPUT'
 
@@ -76,6 +79,18 @@ class WritePointCoordinates(QgsProcessingAlgorithm, Vector):
                 optional=True,
                 defaultValue=None)
         )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                name=self.CHUNK_SIZE,
+                description=self.tr('Features per write batch (0: all at once)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=0,
+                optional=True,
+                minValue=0)
+        )
+        self.parameterDefinition(self.CHUNK_SIZE).setFlags(
+            QgsProcessingParameterDefinition.FlagAdvanced
+        )
 
     def processAlgorithm(self, parameters, context, feedback):  # noqa
         # get input variables as self.* for use in post-processing
@@ -84,6 +99,7 @@ class WritePointCoordinates(QgsProcessingAlgorithm, Vector):
         self.latlon_ddm = self.parameterAsBoolean(parameters, self.LATLON_DDM, context)
         self.xy = self.parameterAsBoolean(parameters, self.XY, context)
         self.crs_xy = self.parameterAsCrs(parameters, self.CRS_XY, context)
+        self.chunk_size = self.parameterAsInt(parameters, self.CHUNK_SIZE, context) or None
 
         # set new default values in config
         feedback.pushConsoleInfo(self.tr('Storing new default settings in config...'))
@@ -105,7 +121,7 @@ class WritePointCoordinates(QgsProcessingAlgorithm, Vector):
         # run the function from Vector base class
         feedback.pushConsoleInfo(self.tr('Adding coordinate attributes...\n'))
         error, result = self.write_point_coordinates(self.vector_layer, transform_context, self.latlon_dd,
-                                                     self.latlon_ddm, self.xy, self.crs_xy)
+                                                     self.latlon_ddm, self.xy, self.crs_xy, self.chunk_size)
         if error:
             feedback.reportError(self.tr(result), fatalError=True)
             return {}